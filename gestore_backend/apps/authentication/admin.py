@@ -14,7 +14,10 @@ from django.utils.safestring import mark_safe
 from apps.core.admin import (
     BaseModelAdmin, NamedModelAdmin, ActivableModelAdmin, AuditableModelAdmin
 )
-from .models import Role, UserProfile, UserSession, UserAuditLog
+from . import throttling as login_throttle
+from .authz import invalidate_user
+from .models import Role, UserProfile, UserSession, UserLoginDaily, UserAuditLog
+from .session_lifecycle import close_sessions
 
 User = get_user_model()
 
@@ -366,6 +369,9 @@ class UserAdmin(BaseUserAdmin):
     def deactivate_users(self, request, queryset):
         """Désactiver les utilisateurs sélectionnés"""
         updated = queryset.update(is_active=False)
+        # update() ne déclenche pas les signaux : jetons déjà émis périmés
+        for user_id in queryset.values_list('pk', flat=True):
+            invalidate_user(user_id)
         self.message_user(
             request,
             f'{updated} utilisateur(s) désactivé(s).'
@@ -379,6 +385,8 @@ class UserAdmin(BaseUserAdmin):
             locked_until=None,
             failed_login_attempts=0
         )
+        for username in queryset.values_list('username', flat=True):
+            login_throttle.reset(username)
         self.message_user(
             request,
             f'{updated} compte(s) déverrouillé(s).'
@@ -388,6 +396,8 @@ class UserAdmin(BaseUserAdmin):
     def reset_failed_attempts(self, request, queryset):
         """Réinitialiser le compteur de tentatives échouées"""
         updated = queryset.update(failed_login_attempts=0)
+        for username in queryset.values_list('username', flat=True):
+            login_throttle.reset(username)
         self.message_user(
             request,
             f'{updated} compteur(s) réinitialisé(s).'
@@ -469,12 +479,12 @@ class UserSessionAdmin(BaseModelAdmin):
     """
     list_display = [
         'user', 'session_key_preview', 'ip_address',
-        'login_at', 'logout_at', 'is_active_badge',
-        'duration'
+        'login_at', 'last_seen_at', 'logout_at', 'is_active_badge',
+        'end_reason', 'duration'
     ]
     
     list_filter = [
-        'is_active', 'login_at', 'logout_at'
+        'is_active', 'end_reason', 'login_at', 'logout_at'
     ]
     
     search_fields = [
@@ -486,16 +496,16 @@ class UserSessionAdmin(BaseModelAdmin):
     
     readonly_fields = [
         'id', 'user', 'session_key', 'ip_address',
-        'user_agent', 'login_at', 'logout_at',
+        'user_agent', 'login_at', 'last_seen_at', 'logout_at', 'end_reason',
         'created_at', 'updated_at', 'sync_status', 'last_sync_at'
     ]
     
     fieldsets = (
         ('Session', {
-            'fields': ('user', 'session_key', 'is_active')
+            'fields': ('user', 'session_key', 'is_active', 'end_reason')
         }),
         ('Informations de connexion', {
-            'fields': ('ip_address', 'user_agent', 'login_at', 'logout_at')
+            'fields': ('ip_address', 'user_agent', 'login_at', 'last_seen_at', 'logout_at')
         }),
         ('Métadonnées', {
             'fields': (
@@ -565,10 +575,7 @@ class UserSessionAdmin(BaseModelAdmin):
     @admin.action(description='Terminer les sessions sélectionnées')
     def end_sessions(self, request, queryset):
         """Terminer les sessions actives sélectionnées"""
-        updated = queryset.filter(is_active=True).update(
-            is_active=False,
-            logout_at=timezone.now()
-        )
+        updated = close_sessions(queryset, 'revoked')
         self.message_user(
             request,
             f'{updated} session(s) terminée(s).'
@@ -581,6 +588,37 @@ class UserSessionAdmin(BaseModelAdmin):
         return False
 
 
+# ========================
+# USER LOGIN DAILY ADMIN
+# ========================
+
+@admin.register(UserLoginDaily)
+class UserLoginDailyAdmin(BaseModelAdmin):
+    """
+    Statistiques de connexion journalières (sessions archivées), lecture seule
+    """
+    list_display = [
+        'date', 'user', 'login_count', 'total_seconds',
+        'idle_count', 'expired_count'
+    ]
+    
+    list_filter = ['date']
+    
+    search_fields = ['user__username', 'user__email']
+    
+    ordering = ['-date']
+    
+    date_hierarchy = 'date'
+    
+    list_select_related = ['user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ========================
 # USER AUDIT LOG ADMIN
 # ========================
@@ -0,0 +1,43 @@
+"""
+Journal d'audit - GESTORE
+Point d'entrée unique pour tracer une action dans UserAuditLog, depuis
+n'importe quelle application. L'écriture est différée et groupée (voir
+apps.core.write_behind) : l'appelant ne bloque jamais sur la base.
+"""
+from django.utils import timezone
+
+from apps.core.write_behind import write_behind
+
+from .models import UserAuditLog
+
+# Adresse des actions sans requête HTTP (commandes, tâches)
+LOCAL_ADDRESS = '127.0.0.1'
+
+
+def audit_log(user, action, request=None, instance=None, model_name=None, changes=None):
+    """
+    Trace une action de l'utilisateur
+
+    Args:
+        user: utilisateur à l'origine de l'action
+        action: type d'action ('login', 'update', 'lock_account'...)
+        request: requête HTTP (adresse IP et agent utilisateur ; sans
+            requête, l'action est datée de la machine locale)
+        instance: objet concerné (modèle, identifiant et libellé)
+        model_name: nom du modèle si aucune instance n'est fournie
+        changes: détail des modifications (JSON)
+    """
+    meta = request.META if request is not None else {}
+    entry = UserAuditLog(
+        user=user,
+        action=action,
+        model_name=model_name or (type(instance).__name__ if instance is not None else None),
+        object_id=instance.pk if instance is not None else None,
+        object_repr=str(instance)[:200] if instance is not None else '',
+        changes=changes,
+        ip_address=meta.get('REMOTE_ADDR') or LOCAL_ADDRESS,
+        user_agent=meta.get('HTTP_USER_AGENT', ''),
+        timestamp=timezone.now(),
+    )
+    write_behind.create(entry)
+    return entry
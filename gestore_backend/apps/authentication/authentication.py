@@ -0,0 +1,48 @@
+"""
+Authentification JWT GESTORE
+Variante de JWTAuthentication qui n'interroge pas la base à chaque appel :
+l'utilisateur, son rôle et son magasin sont reconstruits depuis les claims
+signés du jeton (voir tokens.GestoreRefreshToken).
+
+Les claims ne sont utilisés que si leur version est encore la version
+courante des droits de l'utilisateur (compteurs du cache, incrémentés à la
+modification de l'utilisateur, de son rôle, de ses groupes ou des
+emplacements). Sinon - droits modifiés, compte désactivé ou verrouillé,
+ancien jeton sans claims - l'utilisateur est chargé depuis la base comme
+avec JWTAuthentication.
+
+Le cache doit être partagé entre les processus (Redis) pour que les
+modifications faites par un processus soient vues par les autres. Avec un
+cache local (LocMemCache) ou sans cache (DummyCache), un processus ne voit pas
+les versions incrémentées ailleurs (compte désactivé, rôle modifié) : les
+claims sont alors ignorés et l'utilisateur est toujours chargé en base.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .authz import cache_is_shared, version_stamp
+from .tokens import CLAIM, user_from_claims
+
+
+class GestoreJWTAuthentication(JWTAuthentication):
+    """Authentification JWT sans requête tant que les droits n'ont pas changé"""
+
+    def get_user(self, validated_token):
+        claims = validated_token.get(CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if claims and user_id and not api_settings.CHECK_REVOKE_TOKEN and cache_is_shared():
+            stamp = version_stamp(user_id)
+            if stamp is not None and claims.get('v') == stamp:
+                return user_from_claims(user_id, claims)
+        return super().get_user(validated_token)
+
+
+def full_user(user):
+    """
+    Utilisateur complet (tous les champs, rôle et magasin) pour les vues qui
+    le sérialisent en entier : évite une requête par champ différé
+    """
+    if not user.get_deferred_fields():
+        return user
+    return get_user_model().objects.select_related('role', 'assigned_store').get(pk=user.pk)
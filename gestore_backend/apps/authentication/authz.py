@@ -0,0 +1,222 @@
+"""
+Contexte d'autorisation - GESTORE
+Rôle, permissions Django et magasins accessibles d'un utilisateur, chargés
+une fois puis réutilisés :
+- dans la requête : mémorisé sur l'objet utilisateur (avec sa version)
+- entre les requêtes : cache partagé de courte durée (AUTHZ_CACHE_TIMEOUT),
+  invalidé par numéro de version quand un rôle, un utilisateur, un groupe
+  ou un emplacement change (voir signals)
+
+Le contexte amorce aussi les caches de l'objet utilisateur (user.role,
+user.assigned_store, permissions de ModelBackend) : le code existant qui lit
+request.user.role.can_... ou appelle user.has_perm() ne fait plus de requête.
+"""
+import time
+from dataclasses import dataclass, field
+
+from django.contrib import auth
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from apps.core.conf import gestore_setting
+
+GLOBAL_VERSION_KEY = 'authz:version'
+
+
+def _user_version_key(user_id):
+    return f'authz:user:{user_id}:version'
+
+
+def authz_timeout():
+    return gestore_setting('AUTHZ_CACHE_TIMEOUT', 60)
+
+
+@dataclass
+class AuthorizationContext:
+    """Instantané des droits d'un utilisateur"""
+    user_id: object
+    is_superuser: bool
+    role_id: object
+    assigned_store_id: object
+    role: object = None
+    assigned_store: object = None
+    permissions: frozenset = frozenset()
+    # Magasin de rattachement et ses emplacements descendants
+    store_location_ids: frozenset = field(default_factory=frozenset)
+
+    @property
+    def role_type(self):
+        return self.role.role_type if self.role else None
+
+    @property
+    def is_multi_store_admin(self):
+        return self.role_type == 'admin' and self.assigned_store_id is None
+
+    def has_flag(self, name):
+        """Droit du rôle (can_manage_sales...), toujours vrai pour un superutilisateur"""
+        if self.is_superuser:
+            return True
+        return bool(self.role and getattr(self.role, name, False))
+
+    def matches(self, user):
+        """Vrai si l'instantané correspond encore aux champs de l'utilisateur chargé"""
+        return (
+            self.role_id == user.role_id
+            and self.assigned_store_id == user.assigned_store_id
+            and self.is_superuser == user.is_superuser
+        )
+
+
+# ========================
+# CHARGEMENT
+# ========================
+
+def get_authorization(user):
+    """
+    Contexte d'autorisation de l'utilisateur (None si non authentifié)
+    Zéro requête quand il est en cache et à jour.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+
+    key = _context_key(user.pk)
+    memo = getattr(user, '_authz', None)
+    if memo is not None and memo[0] == key and memo[1].matches(user):
+        return memo[1]
+
+    context = cache.get(key)
+    if context is None or not context.matches(user):
+        context = build_authorization(user)
+        cache.set(key, context, timeout=authz_timeout())
+
+    _prime_user(user, key, context)
+    return context
+
+
+def build_authorization(user):
+    """Construit le contexte depuis la base (rôle, permissions, magasins)"""
+    role = user.role if user.role_id else None
+    store = user.assigned_store if user.assigned_store_id else None
+
+    permissions = frozenset()
+    if user.is_active and not user.is_superuser:
+        # Mêmes permissions que user.has_perm() (tous les backends)
+        permissions = frozenset().union(*(
+            backend.get_all_permissions(user)
+            for backend in auth.get_backends()
+            if hasattr(backend, 'get_all_permissions')
+        ))
+
+    return AuthorizationContext(
+        user_id=user.pk,
+        is_superuser=user.is_superuser,
+        role_id=user.role_id,
+        assigned_store_id=user.assigned_store_id,
+        role=role,
+        assigned_store=store,
+        permissions=permissions,
+        store_location_ids=frozenset(store_locations(store.pk)) if store else frozenset(),
+    )
+
+
+def store_locations(store_id):
+    """
+    Identifiants du magasin et de tous ses emplacements descendants
+    (liste vide si ce n'est pas un magasin), mis en cache par version
+    """
+    from apps.inventory.models import Location
+
+    key = f'authz:store:{store_id}:{_global_version()}'
+    ids = cache.get(key)
+    if ids is None:
+        try:
+            store = Location.objects.get(id=store_id, location_type='store')
+        except Location.DoesNotExist:
+            ids = []
+        else:
+            ids = [store.id] + [child.id for child in store.get_children_recursive()]
+        cache.set(key, ids, timeout=authz_timeout())
+    return ids
+
+
+def _prime_user(user, key, context):
+    """Amorce les caches de l'objet utilisateur à partir du contexte"""
+    user._authz = (key, context)
+    role_field = user._meta.get_field('role')
+    if context.role is not None and not role_field.is_cached(user):
+        role_field.set_cached_value(user, context.role)
+    store_field = user._meta.get_field('assigned_store')
+    if context.assigned_store is not None and not store_field.is_cached(user):
+        store_field.set_cached_value(user, context.assigned_store)
+    if not user.is_superuser and not hasattr(user, '_perm_cache'):
+        # Cache utilisé par ModelBackend.get_all_permissions / has_perm
+        user._perm_cache = set(context.permissions)
+
+
+# ========================
+# VERSIONS ET INVALIDATION
+# ========================
+
+def _versions(keys):
+    """
+    Valeurs actuelles des compteurs de version. Un compteur absent (jamais
+    incrémenté ou évincé du cache) repart d'une valeur horodatée : il ne
+    retombe jamais sur une version déjà distribuée (jetons d'accès compris).
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _global_version():
+    return _versions([GLOBAL_VERSION_KEY])[0]
+
+
+def _context_key(user_id):
+    return f'authz:ctx:{user_id}:{version_stamp(user_id)}'
+
+
+def version_stamp(user_id):
+    """
+    Version des droits de l'utilisateur (globale et personnelle), ex. '17:42'
+    None si le cache ne conserve rien (DummyCache) : aucune version fiable.
+    """
+    versions = _versions([GLOBAL_VERSION_KEY, _user_version_key(user_id)])
+    if None in versions:
+        return None
+    return ':'.join(str(version) for version in versions)
+
+
+def cache_is_shared():
+    """
+    Faux pour un cache propre au processus (LocMemCache) ou sans mémoire
+    (DummyCache) : une version incrémentée par un processus n'y est pas
+    vue par les autres.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+
+
+def invalidate_all():
+    """Rôles, groupes ou emplacements modifiés : tous les contextes sont périmés"""
+    _bump(GLOBAL_VERSION_KEY)
+    # Au commit aussi : un autre processus a pu recharger les données non validées
+    transaction.on_commit(lambda: _bump(GLOBAL_VERSION_KEY))
+
+
+def invalidate_user(user_id):
+    """Utilisateur modifié : seul son contexte est périmé"""
+    key = _user_version_key(user_id)
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
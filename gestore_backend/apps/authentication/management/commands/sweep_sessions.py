@@ -0,0 +1,25 @@
+"""
+Commande de balayage des sessions - GESTORE
+Termine les sessions inactives ou trop anciennes, puis archive dans
+UserLoginDaily les sessions terminées hors rétention (voir
+apps.authentication.session_lifecycle).
+
+À planifier régulièrement (cron), par exemple toutes les 15 minutes.
+
+Usage : python manage.py sweep_sessions
+"""
+from django.core.management.base import BaseCommand
+
+from apps.authentication.session_lifecycle import sweep
+
+
+class Command(BaseCommand):
+    help = "Expire les sessions inactives ou trop anciennes et archive les sessions hors rétention"
+
+    def handle(self, *args, **options):
+        counts = sweep()
+        self.stdout.write(
+            f"{counts['expired']} session(s) expirée(s) (durée maximale), "
+            f"{counts['idle']} par inactivité, "
+            f"{counts['archived']} archivée(s)"
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_alter_user_role_alter_userauditlog_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userauditlog',
+            index=models.Index(fields=['user', 'timestamp', 'id'], name='auth_audit__user_id_9cb6db_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_userauditlog_cursor_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLoginDaily',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Date et heure de création automatique', verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date et heure de dernière modification automatique', verbose_name='Date de modification')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identifiant UUID unique généré automatiquement', primary_key=True, serialize=False, verbose_name='Identifiant unique')),
+                ('is_deleted', models.BooleanField(default=False, help_text="Marque l'enregistrement comme supprimé sans le supprimer physiquement", verbose_name='Supprimé')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Date et heure de suppression logique', null=True, verbose_name='Date de suppression')),
+                ('sync_status', models.CharField(choices=[('synced', 'Synchronisé'), ('pending', 'En attente de synchronisation'), ('conflict', 'Conflit de synchronisation'), ('error', 'Erreur de synchronisation')], default='pending', help_text='État de synchronisation avec la base distante', max_length=20, verbose_name='Statut de synchronisation')),
+                ('last_sync_at', models.DateTimeField(blank=True, help_text='Date et heure de dernière synchronisation réussie', null=True, verbose_name='Dernière synchronisation')),
+                ('sync_hash', models.CharField(blank=True, help_text='Hash MD5 des données pour détecter les modifications', max_length=64, verbose_name='Hash de synchronisation')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('login_count', models.PositiveIntegerField(default=0, verbose_name='Connexions')),
+                ('total_seconds', models.PositiveBigIntegerField(default=0, verbose_name='Durée cumulée (s)')),
+                ('idle_count', models.PositiveIntegerField(default=0, verbose_name='Sessions expirées par inactivité')),
+                ('expired_count', models.PositiveIntegerField(default=0, verbose_name='Sessions expirées (durée maximale)')),
+            ],
+            options={
+                'verbose_name': 'Statistique de connexion',
+                'verbose_name_plural': 'Statistiques de connexion',
+                'db_table': 'auth_login_daily',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='usersession',
+            name='end_reason',
+            field=models.CharField(blank=True, choices=[('logout', 'Déconnexion'), ('idle', 'Inactivité'), ('expired', 'Durée maximale atteinte'), ('revoked', 'Terminée par un administrateur')], max_length=10, verbose_name='Motif de fin'),
+        ),
+        migrations.AddField(
+            model_name='usersession',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, help_text='Dernier rafraîchissement du jeton de la session', null=True, verbose_name='Dernière activité'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'is_active'], name='auth_user_s_user_id_be2038_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['is_active', 'login_at'], name='auth_user_s_is_acti_f49272_idx'),
+        ),
+        migrations.AddField(
+            model_name='userlogindaily',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_stats', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userlogindaily',
+            unique_together={('user', 'date')},
+        ),
+    ]
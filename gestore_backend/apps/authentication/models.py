@@ -241,11 +241,8 @@ class User(AbstractUser):
             return False
         
         if self.locked_until and timezone.now() > self.locked_until:
-            # Le verrouillage a expiré
-            self.is_locked = False
-            self.locked_until = None
-            self.failed_login_attempts = 0
-            self.save(update_fields=['is_locked', 'locked_until', 'failed_login_attempts'])
+            # Le verrouillage a expiré ; pas d'écriture pendant une lecture :
+            # l'état est remis à zéro à la prochaine connexion réussie
             return False
         
         return True
@@ -480,11 +477,82 @@ class UserSession(BaseModel):
         verbose_name="Session active"
     )
     
+    # Cycle de vie (voir apps.authentication.session_lifecycle)
+    END_REASONS = [
+        ('logout', 'Déconnexion'),
+        ('idle', 'Inactivité'),
+        ('expired', 'Durée maximale atteinte'),
+        ('revoked', 'Terminée par un administrateur'),
+    ]
+    
+    last_seen_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Dernière activité",
+        help_text="Dernier rafraîchissement du jeton de la session"
+    )
+    
+    end_reason = models.CharField(
+        max_length=10,
+        choices=END_REASONS,
+        blank=True,
+        verbose_name="Motif de fin"
+    )
+    
     class Meta:
         db_table = 'auth_user_session'
         verbose_name = 'Session utilisateur'
         verbose_name_plural = 'Sessions utilisateur'
         ordering = ['-login_at']
+        indexes = [
+            models.Index(fields=['user', 'is_active']),  # Sessions actives d'un utilisateur
+            models.Index(fields=['is_active', 'login_at']),  # Balayage des sessions expirées
+        ]
+
+
+class UserLoginDaily(BaseModel):
+    """
+    Statistiques de connexion par utilisateur et par jour
+    Agrégats des sessions archivées (les sessions détaillées sont supprimées
+    après SESSION_RETENTION_DAYS)
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='login_stats',
+        verbose_name="Utilisateur"
+    )
+    
+    date = models.DateField(
+        verbose_name="Jour"
+    )
+    
+    login_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Connexions"
+    )
+    
+    total_seconds = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Durée cumulée (s)"
+    )
+    
+    idle_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sessions expirées par inactivité"
+    )
+    
+    expired_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sessions expirées (durée maximale)"
+    )
+    
+    class Meta:
+        db_table = 'auth_login_daily'
+        verbose_name = 'Statistique de connexion'
+        verbose_name_plural = 'Statistiques de connexion'
+        ordering = ['-date']
+        unique_together = ['user', 'date']
 
 
 class UserAuditLog(BaseModel):
@@ -563,5 +631,8 @@ class UserAuditLog(BaseModel):
         verbose_name = 'Journal d\'audit'
         verbose_name_plural = 'Journaux d\'audit'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'timestamp', 'id']),  # Pagination par curseur
+        ]
 
         
\ No newline at end of file
@@ -4,16 +4,20 @@ Gestion complète des utilisateurs, rôles et sécurité avec optimisations
 MODIFICATION MAJEURE : Ajout contexte multi-magasins (assigned_store, available_stores)
 """
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
 from django.db import transaction
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from apps.core.serializers import (
     BaseModelSerializer, AuditableSerializer, NamedModelSerializer, 
     ActivableModelSerializer
 )
 from .models import Role, UserProfile, UserSession, UserAuditLog
+from .session_lifecycle import SESSION_CLAIM, is_session_closed, touch_session
+from .tokens import GestoreRefreshToken
 
 User = get_user_model()
 
@@ -553,6 +557,27 @@ class LoginSerializer(serializers.Serializer):
         return context
 
 
+class GestoreTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rafraîchissement JWT : le nouveau jeton d'accès porte l'instantané des
+    droits à jour (voir tokens.GestoreRefreshToken)
+    Le rafraîchissement marque l'activité de la session du jeton ; une
+    session terminée (déconnexion, révocation) ou échue (inactivité, durée
+    maximale) est refusée.
+    """
+    token_class = GestoreRefreshToken
+    
+    def validate(self, attrs):
+        session_id = self.token_class(attrs['refresh']).get(SESSION_CLAIM)
+        if session_id and is_session_closed(session_id):
+            raise AuthenticationFailed('Session terminée. Veuillez vous reconnecter.', code='session_closed')
+        
+        data = super().validate(attrs)
+        if session_id:
+            touch_session(session_id)
+        return data
+
+
 class UserAuditLogSerializer(BaseModelSerializer):
     """Serializer pour les logs d'audit"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
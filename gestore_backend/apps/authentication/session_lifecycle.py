@@ -0,0 +1,212 @@
+"""
+Cycle de vie des sessions - GESTORE
+Ouverture, activité, expiration et archivage des UserSession.
+
+- Ouverture : à la connexion, écrite dans la requête (c'est la ligne qui
+  autorise les rafraîchissements et que les fins de session terminent) ;
+  l'identifiant de session est porté par le jeton (claim 'sid')
+- Activité : chaque rafraîchissement du jeton met à jour last_seen_at
+  (écriture différée) ; une session terminée ne peut plus être rafraîchie
+- Expiration : inactivité (SESSION_IDLE_MINUTES sans rafraîchissement) ou
+  durée maximale (SESSION_MAX_HOURS depuis la connexion), vérifiées à
+  chaque rafraîchissement
+- Archivage : les sessions terminées depuis plus de SESSION_RETENTION_DAYS
+  sont agrégées dans UserLoginDaily puis supprimées
+
+sweep(), lancé périodiquement (commande sweep_sessions), termine par lots
+(SESSION_SWEEP_BATCH_SIZE) les sessions échues que personne ne rafraîchit
+et archive les sessions terminées.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.conf import gestore_setting
+from apps.core.write_behind import write_behind
+
+from .models import UserLoginDaily, UserSession
+
+# Claim du jeton portant l'identifiant de la session
+SESSION_CLAIM = 'sid'
+
+# Compteurs cumulés dans UserLoginDaily
+STAT_FIELDS = ('login_count', 'total_seconds', 'idle_count', 'expired_count')
+
+
+# ========================
+# OUVERTURE / ACTIVITÉ / FIN
+# ========================
+
+def open_session(user, session_key, ip_address, user_agent, now):
+    """
+    Crée la session de connexion et la retourne. Écriture immédiate : une
+    création différée, encore absente de la base, échapperait à
+    close_sessions (déconnexion juste après la connexion) et resterait
+    active, donc rafraîchissable.
+    """
+    session = UserSession(
+        user=user,
+        session_key=session_key,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        login_at=now,
+        last_seen_at=now
+    )
+    session.save(force_insert=True)
+    return session
+
+
+def touch_session(session_id):
+    """Activité sur la session (rafraîchissement du jeton)"""
+    write_behind.update(UserSession, session_id, values={'last_seen_at': timezone.now()})
+
+
+def is_session_closed(session_id, now=None):
+    """
+    Vrai si la session est terminée ou introuvable (archivée). Une session
+    active arrivée à échéance est terminée ici, datée de l'échéance comme
+    par expire_sessions, sans attendre le balayage.
+    """
+    session = UserSession.objects.filter(pk=session_id).values(
+        'is_active', 'login_at', 'last_seen_at'
+    ).first()
+    if session is None or not session['is_active']:
+        return True
+
+    now = now or timezone.now()
+    max_end = session['login_at'] + _max_age()
+    idle_end = (session['last_seen_at'] or session['login_at']) + _idle_age()
+    if max_end < now:
+        logout_at, reason = max_end, 'expired'
+    elif idle_end < now:
+        logout_at, reason = idle_end, 'idle'
+    else:
+        return False
+    UserSession.objects.filter(pk=session_id, is_active=True).update(
+        is_active=False, logout_at=logout_at, end_reason=reason
+    )
+    return True
+
+
+def close_sessions(queryset, reason):
+    """Termine les sessions actives du queryset ; retourne leur nombre"""
+    return queryset.filter(is_active=True).update(
+        is_active=False,
+        logout_at=timezone.now(),
+        end_reason=reason
+    )
+
+
+# ========================
+# BALAYAGE
+# ========================
+
+def sweep(now=None):
+    """Expire puis archive les sessions ; retourne les compteurs"""
+    now = now or timezone.now()
+    expired, idle = expire_sessions(now)
+    archived = archive_sessions(now)
+    return {'expired': expired, 'idle': idle, 'archived': archived}
+
+
+def expire_sessions(now=None):
+    """
+    Termine les sessions actives trop anciennes ou inactives, par lots
+
+    La fin est datée de l'échéance (et non du balayage) pour que les durées
+    de session restent exactes.
+
+    Returns:
+        tuple: (sessions expirées par durée maximale, par inactivité)
+    """
+    now = now or timezone.now()
+    max_age, idle_age = _max_age(), _idle_age()
+    active = UserSession.objects.filter(is_active=True)
+
+    expired = _update_in_batches(
+        active.filter(login_at__lt=now - max_age),
+        is_active=False, logout_at=F('login_at') + max_age, end_reason='expired'
+    )
+    idle = _update_in_batches(
+        active.alias(last_activity=Coalesce('last_seen_at', 'login_at')).filter(
+            last_activity__lt=now - idle_age
+        ),
+        is_active=False, logout_at=Coalesce('last_seen_at', 'login_at') + idle_age, end_reason='idle'
+    )
+    return expired, idle
+
+
+def archive_sessions(now=None):
+    """
+    Agrège les sessions terminées hors rétention dans UserLoginDaily et
+    les supprime, par lots ; retourne le nombre de sessions archivées
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=gestore_setting('SESSION_RETENTION_DAYS', 90))
+    batch_size = gestore_setting('SESSION_SWEEP_BATCH_SIZE', 1000)
+    archived = 0
+    while True:
+        rows = list(UserSession.objects.filter(
+            is_active=False, login_at__lt=cutoff
+        ).order_by('login_at').values_list('pk', 'user_id', 'login_at', 'logout_at', 'end_reason')[:batch_size])
+        if not rows:
+            return archived
+        with transaction.atomic():
+            _rollup(rows)
+            UserSession.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        archived += len(rows)
+
+
+def _max_age():
+    return timedelta(hours=gestore_setting('SESSION_MAX_HOURS', 168))
+
+
+def _idle_age():
+    return timedelta(minutes=gestore_setting('SESSION_IDLE_MINUTES', 480))
+
+
+def _update_in_batches(queryset, **values):
+    batch_size = gestore_setting('SESSION_SWEEP_BATCH_SIZE', 1000)
+    total = 0
+    while True:
+        ids = list(queryset.order_by('login_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += UserSession.objects.filter(pk__in=ids, is_active=True).update(**values)
+
+
+def _rollup(rows):
+    """Ajoute les sessions aux statistiques journalières (création ou cumul)"""
+    totals = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for _, user_id, login_at, logout_at, end_reason in rows:
+        stats = totals[(user_id, timezone.localdate(login_at))]
+        stats['login_count'] += 1
+        if logout_at and logout_at > login_at:
+            stats['total_seconds'] += int((logout_at - login_at).total_seconds())
+        if end_reason == 'idle':
+            stats['idle_count'] += 1
+        elif end_reason == 'expired':
+            stats['expired_count'] += 1
+
+    existing = {
+        (stat.user_id, stat.date): stat
+        for stat in UserLoginDaily.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in totals},
+            date__in={day for _, day in totals}
+        )
+    }
+    created, updated = [], []
+    for (user_id, day), stats in totals.items():
+        stat = existing.get((user_id, day))
+        if stat is None:
+            created.append(UserLoginDaily(user_id=user_id, date=day, **stats))
+            continue
+        for name, value in stats.items():
+            setattr(stat, name, getattr(stat, name) + value)
+        updated.append(stat)
+    UserLoginDaily.objects.bulk_create(created)
+    UserLoginDaily.objects.bulk_update(updated, STAT_FIELDS)
@@ -2,10 +2,12 @@
 Signaux pour l'application authentication - GESTORE
 Création automatique des profils utilisateur et autres automatisations
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserProfile
+from django.contrib.auth.models import Group
+from .authz import invalidate_all, invalidate_user
+from .models import Role, UserProfile
 
 User = get_user_model()
 
@@ -26,4 +28,57 @@ def save_user_profile(sender, instance, **kwargs):
     Signal pour sauvegarder le profil quand l'utilisateur est sauvegardé
     """
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+
+# ========================
+# INVALIDATION DU CONTEXTE D'AUTORISATION
+# ========================
+
+# Champs de l'utilisateur repris dans le contexte d'autorisation
+# (et dans l'instantané des jetons JWT, voir tokens.USER_FIELDS)
+AUTHZ_USER_FIELDS = {
+    'role', 'role_id', 'assigned_store', 'assigned_store_id', 'is_active', 'is_superuser',
+    'is_locked', 'username', 'first_name', 'last_name', 'employee_code', 'is_staff',
+}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_authorization(sender, instance, update_fields=None, **kwargs):
+    """
+    Contexte périmé quand le rôle, le magasin ou le statut de l'utilisateur
+    change (les enregistrements partiels de last_login & co. sont ignorés)
+    """
+    if update_fields is None or AUTHZ_USER_FIELDS.intersection(update_fields):
+        invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_permissions(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Modification depuis la permission ou le groupe : plusieurs utilisateurs
+        invalidate_all()
+    else:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender='inventory.Location')
+@receiver(post_delete, sender='inventory.Location')
+def invalidate_shared_authorization(sender, **kwargs):
+    """Rôles, groupes ou hiérarchie des emplacements : tous les contextes"""
+    invalidate_all()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_role_permissions(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_all()
@@ -2,6 +2,9 @@
 Tests pour l'application authentication - GESTORE
 Tests des serializers, vues et permissions - VERSION CORRIGÉE
 """
+import uuid
+from datetime import timedelta
+
 from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -10,6 +13,7 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import connection
+from django.utils import timezone
 
 from .models import Role, UserProfile
 from .serializers import UserSerializer, RoleSerializer, UserCreateSerializer
@@ -813,4 +817,446 @@ class SecurityTest(TestCase):
         # Déverrouiller et vérifier
         self.user.unlock_account()
         self.assertFalse(self.user.is_account_locked())
-        self.assertEqual(self.user.failed_login_attempts, 0)
\ No newline at end of file
+        self.assertEqual(self.user.failed_login_attempts, 0)
+
+class AuthorizationCacheTest(TestCase):
+    """Tests du contexte d'autorisation mis en cache (rôle, permissions, magasins)"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.inventory.models import Location
+        
+        cache.clear()
+        self.role = Role.objects.create(
+            name='Vendeur', role_type='cashier', can_manage_sales=True
+        )
+        self.store = Location.objects.create(
+            name='Magasin Principal', code='MAG01', location_type='store'
+        )
+        self.shelf = Location.objects.create(
+            name='Rayon A', code='RAY01', location_type='shelf', parent=self.store
+        )
+        self.user = User.objects.create_user(
+            username='vendeur', email='vendeur@example.com', password='pass123',
+            role=self.role, assigned_store=self.store
+        )
+    
+    def _fresh_user(self):
+        # Nouvel objet à chaque « requête », comme après l'authentification JWT
+        return User.objects.get(pk=self.user.pk)
+    
+    def test_second_request_costs_no_query(self):
+        """Le rôle, les permissions et les magasins sont relus depuis le cache"""
+        from .authz import get_authorization
+        
+        get_authorization(self._fresh_user())
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            context = get_authorization(user)
+            self.assertTrue(user.role.can_manage_sales)
+            self.assertEqual(user.assigned_store.code, 'MAG01')
+            self.assertFalse(user.has_perm('inventory.add_article'))
+        self.assertEqual(context.store_location_ids, {self.store.pk, self.shelf.pk})
+        self.assertTrue(context.has_flag('can_manage_sales'))
+    
+    def test_role_change_invalidates(self):
+        """Une modification du rôle est visible à la requête suivante"""
+        from .authz import get_authorization
+        
+        self.assertFalse(get_authorization(self._fresh_user()).has_flag('can_view_reports'))
+        self.role.can_view_reports = True
+        self.role.save()
+        self.assertTrue(get_authorization(self._fresh_user()).has_flag('can_view_reports'))
+    
+    def test_user_and_location_changes_invalidate(self):
+        """Nouvelle permission directe ou nouvel emplacement : contexte reconstruit"""
+        from django.contrib.auth.models import Permission
+        from apps.inventory.models import Location
+        from .authz import get_authorization
+        
+        get_authorization(self._fresh_user())
+        self.user.user_permissions.add(Permission.objects.get(codename='add_article'))
+        self.assertTrue(self._fresh_user().has_perm('inventory.add_article'))
+        
+        bin_location = Location.objects.create(
+            name='Bac 1', code='BAC01', location_type='bin', parent=self.shelf
+        )
+        self.assertIn(bin_location.pk, get_authorization(self._fresh_user()).store_location_ids)
+    
+    def test_last_login_update_keeps_cache(self):
+        """Les enregistrements partiels sans rapport n'invalident pas le cache"""
+        from .authz import get_authorization
+        
+        get_authorization(self._fresh_user())
+        user = self._fresh_user()
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            get_authorization(user)
+
+
+class StatelessJWTAuthenticationTest(APITestCase):
+    """Tests de l'authentification JWT sans requête (droits embarqués dans le jeton)"""
+    
+    def setUp(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from apps.inventory.models import Location
+        
+        cache.clear()
+        # Cache de test local au processus : simulé partagé (Redis)
+        patcher = mock.patch('apps.authentication.authentication.cache_is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.role = Role.objects.create(
+            name='Vendeur', role_type='cashier', can_manage_sales=True,
+            max_discount_percent=10
+        )
+        self.store = Location.objects.create(
+            name='Magasin Principal', code='MAG01', location_type='store'
+        )
+        self.user = User.objects.create_user(
+            username='vendeur', email='vendeur@example.com', password='pass123',
+            first_name='Awa', role=self.role, assigned_store=self.store
+        )
+        response = self.client.post(
+            reverse('authentication:login'),
+            {'username': 'vendeur', 'password': 'pass123'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.access = response.data['access']
+        self.refresh = response.data['refresh']
+    
+    def _authenticate(self, token=None):
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.request import Request
+        from .authentication import GestoreJWTAuthentication
+        
+        request = Request(APIRequestFactory().get(
+            '/api/', HTTP_AUTHORIZATION=f'Bearer {token or self.access}'
+        ))
+        return GestoreJWTAuthentication().authenticate(request)[0]
+    
+    def test_no_query_while_rights_unchanged(self):
+        """Utilisateur, rôle et magasin reconstruits depuis le jeton"""
+        with self.assertNumQueries(0):
+            user = self._authenticate()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.username, 'vendeur')
+            self.assertTrue(user.role.can_manage_sales)
+            self.assertEqual(user.role.max_discount_percent, 10)
+            self.assertEqual(user.assigned_store.code, 'MAG01')
+            self.assertFalse(user.is_multi_store_admin())
+            self.assertFalse(user.is_account_locked())
+        # Champ absent du jeton : chargé à la demande
+        self.assertEqual(user.email, 'vendeur@example.com')
+    
+    def test_local_cache_always_reads_database(self):
+        """Cache propre au processus : claims ignorés, utilisateur relu en base"""
+        from unittest import mock
+        
+        with mock.patch('apps.authentication.authentication.cache_is_shared', return_value=False):
+            with self.assertNumQueries(1):
+                user = self._authenticate()
+        self.assertFalse(user.get_deferred_fields())
+    
+    def test_role_change_falls_back_to_database(self):
+        """Droits modifiés après l'émission : utilisateur relu en base"""
+        self.role.can_manage_sales = False
+        self.role.save()
+        user = self._authenticate()
+        self.assertFalse(user.role.can_manage_sales)
+        self.assertFalse(user.get_deferred_fields())
+    
+    def test_refresh_restamps_claims(self):
+        """Le jeton rafraîchi porte les droits à jour et redevient sans requête"""
+        self.role.can_view_reports = True
+        self.role.save()
+        response = self.client.post(
+            reverse('authentication:token_refresh'), {'refresh': self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            user = self._authenticate(response.data['access'])
+            self.assertTrue(user.role.can_view_reports)
+    
+    def test_deactivated_user_rejected(self):
+        """Compte désactivé : le jeton n'est plus accepté"""
+        from rest_framework.exceptions import AuthenticationFailed
+        
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+    
+    def test_profile_endpoint(self):
+        """Le profil complet reste servi avec un utilisateur issu du jeton"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.get(reverse('authentication:user-profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'vendeur@example.com')
+
+
+class LoginWriteBehindTest(APITestCase):
+    """Tests du chemin de connexion allégé (écritures secondaires différées)"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='caissier', email='caissier@example.com', password='pass123'
+        )
+        self.url = reverse('authentication:login')
+        self.credentials = {'username': 'caissier', 'password': 'pass123'}
+    
+    def test_writes_in_request(self):
+        """Session et dernière connexion écrites dans la requête, le reste est différé"""
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(len(writes), 2)
+        self.assertIn('INSERT', writes[0].upper())
+        self.assertIn('UPDATE', writes[1].upper())
+    
+    @override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'WRITE_BEHIND_ENABLED': False})
+    def test_deferred_writes_applied(self):
+        """Journal et statistiques du profil enregistrés après la réponse"""
+        from .models import UserAuditLog, UserSession
+        
+        self.user.failed_login_attempts = 2
+        self.user.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.credentials, REMOTE_ADDR='10.0.0.7')
+            self.client.post(self.url, self.credentials, REMOTE_ADDR='10.0.0.8')
+        
+        session = UserSession.objects.get(id=response.data['session_id'])
+        self.assertEqual(session.user, self.user)
+        self.assertEqual(UserAuditLog.objects.filter(user=self.user, action='login').count(), 2)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.login_count, 2)
+        self.assertEqual(profile.last_login_ip, '10.0.0.8')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        self.assertIsNotNone(self.user.last_login)
+
+
+class LoginThrottleTest(APITestCase):
+    """Tests de la limitation des tentatives de connexion (compteurs en cache)"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(username='caissier', password='pass123')
+        self.url = reverse('authentication:login')
+    
+    def _fail(self, username='caissier', ip='10.0.0.1'):
+        return self.client.post(
+            self.url, {'username': username, 'password': 'mauvais'}, REMOTE_ADDR=ip
+        )
+    
+    def test_failures_cost_no_write_until_lock(self):
+        """Les échecs ne coûtent aucune écriture ; seul le verrouillage est enregistré"""
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(4):
+                self.assertEqual(self._fail().status_code, status.HTTP_401_UNAUTHORIZED)
+        writes = [q for q in queries.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(writes, [])
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_locked)
+        
+        self._fail()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_locked)
+        self.assertEqual(self.user.failed_login_attempts, 5)
+        
+        # Verrouillé : même le bon mot de passe est refusé, sans requête
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'username': 'caissier', 'password': 'pass123'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_ip_throttled(self):
+        """Trop d'échecs depuis une adresse : 429 avec Retry-After"""
+        with override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'LOGIN_MAX_FAILURES_PER_IP': 3}):
+            for i in range(3):
+                self._fail(username=f'inconnu{i}', ip='10.0.0.9')
+            response = self._fail(username='autre', ip='10.0.0.9')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+            # Une autre adresse n'est pas concernée
+            ok = self.client.post(
+                self.url, {'username': 'caissier', 'password': 'pass123'}, REMOTE_ADDR='10.0.0.2'
+            )
+            self.assertEqual(ok.status_code, status.HTTP_200_OK)
+    
+    def test_success_resets_counter(self):
+        """Une connexion réussie efface les échecs de l'utilisateur"""
+        for _ in range(4):
+            self._fail()
+        self.client.post(self.url, {'username': 'caissier', 'password': 'pass123'})
+        for _ in range(4):
+            self._fail()
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_locked)
+    
+    def test_sliding_window(self):
+        """Les échecs de la fenêtre précédente comptent au prorata du recouvrement"""
+        from . import throttling
+        
+        window = throttling._window()
+        start = (1_000_000 // window) * window
+        for _ in range(4):
+            throttling._hit('user', 'caissier', start + 1)
+        self.assertEqual(throttling._count('user', 'caissier', start + 2), 4)
+        self.assertAlmostEqual(throttling._count('user', 'caissier', start + window + window / 2), 2)
+        self.assertEqual(throttling._count('user', 'caissier', start + 2 * window + 1), 0)
+
+
+@override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'WRITE_BEHIND_ENABLED': False})
+class SessionLifecycleTest(APITestCase):
+    """Tests du cycle de vie des sessions (activité, expiration, archivage)"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='caissier', password='pass123')
+        self.now = timezone.now()
+    
+    def _login(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('authentication:login'), {'username': 'caissier', 'password': 'pass123'}
+            ).data
+    
+    def _session(self, login_hours_ago, last_seen_hours_ago=None, **fields):
+        from .models import UserSession
+        
+        session = UserSession.objects.create(
+            user=self.user, session_key=uuid.uuid4().hex, ip_address='10.0.0.1', user_agent='test', **fields
+        )
+        last_seen = None if last_seen_hours_ago is None else self.now - timedelta(hours=last_seen_hours_ago)
+        # login_at est auto_now_add : antidaté après création
+        UserSession.objects.filter(pk=session.pk).update(
+            login_at=self.now - timedelta(hours=login_hours_ago), last_seen_at=last_seen
+        )
+        return session
+    
+    def test_logout_closes_token_session_only(self):
+        """La déconnexion ne termine que la session du jeton"""
+        from .models import UserSession
+        
+        first, second = self._login(), self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {first['access']}")
+        self.client.post(reverse('authentication:logout'))
+        
+        closed = UserSession.objects.get(pk=first['session_id'])
+        self.assertFalse(closed.is_active)
+        self.assertEqual(closed.end_reason, 'logout')
+        self.assertTrue(UserSession.objects.get(pk=second['session_id']).is_active)
+    
+    def test_logout_right_after_login_blocks_refresh(self):
+        """Déconnexion avant toute écriture différée : le rafraîchissement est refusé"""
+        tokens = self.client.post(
+            reverse('authentication:login'), {'username': 'caissier', 'password': 'pass123'}
+        ).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.client.post(reverse('authentication:logout'))
+        self.client.credentials()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('authentication:token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_marks_activity_and_refuses_closed_session(self):
+        """Le rafraîchissement met à jour last_seen_at ; session terminée : refus"""
+        from .models import UserSession
+        
+        tokens = self._login()
+        UserSession.objects.filter(pk=tokens['session_id']).update(last_seen_at=None)
+        url = reverse('authentication:token_refresh')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(UserSession.objects.get(pk=tokens['session_id']).last_seen_at)
+        
+        UserSession.objects.filter(pk=tokens['session_id']).update(is_active=False, end_reason='idle')
+        response = self.client.post(url, {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_closes_lapsed_session(self):
+        """Session inactive ou trop ancienne : refusée et terminée au rafraîchissement"""
+        from .models import UserSession
+        
+        url = reverse('authentication:token_refresh')
+        for reason, login_ago, seen_ago in (('idle', 10, 9), ('expired', 200, 1)):
+            tokens = self._login()
+            UserSession.objects.filter(pk=tokens['session_id']).update(
+                login_at=self.now - timedelta(hours=login_ago),
+                last_seen_at=self.now - timedelta(hours=seen_ago)
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, {'refresh': tokens['refresh']})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            session = UserSession.objects.get(pk=tokens['session_id'])
+            self.assertFalse(session.is_active)
+            self.assertEqual(session.end_reason, reason)
+    
+    def test_expire_sessions(self):
+        """Expiration par durée maximale et par inactivité, datée de l'échéance"""
+        from .models import UserSession
+        from .session_lifecycle import expire_sessions
+        
+        too_old = self._session(login_hours_ago=200, last_seen_hours_ago=1)
+        idle = self._session(login_hours_ago=20, last_seen_hours_ago=10)
+        never_seen = self._session(login_hours_ago=9)
+        alive = self._session(login_hours_ago=20, last_seen_hours_ago=1)
+        
+        with override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'SESSION_SWEEP_BATCH_SIZE': 1}):
+            self.assertEqual(expire_sessions(self.now), (1, 2))
+        
+        too_old.refresh_from_db()
+        self.assertEqual((too_old.is_active, too_old.end_reason), (False, 'expired'))
+        self.assertEqual(too_old.logout_at, too_old.login_at + timedelta(hours=168))
+        idle.refresh_from_db()
+        self.assertEqual(idle.end_reason, 'idle')
+        self.assertEqual(idle.logout_at, idle.last_seen_at + timedelta(minutes=480))
+        self.assertEqual(UserSession.objects.get(pk=never_seen.pk).end_reason, 'idle')
+        self.assertTrue(UserSession.objects.get(pk=alive.pk).is_active)
+    
+    def test_archive_rolls_up_and_deletes(self):
+        """Sessions hors rétention agrégées par jour puis supprimées"""
+        from .models import UserLoginDaily, UserSession
+        from .session_lifecycle import archive_sessions
+        
+        old = 100 * 24
+        first = self._session(login_hours_ago=old, is_active=False, end_reason='idle')
+        second = self._session(login_hours_ago=old, is_active=False, end_reason='logout')
+        UserSession.objects.filter(pk=second.pk).update(
+            logout_at=self.now - timedelta(hours=old - 1)
+        )
+        recent = self._session(login_hours_ago=1, is_active=False, end_reason='logout')
+        day = timezone.localdate(UserSession.objects.get(pk=first.pk).login_at)
+        UserLoginDaily.objects.create(user=self.user, date=day, login_count=3, total_seconds=60)
+        
+        with override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'SESSION_SWEEP_BATCH_SIZE': 1}):
+            self.assertEqual(archive_sessions(self.now), 2)
+        
+        stats = UserLoginDaily.objects.get(user=self.user, date=day)
+        self.assertEqual(stats.login_count, 5)
+        self.assertEqual(stats.total_seconds, 60 + 3600)
+        self.assertEqual(stats.idle_count, 1)
+        self.assertEqual(list(UserSession.objects.values_list('pk', flat=True)), [recent.pk])
+    
+    def test_sweep_command(self):
+        """La commande expire puis archive"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        self._session(login_hours_ago=200)
+        out = StringIO()
+        call_command('sweep_sessions', stdout=out)
+        self.assertIn('1 session(s) expirée(s)', out.getvalue())
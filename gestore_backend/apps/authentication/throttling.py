@@ -0,0 +1,134 @@
+"""
+Limitation des tentatives de connexion - GESTORE
+Compteurs d'échecs en fenêtre glissante dans le cache (Redis ou locmem),
+par nom d'utilisateur et par adresse IP. Un échec ne coûte aucune écriture
+en base : le verrouillage n'est enregistré sur User qu'au moment où il se
+déclenche.
+
+Fenêtre glissante approchée par deux compteurs fixes consécutifs :
+    échecs = courant + précédent × (part de la fenêtre précédente encore couverte)
+
+- Par utilisateur : LOGIN_MAX_FAILURES échecs dans la fenêtre verrouillent le
+  compte LOGIN_LOCKOUT_MINUTES (User.is_locked / locked_until)
+- Par IP : au-delà de LOGIN_MAX_FAILURES_PER_IP, l'adresse est refusée
+  (429) jusqu'à ce que la fenêtre glisse, sans rien écrire en base
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.core.conf import gestore_setting
+
+from .authz import invalidate_user
+
+
+def _ident(value):
+    # Clés de cache courtes et sans caractères spéciaux
+    return hashlib.sha1(str(value).encode('utf-8')).hexdigest()[:20]
+
+
+def _window():
+    return gestore_setting('LOGIN_FAILURE_WINDOW_SECONDS', 900)
+
+
+def _bucket_key(scope, value, bucket):
+    return f'login:fail:{scope}:{_ident(value)}:{bucket}'
+
+
+def _lock_key(username):
+    return f'login:lock:{_ident(username)}'
+
+
+def _count(scope, value, now=None):
+    """Échecs dans la fenêtre glissante se terminant maintenant"""
+    window = _window()
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    counts = cache.get_many([_bucket_key(scope, value, bucket), _bucket_key(scope, value, bucket - 1)])
+    current = counts.get(_bucket_key(scope, value, bucket), 0)
+    previous = counts.get(_bucket_key(scope, value, bucket - 1), 0)
+    overlap = 1 - (now % window) / window
+    return current + previous * overlap
+
+
+def _hit(scope, value, now):
+    key = _bucket_key(scope, value, int(now // _window()))
+    cache.add(key, 0, timeout=2 * _window())
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Clé évincée entre add et incr
+        cache.set(key, 1, timeout=2 * _window())
+
+
+# ========================
+# API
+# ========================
+
+def check(username, ip_address):
+    """
+    Refus avant vérification du mot de passe
+
+    Returns:
+        None si la tentative est permise, sinon (motif, fin du refus) avec
+        motif 'ip' (trop d'échecs depuis l'adresse) ou 'user' (compte verrouillé)
+    """
+    if ip_address and _count('ip', ip_address) >= gestore_setting('LOGIN_MAX_FAILURES_PER_IP', 20):
+        return 'ip', timezone.now() + timedelta(seconds=_window() / 2)
+    if username:
+        locked_until = cache.get(_lock_key(username))
+        if locked_until is not None and locked_until > timezone.now():
+            return 'user', locked_until
+    return None
+
+
+def register_failure(username, ip_address):
+    """
+    Compte un échec (cache uniquement)
+
+    Returns:
+        datetime: fin du verrouillage si cet échec verrouille le compte, sinon None
+    """
+    now = time.time()
+    if ip_address:
+        _hit('ip', ip_address, now)
+    if not username:
+        return None
+
+    _hit('user', username, now)
+    failures = int(_count('user', username, now))
+    if failures < gestore_setting('LOGIN_MAX_FAILURES', 5):
+        return None
+
+    # Seule écriture : le verrouillage, une fois, quand il se déclenche
+    locked_until = timezone.now() + timedelta(minutes=gestore_setting('LOGIN_LOCKOUT_MINUTES', 30))
+    if not cache.add(_lock_key(username), locked_until, timeout=int((locked_until - timezone.now()).total_seconds())):
+        return None  # Déjà verrouillé par un échec concurrent
+    User = get_user_model()
+    user_id = User.objects.filter(username=username).values_list('pk', flat=True).first()
+    if user_id is not None:
+        User.objects.filter(pk=user_id).update(
+            is_locked=True, locked_until=locked_until, failed_login_attempts=failures
+        )
+        # update() ne déclenche pas les signaux : jetons et contexte d'autorisation périmés
+        invalidate_user(user_id)
+    return locked_until
+
+
+def register_success(username):
+    """Connexion réussie : les échecs de l'utilisateur sont oubliés"""
+    reset(username)
+
+
+def reset(username):
+    """Efface les compteurs et le verrouillage en cache (déverrouillage manuel)"""
+    bucket = int(time.time() // _window())
+    cache.delete_many([
+        _bucket_key('user', username, bucket),
+        _bucket_key('user', username, bucket - 1),
+        _lock_key(username),
+    ])
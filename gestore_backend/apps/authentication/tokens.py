@@ -0,0 +1,140 @@
+"""
+Jetons JWT GESTORE
+Le jeton embarque un instantané signé des droits de l'utilisateur (rôle,
+drapeaux du rôle, magasin de rattachement) et la version de ces droits
+(voir authz.version_stamp). GestoreJWTAuthentication reconstruit
+l'utilisateur depuis ces claims sans requête tant que la version n'a pas
+changé.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authz import version_stamp
+
+# Claim contenant l'instantané des droits
+CLAIM = 'gst'
+
+# Champs de l'utilisateur recopiés dans le jeton (affichage, journaux)
+USER_FIELDS = ('username', 'first_name', 'last_name', 'employee_code', 'is_staff')
+
+# Champs du magasin de rattachement recopiés dans le jeton
+STORE_FIELDS = ('name', 'code', 'location_type')
+
+
+def _role_flag_fields():
+    """Drapeaux du rôle (can_...) et plafond de remise"""
+    from .models import Role
+
+    return [
+        f.name for f in Role._meta.concrete_fields
+        if f.name.startswith('can_') or f.name == 'max_discount_percent'
+    ]
+
+
+def user_claims(user, stamp):
+    """Instantané des droits de l'utilisateur, sérialisable en JSON"""
+    claims = {
+        'v': stamp,
+        'su': user.is_superuser,
+        'user': {name: getattr(user, name) for name in USER_FIELDS},
+        'role': None,
+        'store': None,
+    }
+    if user.role_id:
+        role = user.role
+        claims['role'] = {
+            'id': str(role.pk),
+            'name': role.name,
+            'role_type': role.role_type,
+            'is_active': role.is_active,
+            **{name: str(getattr(role, name)) if name == 'max_discount_percent' else getattr(role, name)
+               for name in _role_flag_fields()},
+        }
+    if user.assigned_store_id:
+        store = user.assigned_store
+        claims['store'] = {'id': str(store.pk), **{name: getattr(store, name) for name in STORE_FIELDS}}
+    return claims
+
+
+def user_from_claims(user_id, claims):
+    """
+    Utilisateur reconstruit depuis les claims, sans requête
+    Les champs absents du jeton sont différés (chargés à la demande) ;
+    save() n'écrit que les champs chargés.
+    """
+    from apps.inventory.models import Location
+
+    from .models import Role
+
+    User = get_user_model()
+    role, store = claims['role'], claims['store']
+    values = {
+        'id': User._meta.pk.to_python(user_id),
+        'is_active': True,
+        'is_locked': False,
+        'is_superuser': claims['su'],
+        'role_id': Role._meta.pk.to_python(role['id']) if role else None,
+        'assigned_store_id': Location._meta.pk.to_python(store['id']) if store else None,
+        **claims['user'],
+    }
+    user = _from_values(User, values)
+
+    if role:
+        role_values = {**role, 'id': user.role_id}
+        if 'max_discount_percent' in role_values:
+            role_values['max_discount_percent'] = Decimal(role_values['max_discount_percent'])
+        user._meta.get_field('role').set_cached_value(
+            user, _from_values(Role, role_values)
+        )
+    if store:
+        store_values = {**store, 'id': user.assigned_store_id}
+        user._meta.get_field('assigned_store').set_cached_value(
+            user, _from_values(Location, store_values)
+        )
+    return user
+
+
+def _from_values(model, values):
+    """Instance « chargée » avec ces seuls champs, les autres différés"""
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+class GestoreRefreshToken(RefreshToken):
+    """
+    Jeton de rafraîchissement portant l'instantané des droits
+    Le jeton d'accès dérivé en hérite ; si les droits ont changé depuis
+    l'émission, l'instantané est recalculé au rafraîchissement.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        stamp = version_stamp(user.pk)
+        if stamp is not None:
+            token[CLAIM] = user_claims(user, stamp)
+        return token
+
+    @property
+    def access_token(self):
+        claims = self.payload.get(CLAIM)
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if claims is not None and user_id:
+            stamp = version_stamp(user_id)
+            if claims.get('v') != stamp:
+                self._restamp(user_id, stamp)
+        return super().access_token
+
+    def _restamp(self, user_id, stamp):
+        user = get_user_model().objects.select_related('role', 'assigned_store').filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None or stamp is None:
+            # Sans instantané, le jeton d'accès sera vérifié en base
+            self.payload.pop(CLAIM, None)
+        else:
+            self[CLAIM] = user_claims(user, stamp)
@@ -7,11 +7,10 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import login, logout, get_user_model
 from django.utils import timezone
-from django.db.models import Q, Prefetch, Count, F
+from django.db.models import Q, Prefetch, Count
 from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
@@ -19,16 +18,42 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from apps.core.permissions import (
     CanManageUsers, IsOwnerOrReadOnly, RoleBasedPermission
 )
+from apps.core.bulk import BulkValidationError, BulkWriter, bulk_max_items
+from apps.core.conditional import conditional_response
 from apps.core.mixins import MultiStoreContextMixin
+from apps.core.pagination import KeysetPagination
+from apps.core.renderers import StreamingJSONRenderer, stream_json_response
+from apps.core.serializers import parse_requested_fields
+from apps.core.write_behind import write_behind
+from .audit import audit_log
+from . import throttling as login_throttle
+from .authz import invalidate_user
+from .authentication import full_user
 from .models import Role, UserProfile, UserSession, UserAuditLog
+from .session_lifecycle import SESSION_CLAIM, close_sessions, open_session
 from .serializers import (
     RoleSerializer, UserSerializer, UserCreateSerializer, UserListSerializer,
     UserProfileSerializer, UserSessionSerializer, PasswordChangeSerializer,
     LoginSerializer, UserAuditLogSerializer
 )
+from .tokens import GestoreRefreshToken
 
 User = get_user_model()
 
+# Action unitaire équivalente à chaque méthode de la route bulk
+BULK_ACTIONS = {
+    'POST': 'create',
+    'PUT': 'update',
+    'PATCH': 'partial_update',
+    'DELETE': 'destroy',
+}
+
+
+def _token_session_id(request):
+    """Session portée par le jeton JWT de la requête (None si inconnue)"""
+    token = request.auth
+    return token.get(SESSION_CLAIM) if token is not None and hasattr(token, 'get') else None
+
 
 class HealthCheckView(APIView):
     """Vue de vérification de santé pour authentication"""
@@ -48,6 +73,27 @@ class OptimizedModelViewSet(viewsets.ModelViewSet):
     """
     ViewSet de base avec optimisations communes
     """
+    # Liste servie en GET conditionnel (ETag / Last-Modified + cache serveur)
+    conditional_list = False
+    # Autres modèles dont les changements modifient la liste (compteurs annotés...)
+    conditional_dependencies = ()
+    # Route /bulk/ : création, modification et suppression en masse
+    bulk_writes = False
+    
+    @classmethod
+    def get_extra_actions(cls):
+        """La route bulk n'existe que sur les vues qui l'activent"""
+        actions = super().get_extra_actions()
+        if not cls.bulk_writes:
+            actions = [action for action in actions if action.__name__ != 'bulk']
+        return actions
+    
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action == 'bulk':
+            # Mêmes permissions, serializer et queryset que l'écriture unitaire
+            self.action = BULK_ACTIONS.get(request.method, self.action)
+        return request
     
     def get_queryset(self):
         """
@@ -66,6 +112,8 @@ class OptimizedModelViewSet(viewsets.ModelViewSet):
     def optimize_list_queryset(self, queryset):
         """
         Optimisations pour les listes (à surcharger)
+        Utiliser wants_fields() / wants_expand() pour ne joindre ou
+        annoter que ce que la réponse (?fields= / ?expand=) utilisera.
         """
         return queryset
     
@@ -74,6 +122,109 @@ class OptimizedModelViewSet(viewsets.ModelViewSet):
         Optimisations pour les détails (à surcharger)
         """
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """Liste, en GET conditionnel si conditional_list est activé"""
+        if not self.conditional_list:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, lambda: self._list_data(queryset))
+    
+    def _list_data(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return self.get_serializer(queryset, many=True).data
+        return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+    
+    def conditional_response(self, queryset, build_data):
+        """
+        Réponse 304 si la collection n'a pas changé depuis la version du client,
+        sinon build_data() (mis en cache par version)
+        """
+        querysets = [queryset] + [
+            model._default_manager.all() for model in self.conditional_dependencies
+        ]
+        return conditional_response(self.request, querysets, build_data)
+    
+    def wants_fields(self, *names):
+        """Vrai si au moins un de ces champs figure dans la réponse"""
+        requested = parse_requested_fields(self.request)[0]
+        return requested is None or any(name in requested for name in names)
+    
+    def wants_expand(self, name):
+        """Vrai si le champ étendu est demandé par ?expand="""
+        return name in parse_requested_fields(self.request)[1]
+    
+    def list_action_response(self, queryset, serializer_class):
+        """
+        Réponse d'une action de type liste : paginée par défaut,
+        ou tout le queryset en flux avec ?format=jsonstream
+        """
+        context = self.get_serializer_context()
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if isinstance(renderer, StreamingJSONRenderer):
+            return stream_json_response(queryset, serializer_class, context)
+        
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer_class(queryset, many=True, context=context).data)
+        return self.get_paginated_response(serializer_class(page, many=True, context=context).data)
+    
+    # ========================
+    # ÉCRITURES EN MASSE
+    # ========================
+    
+    @action(detail=False, methods=['post', 'put', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        Écritures en masse (si bulk_writes est activé)
+        - POST : liste d'objets à créer
+        - PUT / PATCH : liste d'objets avec leur id (complets / partiels)
+        - DELETE : {"ids": [...]} ou liste d'ids
+        Le lot est refusé en entier (400) si un élément est invalide ;
+        les erreurs sont rapportées par position dans le lot.
+        """
+        items = request.data
+        if request.method == 'DELETE' and isinstance(items, dict):
+            items = items.get('ids')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Une liste non vide est attendue'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > bulk_max_items():
+            return Response(
+                {'error': f'Maximum {bulk_max_items()} éléments par opération en masse'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        writer = BulkWriter(self)
+        try:
+            if request.method == 'POST':
+                instances = writer.create(items)
+                response_status = status.HTTP_201_CREATED
+            elif request.method == 'DELETE':
+                return Response({'deleted_count': writer.delete(items)})
+            else:
+                instances = writer.update(items, partial=request.method == 'PATCH')
+                response_status = status.HTTP_200_OK
+        except BulkValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(instances, many=True).data, status=response_status)
+    
+    def get_bulk_save_kwargs(self, created):
+        """
+        Valeurs ajoutées à chaque objet écrit en masse (équivalent de
+        serializer.save(**kwargs) dans perform_create / perform_update)
+        """
+        field_names = {f.name for f in self.get_queryset().model._meta.get_fields()}
+        if created and 'created_by' in field_names:
+            return {'created_by': self.request.user}
+        if not created and 'updated_by' in field_names:
+            return {'updated_by': self.request.user}
+        return {}
 
 
 class RoleViewSet(OptimizedModelViewSet):
@@ -111,10 +262,11 @@ class RoleViewSet(OptimizedModelViewSet):
         Liste des utilisateurs assignés à ce rôle
         """
         role = self.get_object()
-        users = User.objects.filter(role=role, is_active=True).select_related('profile')
+        users = User.objects.filter(role=role, is_active=True).select_related(
+            'profile', 'role', 'assigned_store'
+        ).order_by('username')
         
-        serializer = UserListSerializer(users, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.list_action_response(users, UserListSerializer)
     
     @action(detail=False, methods=['get'])
     def permissions(self, request):
@@ -217,9 +369,8 @@ class UserViewSet(OptimizedModelViewSet):
         """
         Optimisations pour le détail d'un utilisateur
         """
-        return queryset.select_related(
-            'role', 'profile', 'created_by', 'updated_by'
-        ).prefetch_related(
+        # User n'a pas de champs created_by / updated_by (non audité)
+        return queryset.select_related('role', 'profile').prefetch_related(
             # CORRIGÉ: 'usersession' -> 'sessions' (relation définie dans migration 0002)
             'sessions',
             'role__permissions'
@@ -240,13 +391,14 @@ class UserViewSet(OptimizedModelViewSet):
         """
         Profil de l'utilisateur connecté
         """
+        user = full_user(request.user)
         if request.method == 'GET':
-            serializer = UserSerializer(request.user, context={'request': request})
+            serializer = UserSerializer(user, context={'request': request})
             return Response(serializer.data)
         
         elif request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user, 
+                user, 
                 data=request.data, 
                 partial=True,
                 context={'request': request}
@@ -270,14 +422,11 @@ class UserViewSet(OptimizedModelViewSet):
             serializer.save()
             
             # Déconnecter toutes les autres sessions
-            UserSession.objects.filter(
-                user=request.user,
-                is_active=True
-            ).exclude(
-                session_key=request.session.session_key
-            ).update(
-                is_active=False,
-                logout_at=timezone.now()
+            close_sessions(
+                UserSession.objects.filter(user=request.user).exclude(
+                    pk=_token_session_id(request)
+                ),
+                'revoked'
             )
             
             return Response({
@@ -308,24 +457,12 @@ class UserViewSet(OptimizedModelViewSet):
         user.save()
         
         # Terminer toutes les sessions actives
-        UserSession.objects.filter(
-            user=user,
-            is_active=True
-        ).update(
-            is_active=False,
-            logout_at=timezone.now()
-        )
+        close_sessions(UserSession.objects.filter(user=user), 'revoked')
         
         # Logger l'action
-        UserAuditLog.objects.create(
-            user=request.user,
-            action='lock_account',
-            model_name='User',
-            object_id=user.id,
-            object_repr=str(user),
-            changes={'locked_until': user.locked_until.isoformat()},
-            ip_address=request.META.get('REMOTE_ADDR', ''),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        audit_log(
+            request.user, 'lock_account', request, instance=user,
+            changes={'locked_until': user.locked_until.isoformat()}
         )
         
         return Response({
@@ -343,17 +480,10 @@ class UserViewSet(OptimizedModelViewSet):
         user.locked_until = None
         user.failed_login_attempts = 0
         user.save()
+        login_throttle.reset(user.username)
         
         # Logger l'action
-        UserAuditLog.objects.create(
-            user=request.user,
-            action='unlock_account',
-            model_name='User',
-            object_id=user.id,
-            object_repr=str(user),
-            ip_address=request.META.get('REMOTE_ADDR', ''),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
+        audit_log(request.user, 'unlock_account', request, instance=user)
         
         return Response({
             'message': f'Compte {user.username} déverrouillé avec succès'
@@ -370,12 +500,7 @@ class UserViewSet(OptimizedModelViewSet):
             is_active=True
         ).order_by('-login_at')
         
-        serializer = UserSessionSerializer(
-            sessions, 
-            many=True, 
-            context={'request': request}
-        )
-        return Response(serializer.data)
+        return self.list_action_response(sessions, UserSessionSerializer)
     
     @action(detail=True, methods=['post'])
     def terminate_session(self, request, pk=None):
@@ -391,13 +516,9 @@ class UserViewSet(OptimizedModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        sessions_updated = UserSession.objects.filter(
-            user=user,
-            session_key=session_key,
-            is_active=True
-        ).update(
-            is_active=False,
-            logout_at=timezone.now()
+        sessions_updated = close_sessions(
+            UserSession.objects.filter(user=user, session_key=session_key),
+            'revoked'
         )
         
         if sessions_updated > 0:
@@ -414,21 +535,13 @@ class UserViewSet(OptimizedModelViewSet):
         Journal d'activité d'un utilisateur
         """
         user = self.get_object()
+        logs = UserAuditLog.objects.filter(user=user).order_by('-timestamp', '-id')
         
-        # Pagination
-        page_size = int(request.query_params.get('page_size', 20))
-        offset = int(request.query_params.get('offset', 0))
-        
-        logs = UserAuditLog.objects.filter(
-            user=user
-        ).order_by('-timestamp')[offset:offset + page_size]
-        
-        serializer = UserAuditLogSerializer(logs, many=True, context={'request': request})
-        
-        return Response({
-            'count': UserAuditLog.objects.filter(user=user).count(),
-            'results': serializer.data
-        })
+        # Pagination (par page, ou par curseur avec ?cursor=)
+        paginator = KeysetPagination(cursor_field='timestamp', page_size=20)
+        page = paginator.paginate_queryset(logs, request, view=self)
+        serializer = UserAuditLogSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['post'])
     def bulk_action(self, request):
@@ -451,12 +564,17 @@ class UserViewSet(OptimizedModelViewSet):
             updated_count = users.update(is_active=True)
         elif action_type == 'deactivate':
             updated_count = users.update(is_active=False)
+            # update() ne déclenche pas les signaux : jetons déjà émis périmés
+            for user_id in users.values_list('pk', flat=True):
+                invalidate_user(user_id)
         elif action_type == 'unlock':
             updated_count = users.update(
                 is_locked=False, 
                 locked_until=None, 
                 failed_login_attempts=0
             )
+            for username in users.values_list('username', flat=True):
+                login_throttle.reset(username)
         else:
             return Response(
                 {'error': 'Action non supportée'}, 
@@ -464,13 +582,9 @@ class UserViewSet(OptimizedModelViewSet):
             )
         
         # Logger l'action bulk
-        UserAuditLog.objects.create(
-            user=request.user,
-            action=f'bulk_{action_type}',
-            model_name='User',
-            changes={'user_ids': user_ids, 'count': updated_count},
-            ip_address=request.META.get('REMOTE_ADDR', ''),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        audit_log(
+            request.user, f'bulk_{action_type}', request, model_name='User',
+            changes={'user_ids': user_ids, 'count': updated_count}
         )
         
         return Response({
@@ -557,52 +671,48 @@ class LoginView(MultiStoreContextMixin, TokenObtainPairView):
     
     def post(self, request, *args, **kwargs):
         """Connexion avec JWT et contexte magasin"""
+        username = request.data.get('username')
+        ip_address = request.META.get('REMOTE_ADDR', '')
+        
+        # Refus anticipé (cache) : ni lecture en base ni hachage du mot de passe
+        refused = login_throttle.check(username, ip_address)
+        if refused is not None:
+            return self._refused_response(*refused)
+        
         serializer = self.get_serializer(data=request.data)
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
             store_context = serializer.validated_data['store_context']
             
-            # Réinitialiser les tentatives échouées
-            if user.failed_login_attempts > 0:
-                user.failed_login_attempts = 0
-                user.save()
+            user_agent = request.META.get('HTTP_USER_AGENT', '')
+            now = timezone.now()
+            login_throttle.register_success(user.username)
             
-            # Générer les tokens JWT
-            refresh = RefreshToken.for_user(user)
+            # Session portée par les jetons JWT (écrite ici : elle autorise
+            # les rafraîchissements)
+            user_session = open_session(
+                user, f"api_session_{uuid.uuid4().hex[:16]}", ip_address, user_agent, now
+            )
+            refresh = GestoreRefreshToken.for_user(user)
+            refresh[SESSION_CLAIM] = str(user_session.id)
             access_token = refresh.access_token
             
-            # Créer une session de tracking
-            api_session_key = f"api_session_{uuid.uuid4().hex[:16]}"
-            
-            user_session = UserSession.objects.create(
-                user=user,
-                session_key=api_session_key,
-                ip_address=request.META.get('REMOTE_ADDR', ''),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            # Dernière connexion et remise à zéro des tentatives échouées
+            # (verrou expiré compris)
+            User.objects.filter(pk=user.pk).update(
+                last_login=now, failed_login_attempts=0, is_locked=False, locked_until=None
             )
+            user.last_login, user.failed_login_attempts = now, 0
+            user.is_locked, user.locked_until = False, None
             
-            # Mettre à jour les statistiques
-            user.last_login = timezone.now()
-            user.save()
-            
-            if hasattr(user, 'profile'):
-                profile = user.profile
-                profile.last_login_ip = request.META.get('REMOTE_ADDR', '')
-                profile.login_count = F('login_count') + 1
-                profile.save()
-                profile.refresh_from_db()
-            
-            # Logger la connexion
-            UserAuditLog.objects.create(
-                user=user,
-                action='login',
-                model_name='User',
-                object_id=user.id,
-                object_repr=str(user),
-                ip_address=request.META.get('REMOTE_ADDR', ''),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            # Statistiques du profil et journal : écritures différées
+            write_behind.update(
+                UserProfile, user.pk, by='user_id',
+                values={'last_login_ip': ip_address},
+                increments={'login_count': 1}
             )
+            audit_log(user, 'login', request, instance=user)
             
             # 🔴 RÉPONSE AVEC CONTEXTE MULTI-MAGASINS
             response_data = {
@@ -625,16 +735,29 @@ class LoginView(MultiStoreContextMixin, TokenObtainPairView):
             return Response(response_data, status=status.HTTP_200_OK)
         
         else:
-            # Incrémenter les tentatives échouées
-            username = request.data.get('username')
-            if username:
-                try:
-                    user = User.objects.get(username=username)
-                    user.increment_failed_login()
-                except User.DoesNotExist:
-                    pass
+            # Compter l'échec en cache ; écriture en base seulement si le compte se verrouille
+            locked_until = login_throttle.register_failure(username, ip_address)
+            if locked_until is not None:
+                return self._refused_response('user', locked_until)
             
             return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+    
+    def _refused_response(self, reason, until):
+        """Tentative refusée : trop d'échecs depuis l'IP (429) ou compte verrouillé (401)"""
+        if reason == 'ip':
+            retry_after = max(1, int((until - timezone.now()).total_seconds()))
+            response = Response(
+                {'detail': 'Trop de tentatives de connexion. Réessayez plus tard.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+        return Response(
+            {'non_field_errors': [
+                f"Compte verrouillé jusqu'à {timezone.localtime(until).strftime('%H:%M')}."
+            ]},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
 
 
 class LogoutView(APIView):
@@ -648,30 +771,20 @@ class LogoutView(APIView):
         Déconnexion avec nettoyage
         """
         try:
-            # Terminer toutes les sessions API actives de l'utilisateur
-            # (car on ne peut pas tracker le session_key exact en API)
-            UserSession.objects.filter(
-                user=request.user,
-                is_active=True
-            ).update(
-                is_active=False,
-                logout_at=timezone.now()
-            )
+            # Session du jeton si connue, sinon toutes les sessions actives
+            # (jetons émis avant le suivi des sessions)
+            sessions = UserSession.objects.filter(user=request.user)
+            session_id = _token_session_id(request)
+            if session_id:
+                sessions = sessions.filter(pk=session_id)
+            close_sessions(sessions, 'logout')
             
             # Logger la déconnexion
-            UserAuditLog.objects.create(
-                user=request.user,
-                action='logout',
-                model_name='User',
-                object_id=request.user.id,
-                object_repr=str(request.user),
-                ip_address=request.META.get('REMOTE_ADDR', ''),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
+            audit_log(request.user, 'logout', request, instance=request.user)
             
             return Response({
                 'message': 'Déconnexion réussie',
-                'detail': 'Toutes les sessions ont été terminées'
+                'detail': 'Session terminée' if session_id else 'Toutes les sessions ont été terminées'
             })
         except Exception as e:
             return Response(
@@ -1,12 +1,19 @@
 """
 Configuration de l'interface d'administration Django pour apps/core
-Modèles abstraits - pas d'enregistrement direct
-Classes de base pour les autres applications
+Classes de base pour les autres applications, profils de requêtes et
+requêtes SQL lentes (diagnostic des performances)
 """
+import json
+
 from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils import timezone
 
+from .models import RequestProfile, SlowQuery
+
 
 class BaseModelAdmin(admin.ModelAdmin):
     """
@@ -240,4 +247,129 @@ class ActivableModelAdmin(BaseModelAdmin):
 
 
 # Note: Les modèles abstraits de core ne sont pas enregistrés directement
-# Ces classes de base sont héritées par les autres applications
\ No newline at end of file
+# Ces classes de base sont héritées par les autres applications
+
+# ========================
+# REQUEST PROFILE ADMIN
+# ========================
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Profils de requêtes (apps.core.profiling), lecture seule
+    Le profil complet se télécharge en .prof (cProfile : pstats, snakeviz)
+    ou .html (pyinstrument), les requêtes SQL en JSON.
+    """
+    list_display = [
+        'created_at', 'route', 'method', 'status_code', 'duration_ms',
+        'query_count', 'query_time_ms', 'user', 'trigger', 'downloads'
+    ]
+    
+    list_filter = ['route', 'trigger', 'engine', 'created_at']
+    
+    search_fields = ['route', 'path', 'user__username']
+    
+    ordering = ['-created_at']
+    
+    date_hierarchy = 'created_at'
+    
+    list_select_related = ['user']
+    
+    fields = [
+        'route', 'method', 'path', 'status_code', 'user', 'trigger', 'engine',
+        'duration_ms', 'query_count', 'query_time_ms', 'created_at', 'downloads',
+        'summary_display', 'queries_display'
+    ]
+    
+    readonly_fields = fields
+    
+    def get_urls(self):
+        download = self.admin_site.admin_view(self.download_view)
+        return [
+            path('<uuid:pk>/download/<str:kind>/', download, name='core_requestprofile_download'),
+        ] + super().get_urls()
+    
+    def download_view(self, request, pk, kind):
+        """Téléchargement du profil ('profile') ou des requêtes SQL ('sql')"""
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if kind == 'sql':
+            content = json.dumps(profile.queries, indent=2, ensure_ascii=False)
+            filename, content_type = f'{profile.pk}-sql.json', 'application/json'
+        else:
+            content = bytes(profile.data)
+            extension = 'prof' if profile.engine == 'cprofile' else 'html'
+            filename, content_type = f'{profile.pk}.{extension}', 'application/octet-stream'
+        response = HttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def downloads(self, obj):
+        """Liens de téléchargement"""
+        return format_html(
+            '<a href="{}">profil</a> · <a href="{}">SQL</a>',
+            reverse('admin:core_requestprofile_download', args=[obj.pk, 'profile']),
+            reverse('admin:core_requestprofile_download', args=[obj.pk, 'sql']),
+        )
+    
+    downloads.short_description = 'Téléchargements'
+    
+    def summary_display(self, obj):
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', obj.summary)
+    
+    summary_display.short_description = 'Résumé du profil'
+    
+    def queries_display(self, obj):
+        lines = '\n'.join(f"{query['ms']:>9.3f} ms  {query['sql']}" for query in obj.queries)
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', lines)
+    
+    queries_display.short_description = 'Requêtes SQL'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+
+# ========================
+# SLOW QUERY ADMIN
+# ========================
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """
+    Requêtes SQL lentes (apps.core.querylog), lecture seule
+    Vue agrégée par empreinte : commande slow_queries
+    """
+    list_display = ['executed_at', 'duration_ms', 'fingerprint', 'sql_preview', 'vendor']
+    
+    list_filter = ['vendor', 'executed_at']
+    
+    search_fields = ['fingerprint', 'sql']
+    
+    ordering = ['-executed_at']
+    
+    date_hierarchy = 'executed_at'
+    
+    fields = ['fingerprint', 'executed_at', 'duration_ms', 'vendor', 'sql', 'plan_display']
+    
+    readonly_fields = fields
+    
+    def sql_preview(self, obj):
+        return obj.sql[:120] + ('...' if len(obj.sql) > 120 else '')
+    
+    sql_preview.short_description = 'Requête'
+    
+    def plan_display(self, obj):
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', obj.plan or '-')
+    
+    plan_display.short_description = "Plan d'exécution"
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
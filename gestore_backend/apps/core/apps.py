@@ -5,3 +5,13 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Core'
+
+    def ready(self):
+        """
+        Journal des requêtes lentes sur chaque connexion ouverte
+        """
+        from django.db.backends.signals import connection_created
+
+        from .querylog import install
+
+        connection_created.connect(install, dispatch_uid='gestore_slow_query_log')
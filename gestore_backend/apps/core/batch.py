@@ -0,0 +1,218 @@
+"""
+Requêtes groupées - GESTORE
+Exécution de plusieurs sous-requêtes API dans un seul appel HTTP
+(voir BatchView, /api/batch/)
+
+- L'utilisateur authentifié par l'appel groupé est réutilisé tel quel
+  (pas de nouveau décodage JWT ni de chargement de l'utilisateur)
+- Les lectures (GET/HEAD) consécutives sont exécutées en parallèle dans un
+  pool de threads ; les écritures sont exécutées dans l'ordre, seules, sur
+  la connexion de la requête principale
+- Chaque sous-requête a son propre code de statut ; une erreur n'interrompt
+  pas les autres
+- Les vues asynchrones et les réponses en flux (SSE, exports) sont refusées
+  par sous-requête (400) : elles ne tiennent pas dans une réponse groupée
+
+Les sous-requêtes appellent directement la vue résolue : les middlewares
+ne sont pas rejoués (ils l'ont été une fois pour l'appel groupé).
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections, connections
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils import translation
+from rest_framework import serializers
+
+from .conf import gestore_setting
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """Une sous-requête d'un appel groupé"""
+    id = serializers.CharField(required=False, allow_blank=True)
+    method = serializers.ChoiceField(
+        choices=['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET'
+    )
+    path = serializers.CharField()
+    params = serializers.DictField(required=False, default=dict)
+    headers = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_path(self, value):
+        path = value.split('?', 1)[0]
+        if not path.startswith('/api/'):
+            raise serializers.ValidationError("Seules les routes /api/ sont autorisées.")
+        if path.rstrip('/').endswith('/api/batch'):
+            raise serializers.ValidationError("Les appels groupés ne peuvent pas être imbriqués.")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = gestore_setting('BATCH_MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Maximum {limit} sous-requêtes par appel groupé.")
+        return value
+
+
+def run_batch(request, sub_requests):
+    """
+    Exécute les sous-requêtes et retourne leurs réponses dans le même ordre
+
+    Les lectures consécutives forment un groupe exécuté en parallèle ;
+    une écriture termine le groupe et s'exécute seule.
+    """
+    results = [None] * len(sub_requests)
+    workers = gestore_setting('BATCH_MAX_WORKERS', 4)
+
+    group = []
+    for index, sub in enumerate(sub_requests):
+        if sub['method'] in READ_METHODS:
+            group.append(index)
+            continue
+        _run_group(request, sub_requests, group, results, workers)
+        group = []
+        results[index] = _execute(request, sub)
+    _run_group(request, sub_requests, group, results, workers)
+    return results
+
+
+def _run_group(request, sub_requests, group, results, workers):
+    if len(group) <= 1 or workers <= 1:
+        for index in group:
+            results[index] = _execute(request, sub_requests[index])
+        return
+
+    language = translation.get_language()
+    with ThreadPoolExecutor(max_workers=min(workers, len(group))) as pool:
+        futures = {
+            index: pool.submit(_execute_in_thread, request, sub_requests[index], language)
+            for index in group
+        }
+    for index, future in futures.items():
+        results[index] = future.result()
+
+
+def _execute_in_thread(request, sub, language):
+    # Connexion propre au thread, fermée à la fin de la sous-requête ;
+    # langue de l'appel groupé (la langue active est propre au thread)
+    close_old_connections()
+    try:
+        with translation.override(language):
+            return _execute(request, sub)
+    finally:
+        connections.close_all()
+
+
+def _execute(request, sub):
+    result = {'id': sub.get('id', ''), 'status': None, 'headers': {}, 'body': None}
+    path, _, query = sub['path'].partition('?')
+    try:
+        match = resolve(path)
+    except Resolver404:
+        result.update(status=404, body={'detail': 'Route inconnue.'})
+        return result
+
+    if _is_async_view(match.func):
+        result.update(status=400, body={'detail': 'Vue asynchrone non disponible dans un appel groupé.'})
+        return result
+
+    sub_request = _build_request(request, sub, path, query)
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+            response.render()
+        if response.streaming:
+            response.close()
+            result.update(status=400, body={'detail': 'Réponse en flux non disponible dans un appel groupé.'})
+            return result
+
+        result['status'] = response.status_code
+        for header in ('ETag', 'Last-Modified', 'Location'):
+            if response.has_header(header):
+                result['headers'][header] = response[header]
+        result['body'] = _response_body(response)
+    except Http404:
+        # Vues Django simples : exceptions converties par le gestionnaire de
+        # requêtes, qui n'est pas rejoué ici (DRF convertit les siennes)
+        result.update(status=404, headers={}, body={'detail': 'Introuvable.'})
+    except PermissionDenied:
+        result.update(
+            status=403, headers={}, body={'detail': "Vous n'avez pas la permission d'effectuer cette action."}
+        )
+    except Exception:
+        logger.exception("Erreur dans la sous-requête %s %s", sub['method'], sub['path'])
+        result.update(status=500, headers={}, body={'detail': 'Erreur interne du serveur.'})
+    return result
+
+
+def _is_async_view(view):
+    """Vue asynchrone (fonction ou classe) : elle retournerait une coroutine"""
+    view_class = getattr(view, 'view_class', None) or getattr(view, 'cls', None)
+    return iscoroutinefunction(view) or bool(getattr(view_class, 'view_is_async', False))
+
+
+def _build_request(request, sub, path, query):
+    """Requête Django de la sous-requête, avec l'utilisateur déjà authentifié"""
+    sub_request = HttpRequest()
+    sub_request.method = sub['method']
+    sub_request.path = sub_request.path_info = path
+
+    meta = {
+        key: value for key, value in request.META.items()
+        if not key.startswith('HTTP_') and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH')
+    }
+    for key in ('HTTP_HOST', 'HTTP_USER_AGENT', 'HTTP_ACCEPT_LANGUAGE', 'HTTP_X_FORWARDED_FOR'):
+        if key in request.META:
+            meta[key] = request.META[key]
+    for name, value in sub['headers'].items():
+        key = name.upper().replace('-', '_')
+        if key != 'AUTHORIZATION':
+            meta[f'HTTP_{key}'] = value
+    meta['HTTP_ACCEPT'] = 'application/json'
+    meta['REQUEST_METHOD'] = sub['method']
+    meta['PATH_INFO'] = path
+
+    query_string = '&'.join(part for part in (query, urlencode(sub['params'], doseq=True)) if part)
+    meta['QUERY_STRING'] = query_string
+    sub_request.GET = QueryDict(query_string)
+
+    body = sub.get('body')
+    if body is not None and sub['method'] not in READ_METHODS:
+        content = json.dumps(body).encode('utf-8')
+        meta['CONTENT_TYPE'] = 'application/json'
+        meta['CONTENT_LENGTH'] = str(len(content))
+        sub_request._stream = io.BytesIO(content)
+        sub_request._read_started = False
+
+    sub_request.META = meta
+    # Authentification partagée : DRF utilise ces attributs à la place des
+    # classes d'authentification (ForcedAuthentication)
+    sub_request.user = request.user
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def _response_body(response):
+    data = getattr(response, 'data', None)
+    if data is not None:
+        return data
+    content = response.content
+    if not content:
+        return None
+    if 'json' in response.get('Content-Type', ''):
+        return json.loads(content)
+    return content.decode(response.charset or 'utf-8', errors='replace')
@@ -0,0 +1,210 @@
+"""
+Benchmarks des endpoints critiques - GESTORE
+Suite de scénarios (liste et recherche d'articles, encaissement de 1, 10 et
+50 lignes, stocks du magasin, valorisation, résumé du jour, arbre des
+catégories, connexion) exécutés par le client de test DRF sur un jeu de
+données généré (apps.core.dataset), avec authentification JWT réelle.
+
+Par scénario :
+- latence médiane et p95 (ms)
+- nombre de requêtes SQL (maximum sur les répétitions)
+- pic d'allocation mémoire Python (tracemalloc, un appel dédié)
+
+Les résultats sont comparés à une référence JSON, par base de données
+(vendor) et par taille de jeu de données : voir compare() et la commande
+benchmark_endpoints.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .metrics import RequestSample
+
+# En deçà de ces écarts absolus, une hausse relève du bruit de mesure
+LATENCY_NOISE_MS = 1.0
+MEMORY_NOISE_KB = 64
+
+# Mesures comparées à la référence avec la tolérance relative
+TOLERATED = ('p50_ms', 'peak_kb')
+
+
+def default_baseline_path():
+    return Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class BenchmarkError(Exception):
+    """Scénario en échec (réponse HTTP en erreur)"""
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    url: str
+    payload: dict = None
+    authenticated: bool = True
+
+
+# ========================
+# SCÉNARIOS
+# ========================
+
+def build_scenarios(user, password):
+    """Scénarios de la suite pour un utilisateur rattaché à un magasin"""
+    from apps.inventory.models import Article, Stock
+    from apps.sales.models import PaymentMethod
+
+    # Articles en stock dans le magasin de l'utilisateur (encaissements)
+    article_ids = [
+        str(article_id) for article_id in Stock.objects.filter(
+            location_id=user.assigned_store_id, quantity_on_hand__gt=0
+        ).order_by('article_id').values_list('article_id', flat=True).distinct()[:50]
+    ]
+    if not article_ids:
+        raise BenchmarkError("Aucun article en stock dans le magasin de l'utilisateur")
+    payment_method = PaymentMethod.objects.filter(payment_type='cash').order_by('pk').first()
+    word = Article.objects.order_by('code').values_list('name', flat=True).first().split()[0]
+
+    def checkout(lines):
+        return {
+            'items': [
+                {'article_id': article_ids[index % len(article_ids)], 'quantity': 1}
+                for index in range(lines)
+            ],
+            'payments': [{'payment_method_id': str(payment_method.pk), 'amount': str(Decimal(10 ** 7))}],
+        }
+
+    return [
+        Scenario('article_list', 'get', reverse('inventory:article-list')),
+        Scenario('article_search', 'get', f"{reverse('inventory:article-list')}?search={word}"),
+        Scenario('pos_checkout_1', 'post', reverse('sales:pos-checkout'), checkout(1)),
+        Scenario('pos_checkout_10', 'post', reverse('sales:pos-checkout'), checkout(10)),
+        Scenario('pos_checkout_50', 'post', reverse('sales:pos-checkout'), checkout(50)),
+        Scenario('stock_list_store', 'get', reverse('inventory:stock-list')),
+        Scenario('stock_valuation', 'get', reverse('inventory:stock-valuation')),
+        Scenario('sales_daily_summary', 'get', reverse('sales:sale-daily-summary')),
+        Scenario('category_tree', 'get', reverse('inventory:category-tree')),
+        Scenario(
+            'login', 'post', reverse('authentication:login'),
+            {'username': user.username, 'password': password}, authenticated=False
+        ),
+    ]
+
+
+# ========================
+# MESURE
+# ========================
+
+def authenticated_client(username, password):
+    """Client authentifié par un jeton obtenu via l'endpoint de connexion"""
+    client = APIClient()
+    response = client.post(reverse('authentication:login'), {'username': username, 'password': password})
+    if response.status_code != 200:
+        raise BenchmarkError(f"Connexion de {username} impossible ({response.status_code})")
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    return client
+
+
+def measure(client, scenario, repeat=20, warmup=2):
+    """
+    Exécute le scénario warmup fois (caches chauds), une fois sous
+    tracemalloc (pic mémoire), puis repeat fois chronométrées
+    """
+    client = client if scenario.authenticated else APIClient()
+
+    def call():
+        response = getattr(client, scenario.method)(scenario.url, scenario.payload, format='json')
+        if response.status_code >= 400:
+            raise BenchmarkError(f"{scenario.name} : HTTP {response.status_code}")
+        return response
+
+    for _ in range(warmup):
+        call()
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    durations, queries = [], []
+    for _ in range(repeat):
+        sample = RequestSample()
+        with connection.execute_wrapper(sample.execute_wrapper):
+            start = time.perf_counter()
+            call()
+            durations.append((time.perf_counter() - start) * 1000)
+        queries.append(sample.queries)
+
+    durations.sort()
+    return {
+        'p50_ms': round(statistics.median(durations), 3),
+        'p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+        'queries': max(queries),
+        'peak_kb': peak // 1024,
+    }
+
+
+# ========================
+# RÉFÉRENCE
+# ========================
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open(encoding='utf-8') as handle:
+        return json.load(handle).get('results', {})
+
+
+def save_baseline(path, results, metadata=None):
+    """Fusionne les résultats dans la référence (les autres bases et tailles sont conservées)"""
+    path = Path(path)
+    baseline = load_baseline(path)
+    for key, scenarios in results.items():
+        baseline.setdefault(key, {}).update(scenarios)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w', encoding='utf-8') as handle:
+        json.dump({**(metadata or {}), 'results': baseline}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def compare(baseline, results, tolerance):
+    """
+    Régressions des résultats par rapport à la référence :
+    - toute requête SQL supplémentaire
+    - latence médiane ou pic mémoire au-delà de (1 + tolerance) × référence
+      (et au-delà du bruit de mesure absolu)
+
+    Returns:
+        list: messages des régressions (vide si aucune)
+    """
+    noise = {'p50_ms': LATENCY_NOISE_MS, 'peak_kb': MEMORY_NOISE_KB}
+    regressions = []
+    for key, scenarios in results.items():
+        for name, measured in scenarios.items():
+            reference = baseline.get(key, {}).get(name)
+            if not reference:
+                continue
+            if measured['queries'] > reference['queries']:
+                regressions.append(
+                    f"{key} {name} : {measured['queries']} requêtes SQL (référence {reference['queries']})"
+                )
+            for metric in TOLERATED:
+                limit = reference[metric] * (1 + tolerance)
+                if measured[metric] > limit and measured[metric] - reference[metric] > noise[metric]:
+                    regressions.append(
+                        f"{key} {name} : {metric} {measured[metric]} (référence {reference[metric]}, "
+                        f"limite {round(limit, 3)})"
+                    )
+    return regressions
@@ -0,0 +1,277 @@
+"""
+Écritures en masse - GESTORE
+Création, modification et suppression de lots d'objets en un appel
+(voir OptimizedModelViewSet.bulk_writes)
+
+- Validation : un seul serializer réutilisé pour tout le lot, erreurs
+  rapportées par position dans le lot
+- Unicité : une requête par champ unique pour tout le lot (doublons
+  internes au lot compris) au lieu d'une requête par objet
+- Écriture : bulk_create / bulk_update dans une transaction ; le lot est
+  refusé en entier si un seul élément est invalide
+
+Les modèles dont save() est surchargé, ou écoutés par post_save, sont
+enregistrés un par un (même transaction) pour conserver leur comportement,
+sauf s'ils fournissent bulk_prepare(instances) qui en tient lieu.
+"""
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from .conf import gestore_setting
+
+BULK_BATCH_SIZE = 500
+
+
+class BulkValidationError(Exception):
+    """Lot refusé : erreurs par position dans le lot"""
+
+    def __init__(self, errors, message=None):
+        super().__init__(errors)
+        self.errors = errors
+        self.message = message
+
+    @property
+    def detail(self):
+        detail = {'errors': [
+            {'index': index, 'errors': errors}
+            for index, errors in sorted(self.errors.items())
+        ]}
+        if self.message:
+            detail['error'] = self.message
+        return detail
+
+
+def bulk_max_items():
+    return gestore_setting('BULK_MAX_ITEMS', 1000)
+
+
+def _saves_one_by_one(model):
+    """Vrai si bulk_create / bulk_update contourneraient un comportement du modèle"""
+    if post_save.has_listeners(model):
+        return True
+    return model.save is not models.Model.save and not hasattr(model, 'bulk_prepare')
+
+
+class BulkWriter:
+    """
+    Exécute une écriture en masse pour une vue (OptimizedModelViewSet)
+    Le queryset, le serializer, les permissions et le contexte sont ceux de la vue.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.queryset = view.get_queryset()
+        self.model = self.queryset.model
+        self.errors = {}
+
+    # ------------------------------------------------------------------
+    # Création
+    # ------------------------------------------------------------------
+
+    def create(self, items):
+        child = self.view.get_serializer()
+        unique_fields = self._take_unique_fields(child)
+
+        validated = {}
+        for index, item in enumerate(items):
+            data = self._validate(child, index, item)
+            if data is not None:
+                validated[index] = data
+        self._check_unique(unique_fields, validated, {})
+        self._raise_errors()
+
+        extra = self.view.get_bulk_save_kwargs(created=True)
+        with self._atomic():
+            if _saves_one_by_one(self.model) or self._has_many_to_many(validated.values()):
+                return [child.create({**data, **extra}) for data in validated.values()]
+            instances = [self.model(**data, **extra) for data in validated.values()]
+            if hasattr(self.model, 'bulk_prepare'):
+                self.model.bulk_prepare(instances)
+            self.model._default_manager.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+        return instances
+
+    # ------------------------------------------------------------------
+    # Modification
+    # ------------------------------------------------------------------
+
+    def update(self, items, partial=True):
+        instances = self._load([item.get('id') if isinstance(item, dict) else None for item in items])
+        child = self.view.get_serializer()
+        child.partial = partial
+        unique_fields = self._take_unique_fields(child)
+
+        validated = {}
+        for index, item in enumerate(items):
+            instance = instances.get(index)
+            if instance is None:
+                continue
+            child.instance = instance
+            data = self._validate(child, index, item)
+            if data is not None:
+                validated[index] = data
+        child.instance = None
+        self._check_unique(unique_fields, validated, {i: obj.pk for i, obj in instances.items()})
+        self._raise_errors()
+
+        extra = self.view.get_bulk_save_kwargs(created=False)
+        changed = [instances[index] for index in validated]
+        with self._atomic():
+            if _saves_one_by_one(self.model) or self._has_many_to_many(validated.values()):
+                for index, data in validated.items():
+                    child.update(instances[index], {**data, **extra})
+            else:
+                fields = set(extra)
+                for index, data in validated.items():
+                    for attr, value in {**data, **extra}.items():
+                        setattr(instances[index], attr, value)
+                    fields.update(data)
+                if hasattr(self.model, 'updated_at'):
+                    now = timezone.now()
+                    for instance in changed:
+                        instance.updated_at = now
+                    fields.add('updated_at')
+                if hasattr(self.model, 'bulk_prepare'):
+                    self.model.bulk_prepare(changed)
+                if fields:
+                    self.model._default_manager.bulk_update(
+                        changed, sorted(fields), batch_size=BULK_BATCH_SIZE
+                    )
+        return changed
+
+    # ------------------------------------------------------------------
+    # Suppression
+    # ------------------------------------------------------------------
+
+    def delete(self, ids):
+        """
+        Suppression logique si le modèle la gère (visible par le flux de
+        changements), sinon suppression définitive
+        """
+        instances = self._load(ids)
+        self._raise_errors()
+
+        pks = [instance.pk for instance in instances.values()]
+        soft = any(f.name == 'is_deleted' for f in self.model._meta.get_fields())
+        with transaction.atomic():
+            if soft and not post_save.has_listeners(self.model):
+                now = timezone.now()
+                return self.model._default_manager.filter(pk__in=pks).update(
+                    is_deleted=True, deleted_at=now, updated_at=now
+                )
+            if soft:
+                for instance in instances.values():
+                    instance.soft_delete()
+                return len(pks)
+            if pre_delete.has_listeners(self.model) or post_delete.has_listeners(self.model):
+                for instance in instances.values():
+                    instance.delete()
+                return len(pks)
+            self.model._default_manager.filter(pk__in=pks).delete()
+            return len(pks)
+
+    # ------------------------------------------------------------------
+    # Outils
+    # ------------------------------------------------------------------
+
+    def _validate(self, child, index, item):
+        if not isinstance(item, dict):
+            self.errors[index] = {'non_field_errors': ['Un objet est attendu.']}
+            return None
+        try:
+            return child.run_validation(item)
+        except serializers.ValidationError as exc:
+            self.errors[index] = exc.detail
+            return None
+
+    def _load(self, ids):
+        """Charge les objets du lot en une requête (dans le périmètre de la vue)"""
+        pk_field = self.model._meta.pk
+        wanted = {}
+        for index, raw in enumerate(ids):
+            try:
+                wanted[index] = pk_field.to_python(raw) if raw not in (None, '') else None
+            except DjangoValidationError:
+                wanted[index] = None
+            if wanted[index] is None:
+                self.errors[index] = {'id': ['Identifiant manquant ou invalide.']}
+
+        found = self.queryset.filter(pk__in=[pk for pk in wanted.values() if pk is not None]).in_bulk()
+        instances = {}
+        for index, pk in wanted.items():
+            if pk is None:
+                continue
+            if pk not in found:
+                self.errors[index] = {'id': ['Objet non trouvé.']}
+                continue
+            self.view.check_object_permissions(self.view.request, found[pk])
+            instances[index] = found[pk]
+        return instances
+
+    def _take_unique_fields(self, child):
+        """
+        Champs uniques du modèle écrits par le serializer. Leurs
+        UniqueValidator (une requête par objet) sont retirés : l'unicité
+        est vérifiée pour tout le lot par _check_unique.
+        """
+        unique_fields = []
+        for name, field in child.fields.items():
+            if field.read_only or field.source != name:
+                continue
+            try:
+                model_field = self.model._meta.get_field(name)
+            except Exception:
+                continue
+            if model_field.unique and not model_field.primary_key:
+                unique_fields.append(name)
+                field.validators = [
+                    v for v in field.validators
+                    if not (isinstance(v, UniqueValidator) and v.lookup == 'exact')
+                ]
+        return unique_fields
+
+    def _check_unique(self, unique_fields, validated, own_pks):
+        for name in unique_fields:
+            values = {}
+            for index, data in validated.items():
+                value = data.get(name)
+                if value in (None, ''):
+                    continue
+                if value in values:
+                    self._add_error(index, name, 'Valeur en double dans le lot.')
+                else:
+                    values[value] = index
+            if not values:
+                continue
+            existing = self.model._default_manager.filter(
+                **{f'{name}__in': list(values)}
+            ).values_list(name, 'pk')
+            for value, pk in existing:
+                index = values.get(value)
+                if index is not None and own_pks.get(index) != pk:
+                    self._add_error(index, name, 'Cette valeur existe déjà.')
+
+    def _add_error(self, index, name, message):
+        self.errors.setdefault(index, {}).setdefault(name, []).append(message)
+
+    def _raise_errors(self):
+        if self.errors:
+            raise BulkValidationError(self.errors)
+
+    def _has_many_to_many(self, rows):
+        m2m = {f.name for f in self.model._meta.many_to_many}
+        return bool(m2m) and any(m2m.intersection(data) for data in rows)
+
+    @contextmanager
+    def _atomic(self):
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError as exc:
+            # Contrainte non vérifiée en amont (unique_together...) : lot refusé
+            raise BulkValidationError({}, message=f"Contrainte d'intégrité : {exc}")
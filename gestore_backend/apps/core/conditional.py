@@ -0,0 +1,75 @@
+"""
+Requêtes conditionnelles pour GESTORE
+ETag / Last-Modified des collections peu changeantes (données de référence)
+
+La version d'une collection est dérivée de max(updated_at) et du nombre de
+lignes du queryset filtré (un seul agrégat), complétée par la représentation
+demandée (URL, format, langue). Le même ETag sert de clé au cache serveur
+des réponses : une collection inchangée n'est ni resérialisée ni retransférée.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+from .conf import gestore_setting
+
+CACHE_KEY_PREFIX = 'api:conditional'
+
+
+def queryset_version(queryset):
+    """(max(updated_at), nombre de lignes) en une requête d'agrégat"""
+    stats = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+    return stats['last'], stats['count']
+
+
+def collection_version(request, querysets, scope=''):
+    """
+    Calcule (etag, last_modified) d'une réponse construite à partir de querysets.
+    last_modified est un timestamp entier (None si toutes les tables sont vides).
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    parts = [
+        request.get_host(),
+        request.get_full_path(),
+        getattr(renderer, 'format', ''),
+        get_language() or '',
+        scope,
+    ]
+    last_modified = None
+    for queryset in querysets:
+        last, count = queryset_version(queryset)
+        parts += [queryset.model._meta.label, last.isoformat() if last else '', count]
+        if last and (last_modified is None or last > last_modified):
+            last_modified = last
+
+    digest = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+    return quote_etag(digest), int(last_modified.timestamp()) if last_modified else None
+
+
+def conditional_response(request, querysets, build_data, scope=''):
+    """
+    Réponse conditionnelle :
+    - 304 sans sérialisation si le client possède déjà cette version
+    - sinon données en cache pour cette version, ou build_data() mis en cache
+    """
+    etag, last_modified = collection_version(request, querysets, scope)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        cache_key = f'{CACHE_KEY_PREFIX}:{etag.strip(chr(34))}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = build_data()
+            timeout = gestore_setting('CONDITIONAL_CACHE_TIMEOUT', 300)
+            cache.set(cache_key, data, timeout)
+        response = Response(data)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,11 @@
+"""
+Paramètres applicatifs - GESTORE
+Lecture des clés de GESTORE_SETTINGS au moment de l'appel (override_settings
+et modifications à chaud compris)
+"""
+from django.conf import settings
+
+
+def gestore_setting(name, default=None):
+    """Valeur de GESTORE_SETTINGS[name], default si la clé est absente"""
+    return getattr(settings, 'GESTORE_SETTINGS', {}).get(name, default)
@@ -0,0 +1,549 @@
+"""
+Générateur de jeu de données volumineux - GESTORE
+Données réalistes et reproductibles (graine aléatoire) pour les tests de
+performance : magasins et hiérarchies d'emplacements, arbre de catégories,
+articles avec codes-barres et images, lots avec péremption, mouvements de
+stock, ventes avec lignes et paiements, clients et utilisateurs.
+
+- Reproductible : même graine, mêmes volumes et même date de fin (until)
+  => mêmes identifiants, codes, prix, quantités et dates
+- Écritures en masse (bulk_create par lots) : les save() et les signaux ne
+  sont pas exécutés, les champs calculés sont donc renseignés ici
+- Historique : mouvements, ventes et paiements sont datés sur les `days`
+  jours précédant until (created_at compris)
+- Le stock est porté par les magasins (emplacement des ventes) ; les
+  quantités résultent de la suite des mouvements de chaque stock, les
+  ventes générées ne sont pas rapprochées des mouvements
+
+Toutes les données portent le préfixe (codes, numéros de vente) ; à
+utiliser sur une base dédiée (voir la commande generate_dataset).
+"""
+import random
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+CENT = Decimal('0.01')
+
+# Volumes par défaut (échelle 1)
+DEFAULT_COUNTS = {
+    'stores': 10,
+    'categories': 8,  # Catégories racines (× 5 sous-catégories × 4 feuilles)
+    'brands': 200,
+    'suppliers': 100,
+    'articles': 100_000,
+    'customers': 20_000,
+    'users': 50,
+    'movements': 2_000_000,
+    'sales': 200_000,
+}
+
+# Forme des arbres : sous-catégories par catégorie, emplacements par niveau
+CATEGORY_CHILDREN = (5, 4)
+LOCATION_CHILDREN = (('zone', 3), ('aisle', 4), ('shelf', 5))
+
+TAX_RATES = (Decimal('0'), Decimal('5.5'), Decimal('10'), Decimal('20'))
+
+# (type, motif, sens, poids) des mouvements après la réception initiale
+MOVEMENT_KINDS = (
+    ('out', 'sale', -1, 70),
+    ('in', 'purchase', 1, 15),
+    ('return', 'return_customer', 1, 6),
+    ('loss', 'damage', -1, 4),
+    ('found', 'inventory', 1, 5),
+)
+
+PAYMENT_METHODS = (
+    ('Espèces', 'cash'),
+    ('Carte bancaire', 'card'),
+    ('Mobile money', 'mobile_money'),
+)
+
+# (type, nom, permissions) des rôles créés s'ils n'existent pas
+ROLES = (
+    ('manager', 'Gérant', {
+        'can_manage_inventory': True, 'can_manage_sales': True, 'can_manage_suppliers': True,
+        'can_view_reports': True, 'can_apply_discounts': True, 'can_void_transactions': True,
+    }),
+    ('cashier', 'Caissier', {'can_manage_sales': True}),
+    ('stock_manager', 'Gestionnaire de stock', {'can_manage_inventory': True, 'can_view_reports': True}),
+)
+
+UNITS = (('u', 'Unité', False), ('kg', 'Kilogramme', True), ('L', 'Litre', True))
+
+PRODUCTS = (
+    'Savon', 'Shampooing', 'Café', 'Thé', 'Riz', 'Pâtes', 'Huile', 'Farine', 'Sucre',
+    'Lait', 'Jus', 'Biscuits', 'Chocolat', 'Lessive', 'Dentifrice', 'Crème', 'Sirop',
+    'Vitamines', 'Pansements', 'Sauce', 'Confiture', 'Yaourt', 'Eau', 'Céréales',
+)
+QUALIFIERS = (
+    'doux', 'bio', 'classique', 'premium', 'familial', 'léger', 'intense', 'nature',
+    'vanille', 'citron', 'complet', 'extra', 'éco', 'original',
+)
+SIZES = ('100 g', '250 g', '500 g', '1 kg', '25 cl', '50 cl', '1 L', '1,5 L', 'x6', 'x12')
+FIRST_NAMES = (
+    'Awa', 'Moussa', 'Fatou', 'Ibrahima', 'Marie', 'Jean', 'Aminata', 'Paul', 'Koffi',
+    'Aïcha', 'Luc', 'Mariam', 'Ousmane', 'Claire', 'Yao', 'Sophie',
+)
+LAST_NAMES = (
+    'Diallo', 'Traoré', 'Koné', 'Martin', 'Bamba', 'Ndiaye', 'Dupont', 'Touré',
+    'Kouassi', 'Diop', 'Bernard', 'Camara', 'Sow', 'Petit',
+)
+CITIES = ('Abidjan', 'Dakar', 'Bamako', 'Lomé', 'Cotonou', 'Ouagadougou', 'Paris', 'Lyon')
+
+
+def scaled_counts(scale=1.0, **overrides):
+    """Volumes par défaut multipliés par scale (au moins 1), puis surchargés"""
+    counts = {name: max(1, round(value * scale)) for name, value in DEFAULT_COUNTS.items()}
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+def ean13(digits):
+    """Code EAN-13 : 12 chiffres + clé de contrôle"""
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits))
+    return f'{digits}{(10 - total % 10) % 10}'
+
+
+@contextmanager
+def backdated(*models):
+    """
+    Dates de création et de modification fournies par le générateur
+    (auto_now / auto_now_add suspendus le temps des insertions)
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class DatasetGenerator:
+    """
+    Génère le jeu de données en une passe (run) ; les volumes sont ceux de
+    scaled_counts(). log(message) reçoit l'avancement de chaque étape.
+    """
+
+    def __init__(self, seed=42, counts=None, prefix='GEN', until=None, days=365,
+                 stock_density=0.3, batch_size=2000, password='gestore', log=None):
+        self.rng = random.Random(seed)
+        self.counts = counts or scaled_counts()
+        self.prefix = prefix
+        self.days = days
+        self.stock_density = stock_density
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log or (lambda message: None)
+
+        until = until or timezone.localdate()
+        self.until = timezone.make_aware(datetime.combine(until, datetime.min.time()))
+        self.since = self.until - timedelta(days=days)
+        # Plage de codes-barres propre au préfixe (articles de magasin : 2xxxxxxxxxxxx)
+        self.barcode_range = f'2{zlib.crc32(prefix.encode()) % 1000:03d}'
+        self.created = {}
+
+    # ========================
+    # OUTILS
+    # ========================
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _moment(self, start=None, end=None):
+        start = start or self.since
+        end = end or self.until
+        return start + timedelta(seconds=self.rng.random() * (end - start).total_seconds())
+
+    def _money(self, low, high):
+        return Decimal(self.rng.randint(int(low * 100), int(high * 100))) / 100
+
+    def _bulk(self, model, objects):
+        """Insertion en masse ; les volumes sont cumulés par modèle"""
+        if objects:
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            self.created[model._meta.label] = self.created.get(model._meta.label, 0) + len(objects)
+
+    @contextmanager
+    def _step(self, label):
+        start = time.perf_counter()
+        yield
+        self.log(f'{label:<24} {time.perf_counter() - start:>8.1f} s')
+
+    # ========================
+    # GÉNÉRATION
+    # ========================
+
+    def run(self):
+        """Génère toutes les données ; retourne le nombre de lignes par modèle"""
+        from apps.authentication import authz
+
+        steps = (
+            ('Référentiels', self._references),
+            ('Emplacements', self._locations),
+            ('Catégories', self._categories),
+            ('Marques / fournisseurs', self._partners),
+            ('Utilisateurs', self._users),
+            ('Clients', self._customers),
+            ('Articles', self._articles),
+            ('Stocks et mouvements', self._stocks),
+            ('Ventes', self._sales),
+        )
+        for label, step in steps:
+            with self._step(label), transaction.atomic():
+                step()
+        # Nouveaux magasins et utilisateurs : autorisations en cache invalidées
+        authz.invalidate_all()
+        return dict(self.created)
+
+    def _references(self):
+        from apps.authentication.models import Role
+        from apps.inventory.models import UnitOfMeasure
+        from apps.sales.models import PaymentMethod
+
+        self.units = [
+            UnitOfMeasure.objects.get_or_create(
+                symbol=symbol, defaults={'name': name, 'is_decimal': is_decimal}
+            )[0].pk
+            for symbol, name, is_decimal in UNITS
+        ]
+        self.payment_methods = [
+            PaymentMethod.objects.get_or_create(name=name, defaults={'payment_type': payment_type})[0].pk
+            for name, payment_type in PAYMENT_METHODS
+        ]
+        self.roles = {
+            role_type: Role.objects.get_or_create(role_type=role_type, defaults={'name': name, **permissions})[0].pk
+            for role_type, name, permissions in ROLES
+        }
+
+    def _locations(self):
+        from apps.inventory.models import Location
+
+        self.stores = []
+        level = []
+        for number in range(1, self.counts['stores'] + 1):
+            store = Location(
+                id=self._uuid(), code=f'{self.prefix}-S{number:03d}', name=f'Magasin {number}',
+                location_type='store'
+            )
+            self.stores.append(store.pk)
+            level.append(store)
+        self._bulk(Location, level)
+
+        for location_type, children in LOCATION_CHILDREN:
+            parents, level = level, []
+            for parent in parents:
+                for number in range(1, children + 1):
+                    level.append(Location(
+                        id=self._uuid(), parent_id=parent.pk, location_type=location_type,
+                        code=f'{parent.code}-{location_type[0].upper()}{number:02d}',
+                        name=f'{parent.name} / {location_type} {number}'
+                    ))
+            self._bulk(Location, level)
+
+    def _categories(self):
+        from apps.inventory.models import Category
+
+        level = []
+        for number in range(1, self.counts['categories'] + 1):
+            level.append(Category(
+                id=self._uuid(), code=f'{self.prefix}-C{number:02d}', name=f'Famille {number}',
+                order=number, tax_rate=self.rng.choice(TAX_RATES)
+            ))
+        self._bulk(Category, level)
+
+        for depth, children in enumerate(CATEGORY_CHILDREN, start=1):
+            parents, level = level, []
+            for parent in parents:
+                for number in range(1, children + 1):
+                    # Première sous-catégorie de chaque famille suivie par lot (frais, pharmacie)
+                    tracked = parent.requires_lot_tracking or (depth == 1 and number == 1)
+                    level.append(Category(
+                        id=self._uuid(), parent_id=parent.pk, code=f'{parent.code}{number:02d}',
+                        name=f'{parent.name}.{number}', order=number, tax_rate=parent.tax_rate,
+                        requires_lot_tracking=tracked, requires_expiry_date=tracked
+                    ))
+            self._bulk(Category, level)
+        # Catégories feuilles : (id, taux de TVA, suivi des lots)
+        self.leaf_categories = [
+            (category.pk, category.tax_rate, category.requires_lot_tracking) for category in level
+        ]
+
+    def _partners(self):
+        from apps.inventory.models import Brand, Supplier
+
+        brands = [
+            Brand(id=self._uuid(), name=f'{self.prefix} Marque {number}')
+            for number in range(1, self.counts['brands'] + 1)
+        ]
+        suppliers = [
+            Supplier(
+                id=self._uuid(), code=f'{self.prefix}-F{number:04d}', name=f'Fournisseur {number}',
+                phone=f'+225{self.rng.randint(10**9, 10**10 - 1)}'
+            )
+            for number in range(1, self.counts['suppliers'] + 1)
+        ]
+        self._bulk(Brand, brands)
+        self._bulk(Supplier, suppliers)
+        self.brands = [brand.pk for brand in brands]
+        self.suppliers = [supplier.pk for supplier in suppliers]
+
+    def _users(self):
+        from apps.authentication.models import User
+
+        # Un seul hachage : le mot de passe est commun à tous les comptes générés
+        password = make_password(self.password)
+        users = []
+        self.store_users = {store: [] for store in self.stores}
+        for number in range(1, self.counts['users'] + 1):
+            store = self.stores[(number - 1) % len(self.stores)]
+            # Premier compte de chaque magasin : gérant ; puis caissiers et gestionnaires de stock
+            if number <= len(self.stores):
+                role = 'manager'
+            else:
+                role = 'stock_manager' if self.rng.random() < 0.2 else 'cashier'
+            user = User(
+                id=self._uuid(), username=f'{self.prefix.lower()}_user{number:04d}',
+                password=password, first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES), email=f'user{number}@{self.prefix.lower()}.example',
+                employee_code=f'{self.prefix}E{number:05d}', role_id=self.roles[role],
+                assigned_store_id=store, hire_date=(self.since - timedelta(days=self.rng.randint(0, 1500))).date()
+            )
+            users.append(user)
+            self.store_users[store].append(user.pk)
+        self._bulk(User, users)
+
+    def _customers(self):
+        from apps.sales.models import Customer
+
+        customers = []
+        for number in range(1, self.counts['customers'] + 1):
+            first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            company = self.rng.random() < 0.1
+            customers.append(Customer(
+                id=self._uuid(), name=f'{first_name} {last_name}',
+                customer_type='company' if company else 'individual',
+                first_name=first_name, last_name=last_name,
+                company_name=f'{last_name} & Associés' if company else '',
+                email=f'client{number}@{self.prefix.lower()}.example',
+                phone=f'+225{self.rng.randint(10**9, 10**10 - 1)}', city=self.rng.choice(CITIES),
+                loyalty_card_number=f'{self.prefix}L{number:08d}' if self.rng.random() < 0.3 else None,
+                marketing_consent=self.rng.random() < 0.4
+            ))
+        # Codes clients attribués comme à l'enregistrement (CLI + numéro)
+        Customer.bulk_prepare(customers)
+        self._bulk(Customer, customers)
+        self.customers = customers
+
+    def _articles(self):
+        from apps.inventory.models import Article, ArticleBarcode, ArticleImage
+
+        # Articles : (id, code, nom, prix de vente, prix d'achat, taux de TVA, suivi des lots)
+        self.articles = []
+        folder = self.prefix.lower()
+        for start in range(0, self.counts['articles'], self.batch_size):
+            articles, barcodes, images = [], [], []
+            for number in range(start + 1, min(start + self.batch_size, self.counts['articles']) + 1):
+                category, tax_rate, tracked = self.rng.choice(self.leaf_categories)
+                purchase_price = self._money(0.2, 200)
+                selling_price = (purchase_price * Decimal(self.rng.uniform(1.15, 1.8))).quantize(CENT)
+                code = f'{self.prefix}{number:07d}'
+                name = (
+                    f'{self.rng.choice(PRODUCTS)} {self.rng.choice(QUALIFIERS)} '
+                    f'{self.rng.choice(SIZES)}'
+                )
+                article = Article(
+                    id=self._uuid(), code=code, name=name, category_id=category,
+                    brand_id=self.rng.choice(self.brands) if self.rng.random() < 0.8 else None,
+                    unit_of_measure_id=self.units[0] if self.rng.random() < 0.9 else self.rng.choice(self.units),
+                    barcode=ean13(f'{self.barcode_range}{number:08d}'),
+                    internal_reference=f'{self.prefix}-REF{number:07d}',
+                    main_supplier_id=self.rng.choice(self.suppliers),
+                    purchase_price=purchase_price, selling_price=selling_price,
+                    min_stock_level=self.rng.choice((0, 5, 10, 20)),
+                    requires_lot_tracking=tracked, requires_expiry_date=tracked,
+                    image=f'articles/{folder}/{code}.jpg'
+                )
+                articles.append(article)
+                self.articles.append((article.pk, code, name, selling_price, purchase_price, tax_rate, tracked))
+
+                barcodes.append(ArticleBarcode(
+                    id=self._uuid(), article_id=article.pk, barcode=article.barcode,
+                    barcode_type='EAN13', is_primary=True
+                ))
+                if self.rng.random() < 0.3:
+                    barcodes.append(ArticleBarcode(
+                        id=self._uuid(), article_id=article.pk, barcode=f'{self.prefix}S{number:09d}',
+                        barcode_type='SUPPLIER'
+                    ))
+                for order in range(self.rng.randint(1, 3)):
+                    images.append(ArticleImage(
+                        id=self._uuid(), article_id=article.pk, order=order, is_primary=order == 0,
+                        image=f'articles/images/{folder}/{code}-{order + 1}.jpg', alt_text=name
+                    ))
+            self._bulk(Article, articles)
+            self._bulk(ArticleBarcode, barcodes)
+            self._bulk(ArticleImage, images)
+
+    def _stocks(self):
+        """
+        Stocks par magasin (plusieurs lots datés pour les articles suivis par
+        lot) et leurs mouvements : réception initiale puis suite aléatoire
+        de sorties et d'entrées ; la quantité en stock est celle du dernier
+        mouvement
+        """
+        from apps.inventory.models import Stock, StockMovement
+
+        # Stocks de chaque magasin : [(article, lot, stock_id)] pour les ventes
+        self.store_stocks = {store: [] for store in self.stores}
+        entries = []
+        for article in self.articles:
+            stores = [store for store in self.stores if self.rng.random() < self.stock_density]
+            for store in stores or [self.rng.choice(self.stores)]:
+                if article[6]:
+                    for lot in range(1, self.rng.randint(1, 3) + 1):
+                        expiry = (self.until + timedelta(days=self.rng.randint(-30, 720))).date()
+                        entries.append((article, store, f'L{expiry:%y%m}-{lot:02d}', expiry))
+                else:
+                    entries.append((article, store, '', None))
+
+        per_stock = self.counts['movements'] / len(entries)
+        kinds = [kind[:3] for kind in MOVEMENT_KINDS]
+        weights = [kind[3] for kind in MOVEMENT_KINDS]
+        with backdated(StockMovement):
+            for start in range(0, len(entries), self.batch_size):
+                stocks, movements = [], []
+                for article, store, lot_number, expiry_date in entries[start:start + self.batch_size]:
+                    article_id, _, _, _, unit_cost, _, _ = article
+                    stock_id = self._uuid()
+                    users = self.store_users[store] or [None]
+                    count = max(1, round(per_stock * self.rng.uniform(0.5, 1.5)))
+                    moments = sorted(self._moment() for _ in range(count))
+
+                    quantity = Decimal(0)
+                    for index, moment in enumerate(moments):
+                        if index == 0:
+                            movement_type, reason, direction = 'in', 'purchase', 1
+                            amount = Decimal(self.rng.randint(20, 200))
+                        else:
+                            movement_type, reason, direction = self.rng.choices(kinds, weights)[0]
+                            amount = Decimal(self.rng.randint(1, 12 if direction > 0 else 6))
+                            if direction < 0 and amount > quantity:
+                                # Rupture évitée : réapprovisionnement à la place
+                                movement_type, reason, direction = 'in', 'purchase', 1
+                                amount = Decimal(self.rng.randint(20, 200))
+                        before, quantity = quantity, quantity + direction * amount
+                        movements.append(StockMovement(
+                            id=self._uuid(), article_id=article_id, stock_id=stock_id,
+                            movement_type=movement_type, reason=reason, quantity=amount,
+                            unit_cost=unit_cost, stock_before=before, stock_after=quantity,
+                            created_by_id=self.rng.choice(users), created_at=moment, updated_at=moment
+                        ))
+
+                    stocks.append(Stock(
+                        id=stock_id, article_id=article_id, location_id=store,
+                        lot_number=lot_number, expiry_date=expiry_date, quantity_on_hand=quantity,
+                        quantity_reserved=0, quantity_available=quantity, unit_cost=unit_cost
+                    ))
+                    self.store_stocks[store].append((article, lot_number, stock_id))
+                self._bulk(Stock, stocks)
+                self._bulk(StockMovement, movements)
+
+    def _sales(self):
+        """Ventes en ordre chronologique, une à six lignes, un ou deux paiements"""
+        from apps.sales.models import Customer, Payment, Sale, SaleItem
+
+        total_sales = self.counts['sales']
+        span = (self.until - self.since).total_seconds()
+        selling_stores = [store for store in self.stores if self.store_stocks[store]]
+        customer_totals = {}
+        with backdated(Sale, SaleItem, Payment):
+            for start in range(0, total_sales, self.batch_size):
+                sales, items, payments = [], [], []
+                for index in range(start, min(start + self.batch_size, total_sales)):
+                    moment = self.since + timedelta(seconds=span * (index + self.rng.random()) / total_sales)
+                    store = self.rng.choice(selling_stores)
+                    stocks = self.store_stocks[store]
+                    cashier = self.rng.choice(self.store_users[store])
+                    customer = self.rng.choice(self.customers) if self.rng.random() < 0.4 else None
+                    status = self.rng.choices(('completed', 'cancelled', 'refunded'), (95, 3, 2))[0]
+                    sale = Sale(
+                        id=self._uuid(), sale_number=f'{self.prefix}{moment:%Y%m%d}{index + 1:07d}',
+                        status=status, location_id=store, customer_id=customer.pk if customer else None,
+                        cashier_id=cashier, created_by_id=cashier, sale_date=moment,
+                        created_at=moment, updated_at=moment
+                    )
+
+                    subtotal = tax_amount = Decimal(0)
+                    for _ in range(self.rng.randint(1, 6)):
+                        article, lot_number, stock_id = self.rng.choice(stocks)
+                        article_id, code, name, unit_price, _, tax_rate, _ = article
+                        quantity = Decimal(self.rng.choice((1, 1, 1, 2, 2, 3)))
+                        line_total = quantity * unit_price
+                        line_tax = (line_total * tax_rate / 100).quantize(CENT)
+                        items.append(SaleItem(
+                            id=self._uuid(), sale_id=sale.pk, article_id=article_id,
+                            article_name=name, article_code=code, quantity=quantity,
+                            unit_price=unit_price, line_total=line_total, tax_rate=tax_rate,
+                            tax_amount=line_tax, lot_number=lot_number,
+                            created_at=moment, updated_at=moment
+                        ))
+                        subtotal += line_total
+                        tax_amount += line_tax
+
+                    sale.subtotal, sale.tax_amount = subtotal, tax_amount
+                    sale.total_amount = subtotal + tax_amount
+                    sale.paid_amount = sale.total_amount
+                    if customer:
+                        sale.loyalty_points_earned = int(sale.total_amount)
+                    sales.append(sale)
+
+                    # Paiement unique, ou partagé entre deux moyens
+                    shares = [sale.total_amount]
+                    if self.rng.random() < 0.15 and sale.total_amount > 1:
+                        first = (sale.total_amount * Decimal(self.rng.uniform(0.2, 0.8))).quantize(CENT)
+                        shares = [first, sale.total_amount - first]
+                    payment_status = 'completed' if status == 'completed' else (
+                        'refunded' if status == 'refunded' else 'cancelled'
+                    )
+                    for amount in shares:
+                        payments.append(Payment(
+                            id=self._uuid(), sale_id=sale.pk, payment_method_id=self.rng.choice(self.payment_methods),
+                            amount=amount, status=payment_status, payment_date=moment,
+                            created_by_id=cashier, created_at=moment, updated_at=moment
+                        ))
+
+                    if customer and status == 'completed':
+                        totals = customer_totals.setdefault(customer.pk, [Decimal(0), 0, None])
+                        totals[0] += sale.total_amount
+                        totals[1] += 1
+                        totals[2] = moment
+                self._bulk(Sale, sales)
+                self._bulk(SaleItem, items)
+                self._bulk(Payment, payments)
+
+        # Statistiques d'achat des clients
+        buyers = []
+        for customer in self.customers:
+            totals = customer_totals.get(customer.pk)
+            if totals:
+                customer.total_purchases, customer.purchase_count, customer.last_purchase_date = totals
+                customer.loyalty_points = int(totals[0])
+                buyers.append(customer)
+        Customer.objects.bulk_update(
+            buyers, ['total_purchases', 'purchase_count', 'last_purchase_date', 'loyalty_points'],
+            batch_size=self.batch_size
+        )
@@ -0,0 +1,131 @@
+"""
+Commande de benchmark des endpoints critiques - GESTORE
+Pour chaque taille demandée : génère un jeu de données (graine fixe) dans
+une transaction annulée en fin de mesure, exécute la suite de scénarios
+(apps.core.benchmarks) et compare latence, requêtes SQL et pic mémoire à
+la référence JSON. Échoue si un scénario régresse au-delà de la tolérance,
+ou s'il n'a pas de référence (sauf --allow-missing-baseline).
+
+La base utilisée est celle des settings (SQLite en local_network,
+PostgreSQL en development) ; la référence est tenue par vendor et par taille.
+
+Usage : python manage.py benchmark_endpoints --sizes 0.001,0.01
+        python manage.py benchmark_endpoints --sizes 0.01 --update-baseline
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.core.benchmarks import (
+    BenchmarkError, authenticated_client, build_scenarios, compare,
+    default_baseline_path, load_baseline, measure, save_baseline
+)
+from apps.core.dataset import DatasetGenerator, scaled_counts
+
+PREFIX = 'BENCH'
+PASSWORD = 'bench-endpoints-123'
+
+
+class Command(BaseCommand):
+    help = "Benchmark des endpoints critiques sur des jeux de données générés, comparé à une référence"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='0.001,0.01',
+            help='Échelles des jeux de données, séparées par des virgules (1 : 100 000 articles)'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Graine du jeu de données')
+        parser.add_argument('--repeat', type=int, default=20, help='Répétitions chronométrées par scénario')
+        parser.add_argument('--warmup', type=int, default=2, help="Appels d'échauffement par scénario")
+        parser.add_argument('--only', help='Scénarios à exécuter, séparés par des virgules')
+        parser.add_argument('--baseline', help='Fichier de référence JSON (défaut : benchmarks/baseline.json)')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Hausse relative tolérée de la latence médiane et du pic mémoire'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Enregistre les résultats comme nouvelle référence au lieu de comparer'
+        )
+        parser.add_argument(
+            '--allow-missing-baseline', action='store_true',
+            help="Avertit seulement pour les scénarios sans référence (sinon : échec)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [float(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes : échelles numériques séparées par des virgules")
+        only = set(options['only'].split(',')) if options['only'] else None
+        baseline_path = options['baseline'] or default_baseline_path()
+
+        results = {}
+        # Mesures dans les conditions de production : pas de journal des requêtes (DEBUG)
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for size in sizes:
+                key = f'{connection.vendor}:{size:g}'
+                try:
+                    results[key] = self._run_size(size, options, only)
+                except BenchmarkError as e:
+                    raise CommandError(f"{key} : {e}")
+
+        if options['update_baseline']:
+            save_baseline(baseline_path, results, {'seed': options['seed'], 'repeat': options['repeat']})
+            self.stdout.write(self.style.SUCCESS(f"Référence mise à jour : {baseline_path}"))
+            return
+
+        baseline = load_baseline(baseline_path)
+        missing = [
+            f'{key} {name}' for key, scenarios in results.items()
+            for name in scenarios if name not in baseline.get(key, {})
+        ]
+        if missing:
+            message = f"Pas de référence pour {', '.join(missing)} ({baseline_path})"
+            if not options['allow_missing_baseline']:
+                raise CommandError(f"{message} : la créer avec --update-baseline")
+            self.stdout.write(self.style.WARNING(message))
+        regressions = compare(baseline, results, options['tolerance'])
+        if regressions:
+            raise CommandError("Régressions de performance :\n" + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS("Aucune régression"))
+
+    def _run_size(self, size, options, only):
+        """Génère le jeu de données, mesure la suite, puis annule la transaction"""
+        from apps.authentication import authz
+        from apps.authentication.models import User
+
+        self.stdout.write(f"\n{connection.vendor} - échelle {size:g}")
+        results = {}
+        try:
+            with transaction.atomic():
+                # Fin d'historique demain : le résumé du jour porte sur des ventes
+                created = DatasetGenerator(
+                    seed=options['seed'], counts=scaled_counts(size), prefix=PREFIX,
+                    until=timezone.localdate() + timedelta(days=1), password=PASSWORD
+                ).run()
+                self.stdout.write(f"  {sum(created.values())} lignes générées")
+
+                # Gérant du premier magasin : droits ventes et stocks, filtrage par magasin
+                user = User.objects.get(username=f'{PREFIX.lower()}_user0001')
+                client = authenticated_client(user.username, PASSWORD)
+                for scenario in build_scenarios(user, PASSWORD):
+                    if only and scenario.name not in only:
+                        continue
+                    measured = results[scenario.name] = measure(
+                        client, scenario, repeat=options['repeat'], warmup=options['warmup']
+                    )
+                    self.stdout.write(
+                        f"  {scenario.name:<22} p50 {measured['p50_ms']:>9.2f} ms  "
+                        f"p95 {measured['p95_ms']:>9.2f} ms  {measured['queries']:>4} requêtes  "
+                        f"{measured['peak_kb']:>7} Ko"
+                    )
+                transaction.set_rollback(True)
+        finally:
+            # Autorisations en cache des données annulées
+            authz.invalidate_all()
+        return results
@@ -0,0 +1,97 @@
+"""
+Commande de benchmark de la connexion - GESTORE
+Mesure le débit de /api/auth/login/ (connexions par seconde) avec des
+utilisateurs concurrents, écritures différées activées puis désactivées
+(session, journal et statistiques du profil écrits dans la requête).
+
+Les utilisateurs de test (bench_login_*) sont créés puis supprimés avec
+leurs sessions et journaux.
+
+Usage : python manage.py benchmark_login --users 50 --logins 4 --concurrency 10
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.write_behind import write_behind
+
+PASSWORD = 'bench-login-123'
+PREFIX = 'bench_login_'
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit de connexion (connexions/s), écritures différées ou non"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Nombre d'utilisateurs (caissiers)")
+        parser.add_argument('--logins', type=int, default=4, help='Connexions par utilisateur')
+        parser.add_argument('--concurrency', type=int, default=10, help='Connexions simultanées')
+        parser.add_argument(
+            '--fast-hash', action='store_true',
+            help='Hachage MD5 des mots de passe : mesure le coût base de données seul'
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"Des utilisateurs {PREFIX}* existent déjà : supprimez-les d'abord")
+
+        hashers = settings.PASSWORD_HASHERS
+        if options['fast_hash']:
+            hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        with override_settings(PASSWORD_HASHERS=hashers):
+            users = [
+                User.objects.create_user(username=f'{PREFIX}{i}', password=PASSWORD)
+                for i in range(options['users'])
+            ]
+            try:
+                for enabled in (False, True):
+                    self._run(users, options, enabled)
+            finally:
+                write_behind.flush()
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def _run(self, users, options, enabled):
+        gestore_settings = {**settings.GESTORE_SETTINGS, 'WRITE_BEHIND_ENABLED': enabled}
+        with override_settings(GESTORE_SETTINGS=gestore_settings):
+            with CaptureQueriesContext(connection) as queries:
+                _login(users[0].username)
+            logins = [user.username for user in users] * options['logins']
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                statuses = list(pool.map(_login_in_thread, logins))
+            elapsed = time.perf_counter() - start
+            # Le débit de la requête n'inclut pas la vidange de la file
+            write_behind.flush()
+
+        failures = sum(1 for code in statuses if code != 200)
+        label = 'différées' if enabled else 'dans la requête'
+        self.stdout.write(
+            f"écritures {label:<16} {len(logins):>5} connexions  "
+            f"{len(logins) / elapsed:8.1f} connexions/s  "
+            f"{len(queries.captured_queries):>3} requêtes SQL/connexion  "
+            f"{failures} échecs"
+        )
+
+
+def _login(username):
+    response = APIClient().post('/api/auth/login/', {'username': username, 'password': PASSWORD})
+    return response.status_code
+
+
+def _login_in_thread(username):
+    # Connexion de base propre au thread
+    close_old_connections()
+    try:
+        return _login(username)
+    finally:
+        connection.close()
@@ -0,0 +1,68 @@
+"""
+Commande de benchmark des formats de réponse - GESTORE
+Compare la taille (brute, gzip, brotli) et le temps d'encodage des listes
+d'articles, de stocks et de ventes en JSON, MessagePack et CBOR.
+
+Usage : python manage.py benchmark_renderers --rows 200 --repeat 10
+"""
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.core.middleware import brotli
+from apps.core.renderers import CBORRenderer, MessagePackRenderer, cbor2, msgpack
+
+from .benchmark_serializers import _targets
+
+
+class Command(BaseCommand):
+    help = "Compare la taille et le temps d'encodage des formats JSON / MessagePack / CBOR"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help="Nombre d'objets par liste")
+        parser.add_argument('--repeat', type=int, default=10, help='Nombre de répétitions')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+
+        renderers = [JSONRenderer()]
+        if msgpack is not None:
+            renderers.append(MessagePackRenderer())
+        if cbor2 is not None:
+            renderers.append(CBORRenderer())
+        if len(renderers) == 1:
+            self.stdout.write(self.style.WARNING("msgpack et cbor2 absents : JSON seul"))
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli absent : colonne brotli ignorée"))
+
+        for name, serializer_class, queryset in _targets():
+            if name == 'StockMovementSerializer':
+                continue
+            instances = list(queryset[:rows])
+            if not instances:
+                self.stdout.write(f"{name:<24} aucune donnée, ignoré")
+                continue
+
+            self.stdout.write(f"{name} ({len(instances)} objets)")
+            for renderer in renderers:
+                # Même contexte qu'une requête API négociée vers ce format
+                request = Request(RequestFactory().get('/'))
+                request.accepted_renderer = renderer
+                data = serializer_class(instances, many=True, context={'request': request}).data
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    content = renderer.render(data)
+                encode_ms = (time.perf_counter() - start) / repeat * 1000
+
+                gzip_size = len(gzip.compress(content, compresslevel=6))
+                brotli_size = len(brotli.compress(content, quality=5)) if brotli is not None else None
+                self.stdout.write(
+                    f"  {renderer.format:<8} {len(content):>9} o  gzip {gzip_size:>8} o  "
+                    f"brotli {brotli_size if brotli_size is not None else '-':>8} o  "
+                    f"encodage {encode_ms:8.2f} ms"
+                )
@@ -0,0 +1,86 @@
+"""
+Commande de benchmark des serializers de liste - GESTORE
+Compare le chemin de lecture rapide (fast_read) au chemin DRF standard
+sur les données de la base et vérifie que les sorties sont identiques.
+
+Usage : python manage.py benchmark_serializers --rows 50 --repeat 20
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from rest_framework.renderers import JSONRenderer
+
+
+def _targets():
+    from apps.inventory.models import Article, Stock, StockMovement
+    from apps.inventory.serializers import (
+        ArticleListSerializer, StockSerializer, StockMovementSerializer
+    )
+    from apps.sales.models import Sale
+    from apps.sales.serializers import SaleListSerializer
+
+    return [
+        ('ArticleListSerializer', ArticleListSerializer, Article.objects.select_related(
+            'category', 'brand', 'unit_of_measure'
+        ).prefetch_related('images').annotate(
+            current_stock=Sum('stock_entries__quantity_on_hand'),
+            available_stock=Sum('stock_entries__quantity_available')
+        )),
+        ('SaleListSerializer', SaleListSerializer, Sale.objects.select_related(
+            'customer', 'cashier', 'location'
+        ).annotate(items_count=Count('items'))),
+        ('StockSerializer', StockSerializer, Stock.objects.select_related(
+            'article__category', 'article__brand', 'article__unit_of_measure', 'location__parent'
+        ).prefetch_related('article__images')),
+        ('StockMovementSerializer', StockMovementSerializer, StockMovement.objects.select_related(
+            'article__category', 'article__brand', 'article__unit_of_measure',
+            'stock__article__category', 'stock__article__brand', 'stock__article__unit_of_measure',
+            'stock__location__parent', 'created_by'
+        ).prefetch_related('article__images', 'stock__article__images')),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare le chemin de sérialisation rapide au chemin DRF (temps et sortie)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50, help="Nombre d'objets par liste")
+        parser.add_argument('--repeat', type=int, default=20, help='Nombre de répétitions')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        rows, repeat = options['rows'], options['repeat']
+        mismatches = []
+
+        for name, serializer_class, queryset in _targets():
+            instances = list(queryset[:rows])
+            if not instances:
+                self.stdout.write(f"{name:<26} aucune donnée, ignoré")
+                continue
+
+            # Les instances sont chargées une seule fois : seule la sérialisation est mesurée
+            timings = {}
+            outputs = {}
+            for fast in (False, True):
+                serializer_class.fast_read = fast
+                try:
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        data = serializer_class(instances, many=True).data
+                    timings[fast] = (time.perf_counter() - start) / repeat
+                    outputs[fast] = renderer.render(data)
+                finally:
+                    serializer_class.fast_read = True
+
+            identical = outputs[False] == outputs[True]
+            if not identical:
+                mismatches.append(name)
+            self.stdout.write(
+                f"{name:<26} {len(instances):>4} objets  "
+                f"DRF {timings[False] * 1000:8.2f} ms  rapide {timings[True] * 1000:8.2f} ms  "
+                f"x{timings[False] / timings[True]:.2f}  {'identique' if identical else 'DIFFÉRENT'}"
+            )
+
+        if mismatches:
+            raise CommandError(f"Sorties différentes : {', '.join(mismatches)}")
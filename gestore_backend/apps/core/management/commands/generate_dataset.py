@@ -0,0 +1,71 @@
+"""
+Commande de génération d'un jeu de données volumineux - GESTORE
+Données reproductibles (graine) pour les tests de performance, insérées en
+masse : voir apps.core.dataset.
+
+Usage : python manage.py generate_dataset --seed 42 --scale 0.1
+        python manage.py generate_dataset --articles 100000 --movements 2000000 --until 2026-01-01
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.dataset import DEFAULT_COUNTS, DatasetGenerator, scaled_counts
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données volumineux et reproductible (tests de performance)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire')
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplicateur des volumes par défaut (1 : 100 000 articles, 2 000 000 de mouvements)'
+        )
+        for name, value in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, help=f'Volume (défaut : {value} × scale)')
+        parser.add_argument('--prefix', default='GEN', help='Préfixe des codes générés (8 caractères au plus)')
+        parser.add_argument(
+            '--until', type=date.fromisoformat,
+            help="Date de fin de l'historique AAAA-MM-JJ (défaut : aujourd'hui ; à fixer pour reproduire)"
+        )
+        parser.add_argument('--days', type=int, default=365, help="Profondeur de l'historique en jours")
+        parser.add_argument(
+            '--stock-density', type=float, default=0.3,
+            help="Proportion des magasins stockant chaque article"
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help="Lignes par insertion")
+        parser.add_argument('--password', default='gestore', help='Mot de passe des utilisateurs générés')
+
+    def handle(self, *args, **options):
+        from apps.inventory.models import Location
+
+        prefix = options['prefix']
+        if not prefix.isalnum() or len(prefix) > 8:
+            raise CommandError("Le préfixe doit être alphanumérique (8 caractères au plus)")
+        counts = scaled_counts(options['scale'], **{name: options[name] for name in DEFAULT_COUNTS})
+        if counts['users'] < counts['stores']:
+            raise CommandError("Il faut au moins un utilisateur par magasin (--users)")
+        if Location.objects.filter(code__startswith=f'{prefix}-S').exists():
+            raise CommandError(
+                f"Des données de préfixe {prefix} existent déjà : "
+                f"utiliser un autre préfixe ou une base vide"
+            )
+
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            counts=counts,
+            prefix=prefix,
+            until=options['until'],
+            days=options['days'],
+            stock_density=options['stock_density'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            log=self.stdout.write
+        )
+        created = generator.run()
+
+        self.stdout.write('')
+        for label, count in created.items():
+            self.stdout.write(f"{label:<32} {count:>10}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(created.values())} lignes générées"))
@@ -0,0 +1,63 @@
+"""
+Commande des requêtes lentes - GESTORE
+Affiche les requêtes SQL lentes (SlowQuery, voir apps.core.querylog)
+agrégées par empreinte, triées par temps total : nombre d'exécutions,
+temps total, moyen et maximal, requête normalisée et dernier plan.
+
+Usage : python manage.py slow_queries --days 7 --top 20 --plans
+        python manage.py slow_queries --purge 30
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from apps.core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Requêtes SQL lentes agrégées par empreinte (les plus coûteuses d'abord)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Période analysée (jours)')
+        parser.add_argument('--top', type=int, default=20, help="Nombre d'empreintes affichées")
+        parser.add_argument('--plans', action='store_true', help="Afficher le dernier plan d'exécution")
+        parser.add_argument('--purge', type=int, metavar='DAYS', help='Supprimer les entrées plus anciennes que DAYS jours')
+
+    def handle(self, *args, **options):
+        if options['purge'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge'])
+            deleted, _ = SlowQuery.objects.filter(executed_at__lt=cutoff).delete()
+            self.stdout.write(f"{deleted} requête(s) lente(s) supprimée(s)")
+            return
+
+        recent = SlowQuery.objects.filter(
+            executed_at__gte=timezone.now() - timedelta(days=options['days'])
+        )
+        offenders = list(recent.values('fingerprint').annotate(
+            calls=Count('id'), total=Sum('duration_ms'), mean=Avg('duration_ms'), worst=Max('duration_ms')
+        ).order_by('-total')[:options['top']])
+        if not offenders:
+            self.stdout.write("Aucune requête lente sur la période")
+            return
+
+        # Requête normalisée et dernier plan connu de chaque empreinte
+        details = {}
+        for sql, key, plan in recent.filter(
+            fingerprint__in=[row['fingerprint'] for row in offenders]
+        ).order_by('-executed_at').values_list('sql', 'fingerprint', 'plan'):
+            sample = details.setdefault(key, {'sql': sql, 'plan': ''})
+            if plan and not sample['plan']:
+                sample['plan'] = plan
+
+        self.stdout.write(f"{'appels':>7} {'total ms':>10} {'moyen ms':>9} {'max ms':>9}  empreinte")
+        for row in offenders:
+            sample = details[row['fingerprint']]
+            self.stdout.write(
+                f"{row['calls']:>7} {row['total']:>10.1f} {row['mean']:>9.1f} {row['worst']:>9.1f}  {row['fingerprint']}"
+            )
+            self.stdout.write(f"        {sample['sql'][:300]}")
+            if options['plans'] and sample['plan']:
+                for line in sample['plan'].splitlines():
+                    self.stdout.write(f"          | {line}")
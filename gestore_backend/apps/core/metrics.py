@@ -0,0 +1,197 @@
+"""
+Métriques des requêtes - GESTORE
+Instrumentation légère de chaque requête API (voir RequestMetricsMiddleware),
+agrégée par route et par méthode HTTP :
+- durée de la requête
+- nombre de requêtes SQL et temps passé en base
+- temps de sérialisation (serializers GESTORE)
+- taille de la réponse (après compression)
+
+Les mesures sont agrégées en mémoire dans des histogrammes log-linéaires
+(style HDR : précision relative constante, mémoire bornée) et exposées au
+format texte Prometheus par metrics_view (/api/metrics/).
+
+Les histogrammes sont propres au processus : avec plusieurs workers, chaque
+collecte ne voit que le worker qui répond.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from .conf import gestore_setting
+
+# Sous-intervalles par octave : erreur relative des quantiles < 1/(2 × 16)
+SUB_BUCKETS = 16
+
+# Quantiles exposés
+QUANTILES = (0.5, 0.9, 0.99)
+
+# (nom Prometheus, attribut de RouteMetrics, aide)
+SERIES = (
+    ('gestore_http_request_duration_seconds', 'duration', 'Durée des requêtes'),
+    ('gestore_http_db_queries', 'queries', 'Requêtes SQL par requête'),
+    ('gestore_http_db_duration_seconds', 'db_time', 'Temps passé en base par requête'),
+    ('gestore_http_serializer_duration_seconds', 'serializer_time', 'Temps de sérialisation par requête'),
+    ('gestore_http_response_size_bytes', 'size', 'Taille des réponses (hors flux)'),
+)
+
+_local = threading.local()
+
+
+# ========================
+# HISTOGRAMME
+# ========================
+
+class Histogram:
+    """
+    Histogramme log-linéaire : chaque octave [2^(e-1), 2^e) est découpée en
+    SUB_BUCKETS intervalles égaux ; seuls les intervalles utilisés sont stockés
+    """
+    __slots__ = ('counts', 'zeros', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.zeros = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        mantissa, exponent = math.frexp(value)  # value = mantissa × 2^exponent, 0.5 <= mantissa < 1
+        self.counts[exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)] += 1
+
+    def quantile(self, q):
+        """Valeur au quantile q (milieu de l'intervalle, bornée par le maximum)"""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = self.zeros
+        if seen >= rank:
+            return 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                exponent, sub = divmod(index, SUB_BUCKETS)
+                middle = math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent)
+                return min(middle, self.max)
+        return self.max
+
+
+class RouteMetrics:
+    """Histogrammes d'une route et d'une méthode"""
+    __slots__ = ('duration', 'queries', 'db_time', 'serializer_time', 'size', 'statuses')
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.queries = Histogram()
+        self.db_time = Histogram()
+        self.serializer_time = Histogram()
+        self.size = Histogram()
+        self.statuses = defaultdict(int)
+
+
+class MetricsRegistry:
+    """Métriques du processus, par (route, méthode)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteMetrics)
+
+    def observe(self, route, method, status, sample, duration, size):
+        with self._lock:
+            metrics = self._routes[(route, method)]
+            metrics.duration.record(duration)
+            metrics.queries.record(sample.queries)
+            metrics.db_time.record(sample.db_time)
+            metrics.serializer_time.record(sample.serializer_time)
+            if size is not None:
+                metrics.size.record(size)
+            metrics.statuses[status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render_prometheus(self):
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = []
+            for name, attribute, help_text in SERIES:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} summary')
+                for (route, method), metrics in routes:
+                    histogram = getattr(metrics, attribute)
+                    if not histogram.count:
+                        continue
+                    labels = f'route="{_escape(route)}",method="{method}"'
+                    for q in QUANTILES:
+                        lines.append(f'{name}{{{labels},quantile="{q}"}} {_number(histogram.quantile(q))}')
+                    lines.append(f'{name}_sum{{{labels}}} {_number(histogram.total)}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP gestore_http_responses_total Réponses par code HTTP')
+            lines.append('# TYPE gestore_http_responses_total counter')
+            for (route, method), metrics in routes:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(
+                        f'gestore_http_responses_total{{route="{_escape(route)}",method="{method}",'
+                        f'status="{status}"}} {count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+
+# ========================
+# MESURES D'UNE REQUÊTE
+# ========================
+
+class RequestSample:
+    """Compteurs de la requête en cours (thread courant)"""
+    __slots__ = ('queries', 'db_time', 'serializer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Wrapper d'exécution SQL (connection.execute_wrapper)"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current_sample():
+    """Mesures de la requête en cours, ou None hors requête instrumentée"""
+    return getattr(_local, 'sample', None)
+
+
+def start_sample():
+    sample = _local.sample = RequestSample()
+    return sample
+
+
+def end_sample():
+    _local.sample = None
@@ -0,0 +1,117 @@
+"""
+Middlewares pour GESTORE
+- Compression des réponses volumineuses (liaisons lentes entre magasins)
+- Métriques des requêtes par route (durée, SQL, sérialisation, taille)
+- Profilage à la demande de requêtes réelles
+"""
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .conf import gestore_setting
+from .metrics import end_sample, registry, start_sample
+from .profiling import profile_call, trigger_for
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compression brotli (si installé et accepté par le client), sinon gzip.
+    Seules les réponses dépassant COMPRESSION_MIN_SIZE octets sont compressées ;
+    les réponses en flux sont toujours compressées en gzip, sauf les flux
+    d'événements (SSE) qui doivent parvenir au client sans tampon.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < gestore_setting('COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (brotli is None or response.streaming or response.has_header('Content-Encoding')
+                or not re_accepts_brotli.search(accept_encoding)):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(
+            response.content, quality=gestore_setting('BROTLI_QUALITY', 5)
+        )
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Mesure chaque requête et l'agrège par route (nom de la vue résolue) et
+    méthode dans apps.core.metrics.registry ; à placer en tête de
+    MIDDLEWARE pour que durée et taille incluent la compression.
+    Les réponses en flux ne sont mesurées que jusqu'à l'envoi des en-têtes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not gestore_setting('METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        sample = start_sample()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            end_sample()
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match is not None else 'unmatched',
+            request.method,
+            response.status_code,
+            sample,
+            duration,
+            None if response.streaming else len(response.content)
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile la vue des requêtes désignées (voir apps.core.profiling) ; à
+    placer en fin de MIDDLEWARE, au plus près de la vue
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = request.resolver_match.view_name
+        trigger = trigger_for(request, route)
+        if trigger is None:
+            return None
+        return profile_call(request, route, trigger, lambda: view_func(request, *view_args, **view_kwargs))
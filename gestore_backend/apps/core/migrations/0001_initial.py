@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:01
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Date et heure de création automatique', verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date et heure de dernière modification automatique', verbose_name='Date de modification')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identifiant UUID unique généré automatiquement', primary_key=True, serialize=False, verbose_name='Identifiant unique')),
+                ('route', models.CharField(db_index=True, help_text='Nom de la vue résolue (ex. inventory:article-list)', max_length=200, verbose_name='Route')),
+                ('method', models.CharField(max_length=10, verbose_name='Méthode')),
+                ('path', models.TextField(verbose_name='Chemin')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Code HTTP')),
+                ('trigger', models.CharField(choices=[('header', 'En-tête de profilage'), ('armed', 'Route armée')], max_length=10, verbose_name='Déclenchement')),
+                ('engine', models.CharField(max_length=20, verbose_name='Profileur')),
+                ('duration_ms', models.FloatField(verbose_name='Durée (ms)')),
+                ('query_count', models.PositiveIntegerField(verbose_name='Requêtes SQL')),
+                ('query_time_ms', models.FloatField(verbose_name='Temps SQL (ms)')),
+                ('queries', models.JSONField(default=list, help_text="[{sql, ms}] dans l'ordre d'exécution (paramètres non conservés)", verbose_name='Requêtes SQL')),
+                ('summary', models.TextField(verbose_name='Résumé du profil')),
+                ('data', models.BinaryField(help_text='Fichier pstats (cProfile) ou page HTML (pyinstrument)', verbose_name='Profil')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Profil de requête',
+                'verbose_name_plural': 'Profils de requêtes',
+                'db_table': 'core_request_profile',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
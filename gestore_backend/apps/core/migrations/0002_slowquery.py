@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:45
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Date et heure de création automatique', verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date et heure de dernière modification automatique', verbose_name='Date de modification')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Identifiant UUID unique généré automatiquement', primary_key=True, serialize=False, verbose_name='Identifiant unique')),
+                ('fingerprint', models.CharField(db_index=True, help_text='Empreinte de la requête normalisée (valeurs et listes IN retirées)', max_length=16, verbose_name='Empreinte')),
+                ('sql', models.TextField(verbose_name='Requête normalisée')),
+                ('duration_ms', models.FloatField(verbose_name='Durée (ms)')),
+                ('executed_at', models.DateTimeField(db_index=True, verbose_name='Exécutée à')),
+                ('vendor', models.CharField(max_length=20, verbose_name='Base de données')),
+                ('plan', models.TextField(blank=True, help_text='EXPLAIN (une fois par empreinte et par intervalle)', verbose_name="Plan d'exécution")),
+            ],
+            options={
+                'verbose_name': 'Requête lente',
+                'verbose_name_plural': 'Requêtes lentes',
+                'db_table': 'core_slow_query',
+                'ordering': ['-executed_at'],
+            },
+        ),
+    ]
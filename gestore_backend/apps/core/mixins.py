@@ -2,9 +2,12 @@
 Mixins pour le filtrage multi-magasins - GESTORE
 Système intelligent de filtrage des données par magasin selon le rôle de l'utilisateur
 """
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 from rest_framework.exceptions import PermissionDenied
 
+from apps.authentication.authz import get_authorization, store_locations as _store_locations
+
 
 class StoreFilterMixin:
     """
@@ -47,6 +50,9 @@ class StoreFilterMixin:
         # Cas 2 : Employé avec magasin assigné
         elif user.assigned_store:
             # Filtrage OBLIGATOIRE sur son magasin et ses enfants
+            context = get_authorization(user)
+            if context is not None and context.assigned_store_id == user.assigned_store_id:
+                return queryset.filter(**{f"{self.store_filter_field}__in": context.store_location_ids})
             return self._filter_by_store(queryset, user.assigned_store.id)
         
         # Cas 3 : Utilisateur sans rôle ou sans magasin (sécurité)
@@ -65,18 +71,15 @@ class StoreFilterMixin:
         Returns:
             QuerySet filtré
         """
-        from apps.inventory.models import Location
-        
+        # Magasin + tous ses emplacements enfants (hiérarchie), en cache
         try:
-            store = Location.objects.get(id=store_id, location_type='store')
-        except Location.DoesNotExist:
+            store_locations = _store_locations(store_id)
+        except (ValueError, ValidationError):
+            store_locations = []
+        if not store_locations:
             # Magasin non trouvé : retourner queryset vide
             return queryset.none()
         
-        # Récupérer le magasin + tous ses emplacements enfants (hiérarchie)
-        store_locations = [store.id]
-        store_locations.extend([child.id for child in store.get_children_recursive()])
-        
         # Construire le filtre selon le champ configuré
         filter_field = self.store_filter_field
         
@@ -160,6 +163,12 @@ class StoreFilterMixin:
             # Admin : accès complet
             return
         
+        # Emplacements du magasin déjà connus : pas de remontée de la hiérarchie
+        context = get_authorization(user)
+        if (context is not None and context.assigned_store_id == user.assigned_store_id
+                and str(location_id) in {str(pk) for pk in context.store_location_ids}):
+            return
+        
         try:
             location = Location.objects.get(id=location_id)
         except Location.DoesNotExist:
@@ -1,8 +1,10 @@
 """
 Modèles de base pour l'application core - GESTORE
 Ces modèles abstraits sont utilisés par toutes les autres applications
+(seuls RequestProfile et SlowQuery, diagnostic des performances, sont concrets)
 """
 import uuid
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -241,4 +243,83 @@ class OrderedModel(models.Model):
     
     class Meta:
         abstract = True
-        ordering = ['order']
\ No newline at end of file
+        ordering = ['order']
+
+
+class RequestProfile(UUIDModel, TimestampedModel):
+    """
+    Profil d'exécution d'une requête API (voir apps.core.profiling)
+    Profil cProfile (ou pyinstrument) et liste des requêtes SQL, à
+    télécharger depuis l'administration
+    """
+    TRIGGERS = [
+        ('header', 'En-tête de profilage'),
+        ('armed', 'Route armée'),
+    ]
+    
+    route = models.CharField(
+        max_length=200,
+        db_index=True,
+        verbose_name="Route",
+        help_text="Nom de la vue résolue (ex. inventory:article-list)"
+    )
+    method = models.CharField(max_length=10, verbose_name="Méthode")
+    path = models.TextField(verbose_name="Chemin")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Code HTTP")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Utilisateur"
+    )
+    trigger = models.CharField(max_length=10, choices=TRIGGERS, verbose_name="Déclenchement")
+    engine = models.CharField(max_length=20, verbose_name="Profileur")
+    duration_ms = models.FloatField(verbose_name="Durée (ms)")
+    query_count = models.PositiveIntegerField(verbose_name="Requêtes SQL")
+    query_time_ms = models.FloatField(verbose_name="Temps SQL (ms)")
+    queries = models.JSONField(
+        default=list,
+        verbose_name="Requêtes SQL",
+        help_text="[{sql, ms}] dans l'ordre d'exécution (paramètres non conservés)"
+    )
+    summary = models.TextField(verbose_name="Résumé du profil")
+    data = models.BinaryField(
+        verbose_name="Profil",
+        help_text="Fichier pstats (cProfile) ou page HTML (pyinstrument)"
+    )
+    
+    class Meta:
+        db_table = 'core_request_profile'
+        verbose_name = 'Profil de requête'
+        verbose_name_plural = 'Profils de requêtes'
+        ordering = ['-created_at']
+
+
+class SlowQuery(UUIDModel, TimestampedModel):
+    """
+    Exécution d'une requête SQL au-delà du seuil QUERYLOG_SLOW_MS
+    (voir apps.core.querylog), avec son plan d'exécution
+    """
+    fingerprint = models.CharField(
+        max_length=16,
+        db_index=True,
+        verbose_name="Empreinte",
+        help_text="Empreinte de la requête normalisée (valeurs et listes IN retirées)"
+    )
+    sql = models.TextField(verbose_name="Requête normalisée")
+    duration_ms = models.FloatField(verbose_name="Durée (ms)")
+    executed_at = models.DateTimeField(db_index=True, verbose_name="Exécutée à")
+    vendor = models.CharField(max_length=20, verbose_name="Base de données")
+    plan = models.TextField(
+        blank=True,
+        verbose_name="Plan d'exécution",
+        help_text="EXPLAIN (une fois par empreinte et par intervalle)"
+    )
+    
+    class Meta:
+        db_table = 'core_slow_query'
+        verbose_name = 'Requête lente'
+        verbose_name_plural = 'Requêtes lentes'
+        ordering = ['-executed_at']
@@ -0,0 +1,196 @@
+"""
+Pagination pour GESTORE
+Pagination par curseur (keyset) optionnelle pour les tables volumineuses
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def approximate_count(queryset):
+    """
+    Nombre de lignes estimé par le planificateur (PostgreSQL).
+    Sur les autres moteurs (SQLite en réseau local, petits volumes),
+    retourne le nombre exact.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Pagination par numéro de page, avec un mode curseur sur option.
+
+    Le mode curseur est activé par la présence du paramètre ?cursor=
+    (vide pour la première page). Les lignes sont triées par
+    (cursor_field, id) décroissants et chaque page est lue par une requête
+    WHERE (champ, id) < (valeur, id) sur index, sans COUNT(*) ni OFFSET.
+
+    Le champ de tri est celui passé au constructeur, sinon l'attribut
+    cursor_field de la vue, sinon created_at. Le paramètre ?count= ajoute un total :
+    - exact : COUNT(*)
+    - approximate : estimation du planificateur PostgreSQL
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cursor_field = 'created_at'
+
+    keyset_mode = False
+
+    def __init__(self, cursor_field=None, page_size=None):
+        # Surcharges pour les actions personnalisées qui paginent elles-mêmes
+        if cursor_field:
+            self.cursor_field = cursor_field
+            self.cursor_field_forced = True
+        if page_size:
+            self.page_size = page_size
+
+    # ------------------------------------------------------------------
+    # API DRF
+    # ------------------------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        if getattr(self, 'cursor_field_forced', False):
+            self.field = self.cursor_field
+        else:
+            self.field = getattr(view, 'cursor_field', None) or self.cursor_field
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.count = self._get_count(queryset, request)
+
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        reverse = bool(position and position.get('r'))
+
+        if position:
+            value = self._parse_value(position['v'])
+            if reverse:
+                condition = Q(**{f'{self.field}__gt': value}) | Q(**{self.field: value, 'pk__gt': position['pk']})
+            else:
+                condition = Q(**{f'{self.field}__lt': value}) | Q(**{self.field: value, 'pk__lt': position['pk']})
+            queryset = queryset.filter(condition)
+
+        if reverse:
+            queryset = queryset.order_by(self.field, 'pk')
+        else:
+            queryset = queryset.order_by(f'-{self.field}', '-pk')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Vers la fin : il reste des lignes si on en a lu plus que la page,
+        # ou si on revient en arrière. Vers le début : toute page atteinte par curseur.
+        has_next = has_more if not reverse else True
+        has_previous = bool(position) if not reverse else has_more
+
+        self.next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        """Corps de la réponse paginée (réutilisable par les actions personnalisées)"""
+        if not self.keyset_mode:
+            return OrderedDict([
+                ('count', self.page.paginator.count),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ])
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self._cursor_link(self.next_cursor)
+        payload['previous'] = self._cursor_link(self.previous_cursor)
+        payload['next_cursor'] = self.next_cursor
+        payload['previous_cursor'] = self.previous_cursor
+        payload['results'] = data
+        return payload
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['next_cursor'] = {'type': 'string', 'nullable': True}
+        response_schema['properties']['previous_cursor'] = {'type': 'string', 'nullable': True}
+        return response_schema
+
+    # ------------------------------------------------------------------
+    # Curseurs
+    # ------------------------------------------------------------------
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field)
+        payload = {
+            'v': value.isoformat() if hasattr(value, 'isoformat') else value,
+            'pk': str(instance.pk),
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(payload, dict) or 'v' not in payload or 'pk' not in payload:
+                raise ValueError
+            return payload
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Curseur invalide.')
+
+    def _parse_value(self, value):
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            if parsed is not None:
+                return parsed
+        return value
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.order_by().count()
+        if mode == 'approximate':
+            return approximate_count(queryset)
+        return None
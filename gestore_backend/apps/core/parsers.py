@@ -0,0 +1,36 @@
+"""
+Parsers pour GESTORE
+Corps de requête MessagePack / CBOR envoyés par les postes desktop
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import MSGPACK_DECIMAL_EXT, cbor2, msgpack, unpack_decimal
+
+
+class MessagePackParser(BaseParser):
+    """Parser MessagePack (Content-Type: application/msgpack)"""
+    media_type = 'application/msgpack'
+
+    @staticmethod
+    def _ext_hook(code, data):
+        if code == MSGPACK_DECIMAL_EXT:
+            return unpack_decimal(data)
+        return msgpack.ExtType(code, data)
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), ext_hook=self._ext_hook, raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f"Erreur d'analyse MessagePack - {exc}")
+
+
+class CBORParser(BaseParser):
+    """Parser CBOR (Content-Type: application/cbor)"""
+    media_type = 'application/cbor'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as exc:
+            raise ParseError(f"Erreur d'analyse CBOR - {exc}")
@@ -5,6 +5,8 @@ Système de permissions granulaires basé sur les rôles
 from rest_framework import permissions
 from django.contrib.auth import get_user_model
 
+from apps.authentication.authz import get_authorization
+
 User = get_user_model()
 
 
@@ -30,6 +32,8 @@ class BaseGestorePermission(permissions.BasePermission):
         if hasattr(request.user, 'is_account_locked') and request.user.is_account_locked():
             return False
         
+        # Charger rôle, permissions et magasins une fois (cache partagé)
+        get_authorization(request.user)
         return True
     
     def has_object_permission(self, request, view, obj):
@@ -0,0 +1,209 @@
+"""
+Profilage à la demande - GESTORE
+Profil d'exécution complet (cProfile, ou pyinstrument si installé et choisi)
+et liste des requêtes SQL de requêtes API réelles, enregistrés dans
+RequestProfile pour téléchargement depuis l'administration.
+
+Déclenchement :
+- En-tête X-Gestore-Profile: <PROFILING_TOKEN> : profile cette requête
+- Armement d'une route (ProfilingView, /api/profiling/) : profile les N
+  prochaines requêtes vers cette route, quel que soit l'utilisateur
+
+Désarmé, le coût par requête se limite à une lecture d'en-tête et à un test
+d'appartenance : l'état d'armement (cache partagé) n'est relu qu'une fois
+toutes les PROFILING_POLL_SECONDS par processus.
+"""
+import cProfile
+import hmac
+import io
+import marshal
+import pstats
+import threading
+import time
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+
+from .conf import gestore_setting
+
+try:
+    from pyinstrument import Profiler as StatisticalProfiler
+except ImportError:  # pragma: no cover
+    StatisticalProfiler = None
+
+PROFILE_HEADER = 'HTTP_X_GESTORE_PROFILE'
+
+ARMED_KEY = 'profiling:armed'
+
+_armed = {'routes': frozenset(), 'checked_at': None}
+_armed_lock = threading.Lock()
+
+# Un seul profil à la fois par processus (cProfile ne s'imbrique pas)
+_profile_lock = threading.Lock()
+
+
+def _remaining_key(route):
+    return f'profiling:remaining:{route}'
+
+
+# ========================
+# ARMEMENT
+# ========================
+
+def arm(route, count):
+    """Profile les count prochaines requêtes vers route (nom de vue)"""
+    timeout = gestore_setting('PROFILING_ARM_SECONDS', 3600)
+    cache.set(_remaining_key(route), count, timeout=timeout)
+    routes = cache.get(ARMED_KEY) or {}
+    routes[route] = time.time() + timeout
+    cache.set(ARMED_KEY, routes, timeout=timeout)
+    _armed['checked_at'] = None
+
+
+def disarm(route=None):
+    """Désarme une route, ou toutes"""
+    routes = cache.get(ARMED_KEY) or {}
+    for name in ([route] if route else list(routes)):
+        routes.pop(name, None)
+        cache.delete(_remaining_key(name))
+    cache.set(ARMED_KEY, routes, timeout=gestore_setting('PROFILING_ARM_SECONDS', 3600))
+    _armed['checked_at'] = None
+
+
+def armed_routes():
+    """Routes armées et nombre de requêtes restant à profiler"""
+    now = time.time()
+    routes = [name for name, expires in (cache.get(ARMED_KEY) or {}).items() if expires > now]
+    remaining = cache.get_many([_remaining_key(name) for name in routes])
+    return {name: remaining.get(_remaining_key(name), 0) for name in routes}
+
+
+def _armed_snapshot():
+    """Routes armées vues par ce processus (relues au plus toutes les PROFILING_POLL_SECONDS)"""
+    checked_at = _armed['checked_at']
+    now = time.monotonic()
+    if checked_at is not None and now - checked_at < gestore_setting('PROFILING_POLL_SECONDS', 5):
+        return _armed['routes']
+    with _armed_lock:
+        wall = time.time()
+        _armed['routes'] = frozenset(
+            name for name, expires in (cache.get(ARMED_KEY) or {}).items() if expires > wall
+        )
+        _armed['checked_at'] = now
+    return _armed['routes']
+
+
+def _claim(route):
+    """Réserve une des requêtes à profiler de la route (partagé entre processus)"""
+    try:
+        remaining = cache.decr(_remaining_key(route))
+    except ValueError:
+        return False  # Armement expiré ou consommé
+    if remaining <= 0:
+        disarm(route)
+    return remaining >= 0
+
+
+def trigger_for(request, route):
+    """Motif de profilage de la requête ('header', 'armed') ou None"""
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        expected = gestore_setting('PROFILING_TOKEN', '')
+        if expected and hmac.compare_digest(token, expected):
+            return 'header'
+    if route in _armed_snapshot() and _claim(route):
+        return 'armed'
+    return None
+
+
+# ========================
+# CAPTURE
+# ========================
+
+def profile_call(request, route, trigger, call):
+    """
+    Exécute call() (la vue, rendu compris) sous profilage et enregistre le
+    RequestProfile ; l'identifiant est renvoyé dans l'en-tête X-Gestore-Profile-Id.
+    Si un autre profil est en cours dans le processus, call() est exécuté
+    sans profilage.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return call()
+    try:
+        return _profile_call(request, route, trigger, call)
+    finally:
+        _profile_lock.release()
+
+
+def _profile_call(request, route, trigger, call):
+    from .models import RequestProfile
+
+    engine = gestore_setting('PROFILING_ENGINE', 'cprofile')
+    if engine == 'pyinstrument' and StatisticalProfiler is not None:
+        profiler = StatisticalProfiler()
+        start_profiler, stop_profiler = profiler.start, profiler.stop
+    else:
+        engine = 'cprofile'
+        profiler = cProfile.Profile()
+        start_profiler, stop_profiler = profiler.enable, profiler.disable
+
+    max_queries = gestore_setting('PROFILING_MAX_QUERIES', 500)
+    queries = []
+    totals = {'count': 0, 'seconds': 0.0}
+
+    def record_query(execute, sql, params, many, context):
+        query_start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - query_start
+            totals['count'] += 1
+            totals['seconds'] += elapsed
+            if len(queries) < max_queries:
+                queries.append({'sql': sql, 'ms': round(elapsed * 1000, 3)})
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record_query))
+        start_profiler()
+        try:
+            response = call()
+            # Rendu DRF inclus dans le profil (render() est idempotent)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        finally:
+            stop_profiler()
+    duration = time.perf_counter() - start
+
+    if engine == 'cprofile':
+        profiler.create_stats()
+        data = marshal.dumps(profiler.stats)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(
+            gestore_setting('PROFILING_SUMMARY_LINES', 40)
+        )
+        summary = output.getvalue()
+    else:
+        data = profiler.output_html().encode('utf-8')
+        summary = profiler.output_text(unicode=True, color=False)
+
+    user = getattr(request, 'user', None)
+    profile = RequestProfile.objects.create(
+        route=route,
+        method=request.method,
+        path=request.get_full_path(),
+        status_code=response.status_code,
+        user=user if getattr(user, 'is_authenticated', False) else None,
+        trigger=trigger,
+        engine=engine,
+        duration_ms=round(duration * 1000, 3),
+        query_count=totals['count'],
+        query_time_ms=round(totals['seconds'] * 1000, 3),
+        queries=queries,
+        summary=summary,
+        data=data
+    )
+    response['X-Gestore-Profile-Id'] = str(profile.id)
+    return response
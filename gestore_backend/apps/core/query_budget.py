@@ -0,0 +1,102 @@
+"""
+Budgets de requêtes SQL des endpoints - GESTORE
+Découverte des routes GET des ViewSets enregistrés (list, retrieve et
+actions personnalisées) et budgets déclarés dans benchmarks/query_budgets.json :
+
+    {
+      "default": 15,
+      "routes": {
+        "inventory:article-list": 6,
+        "sales:pos-search-article": {"budget": 5, "params": {"q": "Savon"}},
+        "inventory:stock-valuation": {"budget": 8, "grows": "raison"},
+        "sales:sale-receipt": {"skip": "raison"}
+      }
+    }
+
+- budget : nombre maximal de requêtes (défaut : "default")
+- params : paramètres de la requête ("{store_id}" : magasin de référence)
+- grows : croissance avec le volume tolérée (N+1 connu, raison obligatoire)
+- skip : route non exercée (raison obligatoire)
+
+Voir QueryBudgetTest (apps/core/tests.py).
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+
+@dataclass
+class Route:
+    name: str
+    viewset: type
+    action: str
+    detail: bool
+
+
+def budgets_path():
+    return Path(settings.BASE_DIR) / 'benchmarks' / 'query_budgets.json'
+
+
+def load_budgets(path=None):
+    with Path(path or budgets_path()).open(encoding='utf-8') as handle:
+        budgets = json.load(handle)
+    return budgets.get('default'), budgets.get('routes', {})
+
+
+def route_budget(budgets, name):
+    """Entrée du fichier de budgets pour la route (dict normalisé)"""
+    default, routes = budgets
+    entry = routes.get(name, {})
+    if isinstance(entry, int):
+        entry = {'budget': entry}
+    return {'budget': default, **entry}
+
+
+# ========================
+# DÉCOUVERTE
+# ========================
+
+def discover_routes(patterns=None, namespace=''):
+    """Routes GET des ViewSets (une par nom d'URL, suffixes de format exclus)"""
+    routes = {}
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            child_namespace = namespace
+            if pattern.namespace:
+                child_namespace = f'{namespace}{pattern.namespace}:'
+            for route in discover_routes(pattern.url_patterns, child_namespace):
+                routes.setdefault(route.name, route)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            viewset = getattr(pattern.callback, 'cls', None)
+            actions = getattr(pattern.callback, 'actions', None)
+            if not viewset or not actions or 'get' not in actions:
+                continue
+            name = f'{namespace}{pattern.name}'
+            routes.setdefault(name, Route(
+                name=name,
+                viewset=viewset,
+                action=actions['get'],
+                detail=bool(pattern.callback.initkwargs.get('detail'))
+            ))
+    return list(routes.values())
+
+
+def route_url(route):
+    """
+    URL de la route ; pour une route de détail, sur le premier objet (par
+    clé primaire) du queryset du ViewSet. None s'il n'y a aucun objet.
+    """
+    if not route.detail:
+        return reverse(route.name)
+    queryset = getattr(route.viewset, 'queryset', None)
+    if queryset is None:
+        return None
+    lookup_field = route.viewset.lookup_field
+    value = queryset.model._default_manager.order_by('pk').values_list(lookup_field, flat=True).first()
+    if value is None:
+        return None
+    lookup_kwarg = route.viewset.lookup_url_kwarg or lookup_field
+    return reverse(route.name, kwargs={lookup_kwarg: value})
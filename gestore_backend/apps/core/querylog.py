@@ -0,0 +1,133 @@
+"""
+Journal des requêtes lentes - GESTORE
+Wrapper d'exécution installé sur chaque connexion (connection.execute_wrappers,
+voir CoreConfig.ready) : toute requête SQL (SELECT, WITH, INSERT, UPDATE,
+DELETE) dépassant QUERYLOG_SLOW_MS est enregistrée dans SlowQuery (écriture
+différée) avec son empreinte.
+
+- Empreinte : requête normalisée (littéraux, paramètres et listes IN /
+  VALUES remplacés) ; les exécutions d'une même forme de requête sont
+  agrégées par empreinte (commande slow_queries)
+- Plan : EXPLAIN de la requête (EXPLAIN QUERY PLAN sur SQLite ; ANALYZE en
+  option sur PostgreSQL, requêtes SELECT uniquement), au plus une fois par
+  empreinte toutes les QUERYLOG_EXPLAIN_INTERVAL secondes par processus
+
+Sous le seuil, le coût se limite à la mesure du temps d'exécution.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .conf import gestore_setting
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?|\$\d+')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+# Instructions journalisées (et dont le plan peut être demandé) ; le
+# contrôle de transaction (SAVEPOINT, COMMIT...) et le DDL ne le sont pas
+LOGGED_STATEMENTS = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def normalize(sql):
+    """Forme canonique de la requête : valeurs remplacées par ?"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub('VALUES (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:16]
+
+
+class SlowQueryLog:
+    """Wrapper d'exécution SQL (voir connection.execute_wrapper)"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._explained = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, 'active', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= gestore_setting('QUERYLOG_SLOW_MS', 200):
+            self._local.active = True
+            try:
+                self._record(context['connection'], sql, params, many, elapsed_ms)
+            except Exception:
+                logger.exception("Requête lente non enregistrée")
+            finally:
+                self._local.active = False
+        return result
+
+    def _record(self, connection, sql, params, many, elapsed_ms):
+        from .models import SlowQuery
+        from .write_behind import write_behind
+
+        statement = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+        # Les écritures du journal lui-même ne sont pas journalisées
+        if statement not in LOGGED_STATEMENTS or SlowQuery._meta.db_table in sql:
+            return
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        plan = '' if many else self._explain(connection, key, statement, sql, params)
+        write_behind.create(SlowQuery(
+            fingerprint=key,
+            sql=normalized,
+            duration_ms=round(elapsed_ms, 3),
+            executed_at=timezone.now(),
+            vendor=connection.vendor,
+            plan=plan
+        ))
+
+    def _explain(self, connection, key, statement, sql, params):
+        """Plan d'exécution, au plus une fois par empreinte et par intervalle"""
+        now = time.monotonic()
+        last = self._explained.get(key)
+        if last is not None and now - last < gestore_setting('QUERYLOG_EXPLAIN_INTERVAL', 300):
+            return ''
+        if len(self._explained) >= 10000:
+            self._explained.clear()
+        self._explained[key] = now
+
+        options = {}
+        if (connection.vendor == 'postgresql' and statement in ('SELECT', 'WITH')
+                and gestore_setting('QUERYLOG_EXPLAIN_ANALYZE', False)):
+            options['analyze'] = True
+        prefix = connection.ops.explain_query_prefix(**options)
+        # Point de sauvegarde : un EXPLAIN refusé n'interrompt pas la transaction en cours
+        savepoint = transaction.atomic(using=connection.alias) if connection.in_atomic_block else nullcontext()
+        try:
+            with savepoint:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}', params)
+                    rows = cursor.fetchall()
+        except DatabaseError as exc:
+            return f'EXPLAIN impossible : {exc}'
+        return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install(sender, connection, **kwargs):
+    """Signal connection_created : journal des requêtes lentes sur la connexion"""
+    if gestore_setting('QUERYLOG_ENABLED', True) and slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_log)
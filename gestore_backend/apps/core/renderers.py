@@ -0,0 +1,182 @@
+"""
+Renderers pour GESTORE
+- Rendu JSON en flux pour les exports complets
+- Formats binaires MessagePack / CBOR pour les postes desktop (liaisons lentes)
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+# Dépendances optionnelles : les renderers ne sont enregistrés que si elles
+# sont installées (voir REST_FRAMEWORK dans settings)
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+# Type d'extension MessagePack des décimaux
+MSGPACK_DECIMAL_EXT = 1
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON incrémental (?format=jsonstream)
+
+    Utilisé par stream_json_response() : le tableau est encodé ligne par ligne
+    à partir de queryset.iterator(), la mémoire de la réponse reste bornée
+    quelle que soit la taille de la table.
+    Sur une vue classique, se comporte comme JSONRenderer.
+    """
+    format = 'jsonstream'
+    chunk_size = 500
+
+    def iter_render(self, queryset, serializer_class, context=None):
+        """Génère le tableau JSON par morceaux de chunk_size objets"""
+        yield b'['
+        first = True
+        batch = []
+        for instance in queryset.iterator(chunk_size=self.chunk_size):
+            batch.append(instance)
+            if len(batch) >= self.chunk_size:
+                yield self._encode_batch(batch, serializer_class, context, first)
+                first = False
+                batch = []
+        if batch:
+            yield self._encode_batch(batch, serializer_class, context, first)
+        yield b']'
+
+    def _encode_batch(self, batch, serializer_class, context, first):
+        rows = serializer_class(batch, many=True, context=context).data
+        encoded = ','.join(
+            json.dumps(row, cls=encoders.JSONEncoder, ensure_ascii=self.ensure_ascii,
+                       separators=(',', ':'))
+            for row in rows
+        )
+        return (encoded if first else ',' + encoded).encode('utf-8')
+
+
+def stream_json_response(queryset, serializer_class, context=None):
+    """Réponse HTTP en flux contenant tout le queryset sérialisé"""
+    renderer = StreamingJSONRenderer()
+    return StreamingHttpResponse(
+        renderer.iter_render(queryset, serializer_class, context),
+        content_type='application/json'
+    )
+
+
+# ========================
+# FORMATS BINAIRES
+# ========================
+
+def pack_decimal(value):
+    """
+    Encodage exact et compact d'un Decimal : 1 octet d'exposant (signé)
+    suivi de la mantisse entière signée en big-endian.
+    15.50 -> exposant -2, mantisse 1550 -> 3 octets.
+    Les valeurs hors de cette forme (NaN, exposant extrême) sont
+    transmises en texte, préfixées par 0x80.
+    """
+    sign, digits, exponent = value.as_tuple()
+    if not isinstance(exponent, int) or not -127 <= exponent <= 127:
+        return b'\x80' + str(value).encode('ascii')
+    mantissa = int(''.join(map(str, digits)) or '0')
+    if sign:
+        mantissa = -mantissa
+    length = (mantissa.bit_length() + 8) // 8
+    return exponent.to_bytes(1, 'big', signed=True) + mantissa.to_bytes(length, 'big', signed=True)
+
+
+def unpack_decimal(data):
+    """Inverse de pack_decimal"""
+    if data[:1] == b'\x80':
+        return Decimal(data[1:].decode('ascii'))
+    exponent = int.from_bytes(data[:1], 'big', signed=True)
+    mantissa = int.from_bytes(data[1:], 'big', signed=True)
+    # Construction par tuple : exacte quelle que soit la précision du contexte
+    return Decimal((int(mantissa < 0), tuple(int(d) for d in str(abs(mantissa))), exponent))
+
+
+def _to_primitive(obj):
+    """Types non natifs des formats binaires (mêmes conventions que le JSON)"""
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, (uuid.UUID, Promise)):
+        return str(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Type non sérialisable : {type(obj).__name__}")
+
+
+class BinaryRenderer(BaseRenderer):
+    """
+    Base des renderers binaires
+    Les DecimalField sont rendus en Decimal natif (voir BaseModelSerializer),
+    puis encodés exactement par le format au lieu d'une chaîne.
+    """
+    charset = None
+    render_style = 'binary'
+    native_decimals = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.encode(data)
+
+    def encode(self, data):  # pragma: no cover
+        raise NotImplementedError
+
+
+class MessagePackRenderer(BinaryRenderer):
+    """
+    Renderer MessagePack (Accept: application/msgpack ou ?format=msgpack)
+    Décimaux : type d'extension MSGPACK_DECIMAL_EXT (voir pack_decimal)
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(MSGPACK_DECIMAL_EXT, pack_decimal(obj))
+        return _to_primitive(obj)
+
+    def encode(self, data):
+        return msgpack.packb(data, default=self._default, use_bin_type=True)
+
+
+class CBORRenderer(BinaryRenderer):
+    """
+    Renderer CBOR (Accept: application/cbor ou ?format=cbor)
+    Décimaux : fraction décimale standard (tag 4, RFC 8949), gérée nativement
+    """
+    media_type = 'application/cbor'
+    format = 'cbor'
+
+    @staticmethod
+    def _default(encoder, obj):
+        encoder.encode(_to_primitive(obj))
+
+    def encode(self, data):
+        # Les dates brutes utilisent les tags standard CBOR (les serializers
+        # rendent déjà les leurs en chaînes ISO)
+        return cbor2.dumps(data, default=self._default, timezone=datetime.timezone.utc)
@@ -2,7 +2,60 @@
 Serializers de base pour l'application core - GESTORE
 Ces serializers abstraits sont utilisés par toutes les autres applications
 """
+import time
+from collections.abc import Mapping
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.translation import get_language
 from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, is_simple_callable
+from rest_framework.relations import PKOnlyObject, RelatedField, ManyRelatedField
+
+from .metrics import current_sample
+
+# Paramètres de requête des listes allégées (?fields=id,name&expand=category)
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+# Métadonnées `_meta` calculées une seule fois par classe de modèle (et par langue)
+_MODEL_META_CACHE = {}
+
+
+def get_model_meta(model):
+    """Retourne le dictionnaire `_meta` exposé au frontend pour un modèle"""
+    key = (model, get_language())
+    meta = _MODEL_META_CACHE.get(key)
+    if meta is None:
+        opts = model._meta
+        meta = {
+            'model_name': opts.model_name,
+            'verbose_name': str(opts.verbose_name),
+            'app_label': opts.app_label,
+        }
+        _MODEL_META_CACHE[key] = meta
+    return meta
+
+
+def parse_field_list(value):
+    """Convertit 'id, name,price' en ensemble de noms (None si absent)"""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def parse_requested_fields(request):
+    """
+    Retourne (fields, expand) demandés par une requête de lecture.
+    fields vaut None quand la représentation complète est attendue.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, set()
+    params = request.query_params
+    return (
+        parse_field_list(params.get(FIELDS_QUERY_PARAM)),
+        parse_field_list(params.get(EXPAND_QUERY_PARAM)) or set(),
+    )
 
 
 class TimestampedSerializer(serializers.ModelSerializer):
@@ -77,24 +130,203 @@ class BaseModelSerializer(UUIDSerializer, TimestampedSerializer,
     Serializer de base principal combinant tous les comportements
     Utilisé par la plupart des serializers métier
     """
+    # Chemin de lecture rapide (listes volumineuses) : voir _fast_representation
+    fast_read = False
+    
+    # Champs ajoutés uniquement sur ?expand= : {nom: (classe de serializer, kwargs)}
+    expandable_fields = {}
+    
     class Meta:
         abstract = True
+    
+    # ------------------------------------------------------------------
+    # Listes allégées (?fields= / ?expand=)
+    # ------------------------------------------------------------------
+    
+    def _is_response_root(self):
+        """Vrai pour le serializer racine de la réponse (ou l'enfant d'une liste racine)"""
+        parent = self.parent
+        if parent is None:
+            return True
+        return isinstance(parent, serializers.ListSerializer) and parent.parent is None
+    
+    def get_requested_fields(self):
+        """
+        (fields, expand) applicables à ce serializer.
+        Le contexte peut les imposer (clés 'fields' / 'expand'), sinon ils
+        viennent des paramètres de la requête. Seul le serializer racine
+        est concerné : les serializers imbriqués restent complets.
+        """
+        cached = self.__dict__.get('_requested_fields')
+        if cached is not None:
+            return cached
+        
+        if not self._is_response_root():
+            requested = (None, set())
+        elif 'fields' in self.context or 'expand' in self.context:
+            fields = self.context.get('fields')
+            requested = (
+                set(fields) if fields is not None else None,
+                set(self.context.get('expand') or ()),
+            )
+        else:
+            requested = parse_requested_fields(self.context.get('request'))
+        self._requested_fields = requested
+        return requested
+    
+    def get_fields(self):
+        """
+        Élague les champs non demandés avant toute évaluation et ajoute
+        les champs étendus demandés
+        """
+        fields = super().get_fields()
+        requested, expand = self.get_requested_fields()
+        
+        for name in expand:
+            if name in self.expandable_fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+        
+        if requested is not None:
+            keep = requested | expand
+            for name in list(fields):
+                if name not in keep and not fields[name].write_only:
+                    fields.pop(name)
+        
+        # Formats binaires : décimaux natifs (encodés exactement) plutôt qu'en chaînes
+        renderer = getattr(self.context.get('request'), 'accepted_renderer', None)
+        if getattr(renderer, 'native_decimals', False):
+            for field in fields.values():
+                if isinstance(field, serializers.DecimalField):
+                    field.coerce_to_string = False
+        return fields
+    
+    def _include_model_meta(self):
+        requested = self.get_requested_fields()[0]
+        return requested is None or '_meta' in requested
         
     def to_representation(self, instance):
         """
         Personnalise la représentation pour le frontend
+        Le temps de sérialisation des objets racine de la réponse est
+        comptabilisé dans les métriques de la requête (apps.core.metrics).
         """
-        data = super().to_representation(instance)
+        sample = current_sample()
+        if sample is None or not self._is_response_root():
+            return self._represent(instance)
+        start = time.perf_counter()
+        try:
+            return self._represent(instance)
+        finally:
+            sample.serializer_time += time.perf_counter() - start
+    
+    def _represent(self, instance):
+        if self.fast_read and not isinstance(instance, Mapping):
+            data = self._fast_representation(instance)
+        else:
+            data = super().to_representation(instance)
         
         # Ajouter des métadonnées utiles pour le frontend
-        if hasattr(instance, '_meta'):
-            data['_meta'] = {
-                'model_name': instance._meta.model_name,
-                'verbose_name': str(instance._meta.verbose_name),
-                'app_label': instance._meta.app_label,
-            }
+        if hasattr(instance, '_meta') and self._include_model_meta():
+            data['_meta'] = dict(get_model_meta(instance.__class__))
         
         return data
+    
+    # Politiques en cas d'attribut absent (mêmes règles que Field.get_attribute)
+    _MISSING_DEFAULT, _MISSING_NULL, _MISSING_SKIP, _MISSING_RAISE = range(4)
+    
+    def _compile_read_plan(self):
+        """
+        Précompile, une fois par instance de serializer, l'accès à chaque champ.
+        Les champs simples sont lus par une chaîne d'attributs et une fonction
+        de conversion ; les relations, serializers imbriqués et sources '*'
+        passent par le chemin DRF standard.
+        """
+        plan = []
+        for field in self._readable_fields:
+            if isinstance(field, serializers.SerializerMethodField):
+                plan.append((field.field_name, 'method', getattr(self, field.method_name), None))
+                continue
+            
+            if (field.source == '*' or
+                    isinstance(field, (RelatedField, ManyRelatedField, serializers.BaseSerializer))):
+                plan.append((field.field_name, 'generic', field, None))
+                continue
+            
+            if type(field) is serializers.CharField:
+                convert = str
+            elif type(field) is serializers.IntegerField:
+                convert = int
+            else:
+                convert = field.to_representation
+            
+            if field.default is not empty:
+                missing = self._MISSING_DEFAULT
+            elif field.allow_null:
+                missing = self._MISSING_NULL
+            elif not field.required:
+                missing = self._MISSING_SKIP
+            else:
+                missing = self._MISSING_RAISE
+            
+            plan.append((field.field_name, 'attrs', (tuple(field.source_attrs), convert, missing), field))
+        return plan
+    
+    def _fast_representation(self, instance):
+        """
+        Équivalent de Serializer.to_representation sans le surcoût générique
+        de DRF (sortie identique octet pour octet)
+        """
+        plan = self.__dict__.get('_read_plan')
+        if plan is None:
+            plan = self._read_plan = self._compile_read_plan()
+        
+        ret = {}
+        for name, kind, spec, field in plan:
+            if kind == 'method':
+                ret[name] = spec(instance)
+                continue
+            
+            if kind == 'generic':
+                try:
+                    attribute = spec.get_attribute(instance)
+                except SkipField:
+                    continue
+                check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                ret[name] = None if check_for_none is None else spec.to_representation(attribute)
+                continue
+            
+            attrs, convert, missing = spec
+            value = instance
+            try:
+                for attr in attrs:
+                    try:
+                        value = value[attr] if isinstance(value, Mapping) else getattr(value, attr)
+                    except ObjectDoesNotExist:
+                        value = None
+                        break
+                    if callable(value) and is_simple_callable(value):
+                        try:
+                            value = value()
+                        except (AttributeError, KeyError) as exc:
+                            raise ValueError(
+                                f'Exception raised in callable attribute "{attr}"; original exception was: {exc}'
+                            )
+            except (KeyError, AttributeError):
+                if missing == self._MISSING_DEFAULT:
+                    value = field.get_default()
+                elif missing == self._MISSING_NULL:
+                    value = None
+                elif missing == self._MISSING_SKIP:
+                    continue
+                else:
+                    # Laisser DRF produire son message d'erreur détaillé
+                    field.get_attribute(instance)
+                    raise
+            
+            ret[name] = None if value is None else convert(value)
+        
+        return ret
 
 
 class AuditableSerializer(BaseModelSerializer):
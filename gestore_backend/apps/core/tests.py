@@ -1,3 +1,611 @@
-from django.test import TestCase
+import os
+import queue
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.models import Role, UserAuditLog, UserProfile
+from apps.inventory.models import Brand, Location
+
+from . import profiling
+from .metrics import Histogram, registry
+from .models import RequestProfile, SlowQuery
+from .querylog import fingerprint, normalize, slow_query_log
+from .write_behind import WriteBehindBuffer
+
+User = get_user_model()
+
+SEQUENTIAL = {**settings.GESTORE_SETTINGS, 'BATCH_MAX_WORKERS': 1}
+
+
+class BatchRequestTest(APITestCase):
+    """Tests des appels groupés (/api/batch/)"""
+    
+    def setUp(self):
+        self.role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.user = User.objects.create_user(
+            username='admin', password='admin123', role=self.role, is_superuser=True
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('batch')
+        Brand.objects.create(name='Marque A')
+    
+    def test_parallel_reads(self):
+        """Test lectures exécutées en parallèle, statut propre à chaque sous-requête"""
+        response = self.client.post(self.url, {'requests': [
+            {'id': 'health', 'path': '/api/health/'},
+            {'id': 'sync', 'path': '/api/sync/health/'},
+            {'id': 'missing', 'path': '/api/nowhere/'},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {r['id']: r for r in response.data['responses']}
+        self.assertEqual(results['health']['status'], 200)
+        self.assertEqual(results['health']['body']['status'], 'healthy')
+        self.assertEqual(results['sync']['body']['app'], 'sync')
+        self.assertEqual(results['missing']['status'], 404)
+    
+    @override_settings(GESTORE_SETTINGS=SEQUENTIAL)
+    def test_shared_user_and_writes_in_order(self):
+        """Test utilisateur partagé sans nouvelle authentification, écriture puis lecture"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'requests': [
+                {'id': 'create', 'method': 'POST', 'path': '/api/inventory/brands/', 'body': {'name': 'Marque B'}},
+                {'id': 'list', 'path': '/api/inventory/brands/', 'params': {'search': 'Marque'}},
+            ]}, format='json')
+        
+        create, listing = response.data['responses']
+        self.assertEqual(create['status'], 201)
+        self.assertEqual(listing['status'], 200)
+        self.assertEqual(listing['body']['count'], 2)
+        self.assertIn('ETag', listing['headers'])
+        user_table = f'FROM "{User._meta.db_table}"'
+        user_loads = [q for q in queries.captured_queries if user_table in q['sql']]
+        self.assertEqual(len(user_loads), 1)
+    
+    @override_settings(GESTORE_SETTINGS=SEQUENTIAL)
+    def test_async_and_streaming_refused_per_item(self):
+        """Test vue asynchrone (SSE) et réponse en flux refusées sans faire échouer l'appel"""
+        location = Location.objects.create(name='Magasin', code='MAG01', location_type='store')
+        response = self.client.post(self.url, {'requests': [
+            {'id': 'health', 'path': '/api/health/'},
+            {'id': 'events', 'path': reverse('sync:store-events')},
+            {
+                'id': 'export', 'path': reverse('inventory:location-stocks', args=[location.id]),
+                'params': {'format': 'jsonstream'}
+            },
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {r['id']: r for r in response.data['responses']}
+        self.assertEqual(results['health']['status'], 200)
+        self.assertEqual(results['events']['status'], 400)
+        self.assertEqual(results['export']['status'], 400)
+        self.assertIn('flux', results['export']['body']['detail'])
+    
+    def test_django_exceptions_and_language(self):
+        """Test Http404 et PermissionDenied d'une vue Django simple ; langue transmise aux threads"""
+        from django.core.exceptions import PermissionDenied
+        from django.http import Http404, JsonResponse
+        from django.urls import ResolverMatch
+        from django.utils import translation
+        from .batch import run_batch
+        
+        def raising(exception):
+            def view(request):
+                raise exception
+            return view
+        
+        views = {
+            '/api/absent/': raising(Http404()),
+            '/api/interdit/': raising(PermissionDenied()),
+            '/api/langue/': lambda request: JsonResponse({'language': translation.get_language()}),
+        }
+        request = mock.Mock(META={}, user=self.user, auth=None)
+        sub_requests = [
+            {'method': 'GET', 'path': path, 'params': {}, 'headers': {}} for path in [*views, '/api/langue/']
+        ]
+        with mock.patch('apps.core.batch.resolve', lambda path: ResolverMatch(views[path], (), {})):
+            with translation.override('en'):
+                results = run_batch(request, sub_requests)
+        
+        self.assertEqual([r['status'] for r in results], [404, 403, 200, 200])
+        self.assertEqual([r['body']['language'] for r in results[2:]], ['en', 'en'])
+    
+    def test_validation(self):
+        """Test appels imbriqués et routes hors API refusés, authentification requise"""
+        response = self.client.post(self.url, {'requests': [{'path': '/api/batch/'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(self.url, {'requests': [{'path': '/admin/'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.credentials()
+        response = self.client.post(self.url, {'requests': [{'path': '/api/health/'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class WriteBehindTest(TestCase):
+    """Tests de la file d'écritures différées (lots, débordement, reprise)"""
+    
+    def setUp(self):
+        import tempfile
+        
+        self.spool_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(GESTORE_SETTINGS={
+            **settings.GESTORE_SETTINGS,
+            'WRITE_BEHIND_QUEUE_SIZE': 2,
+            'WRITE_BEHIND_BATCH_SIZE': 3,
+            'WRITE_BEHIND_INTERVAL_MS': 10,
+            'WRITE_BEHIND_SPOOL_DIR': self.spool_dir,
+        })
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='auditeur', password='pass123')
+        self.buffer = WriteBehindBuffer('test')
+        # Pas de thread de fond : la base de test n'est visible que de ce thread
+        patcher = mock.patch.object(self.buffer, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        import atexit
+        import shutil
+        
+        atexit.unregister(self.buffer.shutdown)
+        self.settings_override.disable()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+    
+    def _entry(self, action='update'):
+        return UserAuditLog(user=self.user, action=action, ip_address='127.0.0.1', timestamp=timezone.now())
+    
+    def test_batch_size_limit(self):
+        """Un lot ne dépasse pas WRITE_BEHIND_BATCH_SIZE opérations"""
+        self.buffer.queue = queue.Queue()
+        for _ in range(5):
+            self.buffer.queue.put(('create', self._entry()))
+        self.assertEqual(len(self.buffer._next_batch()), 3)
+        self.assertEqual(len(self.buffer._next_batch()), 2)
+    
+    def test_overflow_spooled_and_replayed(self):
+        """File pleine : l'appelant ne bloque pas, l'opération est rejouée plus tard"""
+        for _ in range(3):
+            self.buffer._enqueue(('create', self._entry('export')))
+        self.assertEqual(self.buffer.queue.qsize(), 2)
+        self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+        
+        self.buffer._replay_spool()
+        self.assertEqual(UserAuditLog.objects.filter(action='export').count(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+    
+    def test_shutdown_writes_pending(self):
+        """Arrêt du processus : la file est écrite en un lot"""
+        self.buffer._enqueue(('create', self._entry('backup')))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.update(UserProfile, self.user.pk, by='user_id', increments={'login_count': 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.buffer.shutdown()
+        self.assertEqual(UserAuditLog.objects.filter(action='backup').count(), 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).login_count, 2)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+    
+    def test_audit_log_api(self):
+        """audit_log : entrée différée jusqu'au commit, puis écrite"""
+        from apps.authentication.audit import audit_log
+        
+        with override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'WRITE_BEHIND_ENABLED': False}):
+            with self.captureOnCommitCallbacks(execute=True):
+                audit_log(self.user, 'print', instance=self.user, changes={'copies': 2})
+                self.assertFalse(UserAuditLog.objects.filter(action='print').exists())
+        entry = UserAuditLog.objects.get(action='print')
+        self.assertEqual(entry.model_name, 'User')
+        self.assertEqual(entry.object_id, self.user.pk)
+        self.assertEqual(entry.changes, {'copies': 2})
+
+
+class RequestMetricsTest(APITestCase):
+    """Tests des métriques par route (middleware et /api/metrics/)"""
+    
+    def setUp(self):
+        registry.reset()
+        self.role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.user = User.objects.create_user(
+            username='admin', password='admin123', role=self.role, is_superuser=True
+        )
+        Brand.objects.create(name='Marque A')
+    
+    def test_histogram_quantiles(self):
+        """Quantiles à la précision relative des intervalles"""
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value / 1000)
+        histogram.record(0)
+        for q, expected in ((0.5, 0.5), (0.9, 0.9), (0.99, 0.99)):
+            self.assertAlmostEqual(histogram.quantile(q), expected, delta=expected / 16)
+        self.assertEqual(histogram.quantile(1), 1)
+        self.assertEqual(histogram.count, 1001)
+    
+    def test_request_recorded_per_route(self):
+        """Durée, requêtes SQL, sérialisation et taille enregistrées par route"""
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get('/api/inventory/brands/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        metrics = registry._routes[('inventory:brand-list', 'GET')]
+        self.assertEqual(metrics.duration.count, 1)
+        self.assertGreater(metrics.queries.total, 0)
+        self.assertGreater(metrics.db_time.total, 0)
+        self.assertGreater(metrics.serializer_time.total, 0)
+        self.assertEqual(metrics.size.total, len(response.content))
+        self.assertEqual(metrics.statuses[200], 1)
+    
+    @override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'METRICS_TOKEN': 'secret'})
+    def test_metrics_endpoint_protected(self):
+        """Exposition Prometheus réservée au collecteur (jeton) et au staff"""
+        self.client.get('/api/health/')
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer autre').status_code, 403)
+        
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE gestore_http_request_duration_seconds summary', body)
+        self.assertIn('gestore_http_request_duration_seconds_count{route="health-check",method="GET"} 1', body)
+        self.assertIn('gestore_http_responses_total{route="health-check",method="GET",status="200"} 1', body)
+        
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'PROFILING_TOKEN': 'profil'})
+class ProfilingTest(APITestCase):
+    """Tests du profilage à la demande"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        profiling.disarm()
+        self.user = User.objects.create_user(
+            username='admin', password='admin123', is_staff=True, is_superuser=True
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        Brand.objects.create(name='Marque A')
+    
+    def test_not_profiled_by_default(self):
+        """Sans en-tête ni armement, aucune capture"""
+        response = self.client.get('/api/inventory/brands/', HTTP_X_GESTORE_PROFILE='mauvais')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Gestore-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+    
+    def test_header_trigger(self):
+        """L'en-tête avec le jeton profile la requête : profil, SQL et résumé"""
+        import marshal
+        
+        response = self.client.get('/api/inventory/brands/', HTTP_X_GESTORE_PROFILE='profil')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = RequestProfile.objects.get(pk=response['X-Gestore-Profile-Id'])
+        self.assertEqual(profile.route, 'inventory:brand-list')
+        self.assertEqual(profile.trigger, 'header')
+        self.assertEqual(profile.user, self.user)
+        self.assertEqual(profile.query_count, len(profile.queries))
+        self.assertTrue(any('inventory_brand' in query['sql'] for query in profile.queries))
+        self.assertIn('cumulative', profile.summary)
+        self.assertTrue(marshal.loads(bytes(profile.data)))
+    
+    def test_armed_route(self):
+        """Route armée : les N prochaines requêtes sont profilées, puis désarmement"""
+        response = self.client.post(
+            reverse('profiling'), {'route': 'inventory:brand-list', 'count': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['armed'], {'inventory:brand-list': 2})
+        
+        self.client.get('/api/inventory/brands/')
+        self.client.get('/api/health/')
+        self.client.get('/api/inventory/brands/')
+        self.client.get('/api/inventory/brands/')
+        
+        self.assertEqual(RequestProfile.objects.filter(trigger='armed').count(), 2)
+        self.assertEqual(self.client.get(reverse('profiling')).data['armed'], {})
+    
+    def test_admin_download(self):
+        """Profil et SQL téléchargeables depuis l'administration"""
+        response = self.client.get('/api/inventory/brands/', HTTP_X_GESTORE_PROFILE='profil')
+        profile_id = response['X-Gestore-Profile-Id']
+        self.client.force_login(self.user)
+        
+        response = self.client.get(reverse('admin:core_requestprofile_download', args=[profile_id, 'sql']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        response = self.client.get(reverse('admin:core_requestprofile_change', args=[profile_id]))
+        self.assertEqual(response.status_code, 200)
+
+
+class SlowQueryLogTest(TestCase):
+    """Tests du journal des requêtes lentes"""
+    
+    def test_normalize_and_fingerprint(self):
+        """Valeurs, paramètres et listes IN n'entrent pas dans l'empreinte"""
+        first = normalize("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) LIMIT 21")
+        second = normalize("SELECT  *  FROM t WHERE a = 'y''z' AND b IN (%s) LIMIT 5")
+        self.assertEqual(first, 'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?')
+        self.assertEqual(fingerprint(first), fingerprint(second))
+        self.assertEqual(normalize('SELECT "T2"."col_1" FROM t'), 'SELECT "T2"."col_1" FROM t')
+    
+    @override_settings(GESTORE_SETTINGS={
+        **settings.GESTORE_SETTINGS, 'QUERYLOG_SLOW_MS': 0, 'WRITE_BEHIND_ENABLED': False
+    })
+    def test_slow_query_recorded_with_plan(self):
+        """Requête au-delà du seuil : enregistrée avec son plan, un EXPLAIN par empreinte"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        self.assertIn(slow_query_log, connection.execute_wrappers)
+        slow_query_log._explained.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            list(Brand.objects.filter(name='A'))
+            list(Brand.objects.filter(name='B'))
+        
+        rows = SlowQuery.objects.filter(sql__contains='inventory_brand')
+        self.assertEqual(rows.count(), 2)
+        self.assertEqual(len({row.fingerprint for row in rows}), 1)
+        self.assertEqual(len([row for row in rows if row.plan]), 1)
+        
+        out = StringIO()
+        call_command('slow_queries', '--plans', stdout=out)
+        self.assertIn(rows[0].fingerprint, out.getvalue())
+        self.assertIn('| ', out.getvalue())
+
+
+class DatasetGeneratorTest(TestCase):
+    """Tests du générateur de jeu de données (generate_dataset)"""
+    
+    COUNTS = {
+        'stores': 2, 'categories': 2, 'brands': 3, 'suppliers': 2, 'articles': 30,
+        'customers': 10, 'users': 4, 'movements': 200, 'sales': 25,
+    }
+    
+    def _generate(self, seed=7):
+        from datetime import date
+        from .dataset import DatasetGenerator
+        
+        # Petits lots : le découpage des insertions est exercé
+        return DatasetGenerator(
+            seed=seed, counts=dict(self.COUNTS), until=date(2026, 1, 1), batch_size=7
+        ).run()
+    
+    def _snapshot(self):
+        from apps.inventory.models import Stock
+        from apps.sales.models import Sale
+        
+        return (
+            list(Stock.objects.order_by('id').values_list('id', 'lot_number', 'quantity_on_hand')),
+            list(Sale.objects.order_by('sale_number').values_list('id', 'sale_date', 'total_amount')),
+        )
+    
+    def test_generated_data_is_consistent(self):
+        """Volumes demandés, stocks issus des mouvements, ventes équilibrées"""
+        from datetime import datetime
+        from django.db.models import Max, Sum
+        from apps.inventory.models import Article, Location, Stock, StockMovement
+        from apps.sales.models import Sale
+        
+        created = self._generate()
+        self.assertEqual(created['inventory.Article'], 30)
+        self.assertEqual(created['sales.Sale'], 25)
+        self.assertEqual(Location.objects.filter(location_type='store').count(), 2)
+        self.assertEqual(Location.objects.filter(location_type='shelf').count(), 2 * 3 * 4 * 5)
+        self.assertFalse(Article.objects.filter(images__isnull=True).exists())
+        self.assertTrue(Stock.objects.exclude(expiry_date=None).exists())
+        
+        for stock in Stock.objects.annotate(last_at=Max('movements__created_at')):
+            last = StockMovement.objects.filter(stock=stock, created_at=stock.last_at).first()
+            self.assertEqual(stock.quantity_on_hand, last.stock_after)
+            self.assertGreaterEqual(stock.quantity_on_hand, 0)
+        until = timezone.make_aware(datetime(2026, 1, 1))
+        self.assertFalse(StockMovement.objects.filter(created_at__gte=until).exists())
+        
+        for sale in Sale.objects.annotate(
+            lines=Sum('items__line_total'), taxes=Sum('items__tax_amount')
+        ).prefetch_related('payments'):
+            self.assertEqual(sale.total_amount, sale.lines + sale.taxes)
+            self.assertEqual(sum(payment.amount for payment in sale.payments.all()), sale.total_amount)
+    
+    def test_same_seed_same_data(self):
+        """Même graine et même date de fin : données identiques"""
+        from django.db import transaction
+        
+        savepoint = transaction.savepoint()
+        self._generate()
+        first = self._snapshot()
+        transaction.savepoint_rollback(savepoint)
+        
+        self._generate()
+        self.assertEqual(self._snapshot(), first)
+    
+    def test_command_refuses_existing_prefix(self):
+        """Un préfixe déjà généré n'est pas réutilisé"""
+        from django.core.management import CommandError, call_command
+        
+        self._generate()
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', '--scale', '0.0001')
+
+
+class EndpointBenchmarkTest(TestCase):
+    """Tests de la suite de benchmarks des endpoints (benchmark_endpoints)"""
+    
+    def test_compare_flags_regressions(self):
+        """Requête SQL en plus ou hausse au-delà de la tolérance et du bruit : régression"""
+        from .benchmarks import compare
+        
+        reference = {'p50_ms': 10.0, 'p95_ms': 12.0, 'queries': 5, 'peak_kb': 500}
+        baseline = {'sqlite:0.01': {'article_list': reference}}
+        
+        def run(**measured):
+            return compare(baseline, {'sqlite:0.01': {'article_list': {**reference, **measured}}}, 0.25)
+        
+        self.assertEqual(run(p50_ms=12.4, peak_kb=600), [])
+        self.assertEqual(len(run(queries=6)), 1)
+        self.assertEqual(len(run(p50_ms=13.0)), 1)
+        self.assertEqual(len(run(peak_kb=700)), 1)
+        # Hausse relative forte mais dans le bruit de mesure absolu
+        self.assertEqual(compare(
+            {'k': {'s': {**reference, 'p50_ms': 0.5}}}, {'k': {'s': {**reference, 'p50_ms': 1.2}}}, 0.25
+        ), [])
+        # Scénario absent de la référence : non comparé
+        self.assertEqual(compare({}, {'sqlite:1': {'login': reference}}, 0.25), [])
+    
+    def test_missing_baseline_fails(self):
+        """Scénario sans référence : échec, sauf --allow-missing-baseline"""
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import CommandError, call_command
+        from .benchmarks import save_baseline
+        from .management.commands.benchmark_endpoints import Command
+        
+        measured = {'p50_ms': 10.0, 'p95_ms': 12.0, 'queries': 5, 'peak_kb': 500}
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'baseline.json'
+            options = ['--sizes', '0.01', '--baseline', str(path)]
+            with mock.patch.object(Command, '_run_size', return_value={'login': measured}):
+                with self.assertRaises(CommandError):
+                    call_command('benchmark_endpoints', *options, stdout=StringIO())
+                call_command('benchmark_endpoints', *options, '--allow-missing-baseline', stdout=StringIO())
+                
+                save_baseline(path, {f'{connection.vendor}:0.01': {'login': measured}})
+                call_command('benchmark_endpoints', *options, stdout=StringIO())
+    
+    def test_scenarios_measured_on_generated_data(self):
+        """Les scénarios s'exécutent sur un jeu généré et sont mesurés"""
+        from datetime import timedelta
+        from .benchmarks import authenticated_client, build_scenarios, measure
+        from .dataset import DatasetGenerator
+        
+        DatasetGenerator(
+            seed=1, counts={**DatasetGeneratorTest.COUNTS, 'sales': 5},
+            until=timezone.localdate() + timedelta(days=1), password='bench-pass-123'
+        ).run()
+        user = get_user_model().objects.get(username='gen_user0001')
+        client = authenticated_client(user.username, 'bench-pass-123')
+        
+        scenarios = build_scenarios(user, 'bench-pass-123')
+        self.assertIn('pos_checkout_50', [scenario.name for scenario in scenarios])
+        for scenario in scenarios:
+            measured = measure(client, scenario, repeat=2, warmup=0)
+            self.assertGreater(measured['queries'], 0, scenario.name)
+            self.assertLessEqual(measured['p50_ms'], measured['p95_ms'])
+
+
+class QueryBudgetTest(APITestCase):
+    """
+    Budgets de requêtes SQL des routes GET des ViewSets enregistrés
+    (benchmarks/query_budgets.json) : chaque route est exercée sur deux
+    volumes de données ; le nombre de requêtes doit rester dans le budget
+    et ne pas croître avec le volume
+    """
+    
+    SMALL = {
+        'stores': 1, 'categories': 1, 'brands': 2, 'suppliers': 1, 'articles': 3,
+        'customers': 2, 'users': 1, 'movements': 6, 'sales': 2,
+    }
+    # Ajouté au petit jeu de données
+    LARGE = {
+        'stores': 3, 'categories': 2, 'brands': 10, 'suppliers': 3, 'articles': 60,
+        'customers': 30, 'users': 6, 'movements': 300, 'sales': 60,
+    }
+    
+    def setUp(self):
+        role = Role.objects.create(
+            name='Administrateur', role_type='admin', can_manage_users=True,
+            can_manage_inventory=True, can_manage_sales=True, can_manage_suppliers=True,
+            can_view_reports=True, can_manage_reports=True, can_manage_settings=True,
+            can_apply_discounts=True, can_void_transactions=True
+        )
+        # Administrateur multi-magasins : toutes les données sont visibles
+        self.admin = get_user_model().objects.create_superuser(
+            username='budget_admin', password='budget-pass-123', role=role
+        )
+        self.client.force_authenticate(self.admin)
+    
+    def _generate(self, seed, prefix, counts):
+        from datetime import timedelta
+        from .dataset import DatasetGenerator
+        
+        DatasetGenerator(
+            seed=seed, counts=counts, prefix=prefix, until=timezone.localdate() + timedelta(days=1)
+        ).run()
+    
+    def _measure(self, budgets, failures, urls):
+        from apps.inventory.models import Location
+        from .query_budget import discover_routes, route_budget, route_url
+        
+        store_id = str(Location.objects.filter(location_type='store').order_by('code').first().pk)
+        counts = {}
+        for route in discover_routes():
+            entry = route_budget(budgets, route.name)
+            # Routes de détail : même objet pour les deux volumes
+            url = urls[route.name] = urls.get(route.name) or route_url(route)
+            if 'skip' in entry or url is None:
+                continue
+            params = {key: value.format(store_id=store_id) for key, value in entry.get('params', {}).items()}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            if response.status_code >= 400:
+                failures.append(f"{route.name} : HTTP {response.status_code}")
+            counts[route.name] = len(queries)
+        return counts
+    
+    def test_budget_file_matches_routes(self):
+        """Chaque entrée du fichier désigne une route découverte ; skip et grows sont motivés"""
+        from .query_budget import discover_routes, load_budgets
+        
+        default, routes = load_budgets()
+        self.assertIsInstance(default, int)
+        discovered = {route.name for route in discover_routes()}
+        self.assertIn('inventory:article-list', discovered)
+        self.assertIn('inventory:article-detail', discovered)
+        self.assertIn('inventory:category-tree', discovered)
+        self.assertEqual(set(routes) - discovered, set())
+        for name, entry in routes.items():
+            if isinstance(entry, dict):
+                for key in ('skip', 'grows'):
+                    self.assertTrue(entry.get(key, 'motif'), f"{name} : {key} sans motif")
+    
+    def test_query_counts_within_budget_and_flat(self):
+        """Nombre de requêtes dans le budget et indépendant du volume de données"""
+        from .query_budget import load_budgets, route_budget
+        
+        budgets = load_budgets()
+        failures, urls = [], {}
+        self._generate(1, 'QBS', self.SMALL)
+        small = self._measure(budgets, failures, urls)
+        self._generate(2, 'QBL', self.LARGE)
+        large = self._measure(budgets, failures, urls)
+        
+        for name, count in sorted(large.items()):
+            entry = route_budget(budgets, name)
+            if count > entry['budget']:
+                failures.append(f"{name} : {count} requêtes (budget {entry['budget']})")
+            if name in small and count > small[name] and 'grows' not in entry:
+                failures.append(f"{name} : {small[name]} puis {count} requêtes avec le volume")
+        self.assertFalse(failures, '\n'.join(failures))
@@ -1,9 +1,18 @@
 # apps/core/views.py
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import status
+import hmac
+
 from django.conf import settings
+from django.http import HttpResponse
+
+from .batch import BatchRequestSerializer, run_batch
+from .conf import gestore_setting
+from .metrics import registry
+from . import profiling
 
 @api_view(['GET'])
 @permission_classes([AllowAny])  # Pas d'authentification requise pour health check
@@ -17,4 +26,69 @@ def health_check(request):
         'service': 'GESTORE API',
         'version': '1.0.0',
         'mode': settings.ENVIRONMENT_MODE if hasattr(settings, 'ENVIRONMENT_MODE') else 'unknown',
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK)
+
+class BatchView(APIView):
+    """
+    Appel groupé : plusieurs sous-requêtes API en un seul aller-retour
+    
+    Corps : {"requests": [{"id", "method", "path", "params", "headers", "body"}, ...]}
+    Réponse : {"responses": [{"id", "status", "headers", "body"}, ...]} dans le même ordre
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'responses': run_batch(request, serializer.validated_data['requests'])})
+
+
+def metrics_view(request):
+    """
+    Métriques des requêtes au format texte Prometheus (voir apps.core.metrics)
+    Accès : jeton de collecte (Authorization: Bearer <METRICS_TOKEN>) ou
+    compte staff connecté (session de l'administration)
+    """
+    token = gestore_setting('METRICS_TOKEN', '')
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = bool(token) and hmac.compare_digest(authorization, f'Bearer {token}')
+    if not authorized and not getattr(request.user, 'is_staff', False):
+        return HttpResponse('Accès refusé\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(
+        registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class ProfilingView(APIView):
+    """
+    Profilage à la demande des requêtes d'une route (voir apps.core.profiling)
+    
+    GET : routes armées et requêtes restant à profiler
+    POST {"route": "inventory:article-list", "count": 5} : arme la route
+    DELETE {"route": ...} : désarme la route (toutes si absente)
+    Les profils sont consultables dans l'administration (Profils de requêtes).
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response({'armed': profiling.armed_routes()})
+    
+    def post(self, request):
+        route = request.data.get('route')
+        try:
+            count = int(request.data.get('count', 1))
+        except (TypeError, ValueError):
+            count = 0
+        max_count = gestore_setting('PROFILING_MAX_ARMED', 50)
+        if not route or not 1 <= count <= max_count:
+            return Response(
+                {'error': f'route requise et count entre 1 et {max_count}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        profiling.arm(route, count)
+        return Response({'armed': profiling.armed_routes()}, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request):
+        profiling.disarm(request.data.get('route'))
+        return Response({'armed': profiling.armed_routes()})
@@ -0,0 +1,309 @@
+"""
+Écritures différées - GESTORE
+Les écritures secondaires d'une requête (sessions, journaux d'audit,
+compteurs) sont mises en file et enregistrées par lots par un thread
+d'arrière-plan, hors du chemin critique de la requête.
+
+- File bornée (WRITE_BEHIND_QUEUE_SIZE) : le thread de la requête ne
+  bloque jamais ; file pleine, les opérations sont ajoutées au fichier de
+  reprise au lieu d'attendre la base
+- Lots : vidés tous les WRITE_BEHIND_BATCH_SIZE opérations ou au plus tard
+  WRITE_BEHIND_INTERVAL_MS après la première opération du lot
+- Création : bulk_create par modèle (ligne à ligne si le lot est refusé,
+  pour isoler la ligne fautive)
+- Mise à jour : valeurs et incréments fusionnés par objet, puis un
+  bulk_update par modèle et par ensemble de champs
+- Dans une transaction, les écritures ne sont mises en file qu'au commit
+  (elles peuvent référencer des lignes de la transaction)
+
+Reprise : si la base est indisponible, ou à l'arrêt du processus pour ce
+qui n'a pas pu être écrit, les opérations sont conservées en JSON dans
+WRITE_BEHIND_SPOOL_DIR et rejouées au démarrage suivant du thread.
+
+Les champs auto_now / auto_now_add prennent l'heure de l'écriture : les
+horodatages métier doivent être renseignés explicitement.
+
+Avec WRITE_BEHIND_ENABLED à False, les écritures sont faites immédiatement
+dans le thread appelant (tests, commandes).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.db.models import F
+
+from .conf import gestore_setting
+
+logger = logging.getLogger(__name__)
+
+# Erreurs de disponibilité de la base : le lot est conservé pour reprise
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+
+class WriteBehindBuffer:
+    """File d'écritures différées et son thread d'enregistrement"""
+
+    def __init__(self, name):
+        self.name = name
+        self.queue = queue.Queue(maxsize=gestore_setting('WRITE_BEHIND_QUEUE_SIZE', 10000))
+        self._thread = None
+        self._lock = threading.Lock()
+        # Un seul lot écrit à la fois (thread de fond, flush, arrêt)
+        self._write_lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def create(self, instance):
+        """Insère l'instance (non enregistrée ; sa clé primaire est déjà connue)"""
+        self._submit(('create', instance))
+
+    def update(self, model, key, values=None, increments=None, by='pk'):
+        """
+        Met à jour l'objet model(by=key) : affecte values et ajoute
+        increments aux compteurs (F() + n). Aucun effet si l'objet n'existe pas.
+        """
+        self._submit(('update', (model, by, key, dict(values or {}), dict(increments or {}))))
+
+    def flush(self):
+        """Enregistre immédiatement tout ce qui est en file (thread appelant)"""
+        self._write(self._drain())
+
+    def shutdown(self):
+        """Arrêt du processus : écrit la file, ou la conserve pour reprise"""
+        operations = self._drain()
+        if not operations:
+            return
+        try:
+            self._write(operations)
+        except Exception:
+            logger.exception("Écritures différées %s conservées pour reprise à l'arrêt", self.name)
+            self._spool(operations)
+
+    # ------------------------------------------------------------------
+    # File et thread
+    # ------------------------------------------------------------------
+
+    def _submit(self, operation):
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._enqueue(operation))
+        else:
+            self._enqueue(operation)
+
+    def _enqueue(self, operation):
+        if not gestore_setting('WRITE_BEHIND_ENABLED', True):
+            self._write([operation])
+            return
+        try:
+            self.queue.put_nowait(operation)
+        except queue.Full:
+            # Jamais d'attente dans la requête : débordement vers la reprise
+            logger.warning("File d'écritures différées %s pleine : opération conservée pour reprise", self.name)
+            self._spool([operation])
+        self._ensure_thread()
+
+    def _drain(self):
+        operations = []
+        while True:
+            try:
+                operations.append(self.queue.get_nowait())
+            except queue.Empty:
+                return operations
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f'write-behind-{self.name}', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        self._replay_spool()
+        while True:
+            operations = self._next_batch()
+            close_old_connections()
+            try:
+                self._write(operations)
+            except UNAVAILABLE_ERRORS:
+                logger.exception("Base indisponible : écritures différées %s conservées pour reprise", self.name)
+                self._spool(operations)
+            except Exception:
+                logger.exception("Écritures différées %s perdues (%d opérations)", self.name, len(operations))
+            finally:
+                close_old_connections()
+
+    def _next_batch(self):
+        """Attend une opération puis regroupe jusqu'à la taille de lot ou l'échéance"""
+        batch_size = gestore_setting('WRITE_BEHIND_BATCH_SIZE', 200)
+        operations = [self.queue.get()]
+        deadline = time.monotonic() + gestore_setting('WRITE_BEHIND_INTERVAL_MS', 500) / 1000
+        while len(operations) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                operations.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return operations
+
+    # ------------------------------------------------------------------
+    # Enregistrement
+    # ------------------------------------------------------------------
+
+    def _write(self, operations):
+        creates = defaultdict(list)
+        updates = defaultdict(lambda: defaultdict(lambda: ({}, defaultdict(int))))
+        for kind, payload in operations:
+            if kind == 'create':
+                creates[type(payload)].append(payload)
+                continue
+            model, by, key, values, increments = payload
+            merged_values, merged_increments = updates[(model, by)][key]
+            merged_values.update(values)
+            for name, amount in increments.items():
+                merged_increments[name] += amount
+
+        with self._write_lock:
+            for model, instances in creates.items():
+                self._bulk_create(model, instances)
+            for (model, by), rows in updates.items():
+                self._bulk_update(model, by, rows)
+
+    def _bulk_create(self, model, instances):
+        batch_size = gestore_setting('WRITE_BEHIND_BATCH_SIZE', 200)
+        try:
+            with transaction.atomic():
+                model._default_manager.bulk_create(instances, batch_size=batch_size)
+        except UNAVAILABLE_ERRORS:
+            raise
+        except Exception:
+            # Lot refusé : ligne à ligne pour ne perdre que les lignes invalides
+            for instance in instances:
+                try:
+                    with transaction.atomic():
+                        model._default_manager.bulk_create([instance])
+                except UNAVAILABLE_ERRORS:
+                    raise
+                except Exception:
+                    logger.exception("Écriture différée refusée : %s %s", model.__name__, instance.pk)
+
+    def _bulk_update(self, model, by, rows):
+        if by == 'pk':
+            pks = {key: key for key in rows}
+        else:
+            pks = dict(model._default_manager.filter(
+                **{f'{by}__in': list(rows)}
+            ).values_list(by, 'pk'))
+
+        # bulk_update écrit les mêmes champs pour tous les objets du lot
+        groups = defaultdict(list)
+        for key, (values, increments) in rows.items():
+            if key not in pks:
+                continue
+            instance = model(pk=pks[key])
+            for name, value in values.items():
+                setattr(instance, name, value)
+            for name, amount in increments.items():
+                setattr(instance, name, F(name) + amount)
+            groups[tuple(sorted({*values, *increments}))].append(instance)
+
+        batch_size = gestore_setting('WRITE_BEHIND_BATCH_SIZE', 200)
+        for fields, instances in groups.items():
+            if fields:
+                model._default_manager.bulk_update(instances, fields, batch_size=batch_size)
+
+    # ------------------------------------------------------------------
+    # Reprise (fichiers JSON)
+    # ------------------------------------------------------------------
+
+    def _spool_dir(self):
+        return Path(gestore_setting('WRITE_BEHIND_SPOOL_DIR', settings.BASE_DIR / 'var' / 'write_behind'))
+
+    def _spool(self, operations):
+        """Ajoute les opérations au fichier de reprise du processus"""
+        try:
+            directory = self._spool_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f'{self.name}-{os.getpid()}.jsonl'
+            with open(path, 'a', encoding='utf-8') as spool:
+                for operation in operations:
+                    spool.write(json.dumps(_encode(operation), cls=DjangoJSONEncoder) + '\n')
+        except Exception:
+            logger.exception("Écritures différées %s perdues : reprise impossible", self.name)
+
+    def _replay_spool(self):
+        """Rejoue les fichiers de reprise (un seul processus par fichier)"""
+        directory = self._spool_dir()
+        if not directory.is_dir():
+            return
+        for path in sorted(directory.glob(f'{self.name}-*.jsonl')):
+            claimed = path.with_name(f'{path.name}.{uuid.uuid4().hex[:8]}.replay')
+            try:
+                os.replace(path, claimed)
+            except OSError:
+                continue  # Pris par un autre processus
+            try:
+                with open(claimed, encoding='utf-8') as spool:
+                    operations = [_decode(json.loads(line)) for line in spool if line.strip()]
+                close_old_connections()
+                self._write(operations)
+            except UNAVAILABLE_ERRORS:
+                # Toujours indisponible : le fichier sera repris plus tard
+                os.replace(claimed, path.with_name(f'{self.name}-{uuid.uuid4().hex[:8]}.jsonl'))
+                return
+            except Exception:
+                logger.exception("Reprise des écritures différées impossible : %s", claimed)
+                continue
+            claimed.unlink()
+            logger.info("%d écritures différées rejouées depuis %s", len(operations), path.name)
+
+
+def _encode(operation):
+    kind, payload = operation
+    if kind == 'create':
+        return {
+            'op': 'create',
+            'model': payload._meta.label_lower,
+            'fields': {f.attname: getattr(payload, f.attname) for f in payload._meta.concrete_fields},
+        }
+    model, by, key, values, increments = payload
+    return {
+        'op': 'update', 'model': model._meta.label_lower, 'by': by,
+        'key': key, 'values': values, 'increments': increments,
+    }
+
+
+def _decode(data):
+    model = apps.get_model(data['model'])
+    if data['op'] == 'create':
+        fields = {f.attname: f for f in model._meta.concrete_fields}
+        return ('create', model(**{
+            name: fields[name].to_python(value) for name, value in data['fields'].items() if name in fields
+        }))
+    by_field = model._meta.pk if data['by'] == 'pk' else model._meta.get_field(data['by'])
+    return ('update', (
+        model, data['by'], by_field.to_python(data['key']),
+        {name: model._meta.get_field(name).to_python(value) for name, value in data['values'].items()},
+        data['increments'],
+    ))
+
+
+# File partagée des écritures secondaires des requêtes
+write_behind = WriteBehindBuffer('default')
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_articleimage_pricehistory_unitconversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_s_created_5d8b9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_s_created_4412f4_idx'),
+        ),
+    ]
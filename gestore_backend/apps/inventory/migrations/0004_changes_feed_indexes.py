@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_a_updated_384bd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='brand',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_b_updated_482589_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_c_updated_71905d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_l_updated_10e2aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_s_updated_deee56_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitofmeasure',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_u_updated_55246a_idx'),
+        ),
+    ]
@@ -38,6 +38,9 @@ class UnitOfMeasure(BaseModel, NamedModel, ActivableModel):
         verbose_name = 'Unité de mesure'
         verbose_name_plural = 'Unités de mesure'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class UnitConversion(BaseModel):
@@ -174,6 +177,9 @@ class Category(BaseModel, NamedModel, ActivableModel, OrderedModel):
         verbose_name = 'Catégorie'
         verbose_name_plural = 'Catégories'
         ordering = ['parent__name', 'order', 'name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class Brand(BaseModel, NamedModel, ActivableModel):
@@ -197,6 +203,9 @@ class Brand(BaseModel, NamedModel, ActivableModel):
         verbose_name = 'Marque'
         verbose_name_plural = 'Marques'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class Supplier(BaseModel, NamedModel, ActivableModel, CodedModel):
@@ -501,6 +510,18 @@ class Article(AuditableModel, CodedModel, NamedModel, ActivableModel):
         Retourne l'URL de l'image principale de manière robuste.
         Ne lève pas d'erreur si un enregistrement ArticleImage n'a pas de fichier.
         """
+        # Images préchargées (prefetch_related('images')) : aucune requête
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('images')
+        if prefetched is not None:
+            images = list(prefetched)
+            primary_image = next((img for img in images if img.is_primary), None)
+            if primary_image and primary_image.image:
+                return primary_image.image.url
+            first_image = min(images, key=lambda img: img.order) if images else None
+            if first_image and first_image.image:
+                return first_image.image.url
+            return self.image.url if self.image else None
+        
         # Cherche une image primaire
         primary_image = self.images.filter(is_primary=True).first()
         # ⭐ CORRECTION : On vérifie que le champ 'image' n'est pas vide avant d'accéder à '.url'
@@ -530,6 +551,7 @@ class Article(AuditableModel, CodedModel, NamedModel, ActivableModel):
             models.Index(fields=['internal_reference']),
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['is_sellable', 'is_active']),
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
         ]
 
 
@@ -738,11 +760,24 @@ class Location(BaseModel, NamedModel, ActivableModel, CodedModel):
         verbose_name="Code-barres emplacement"
     )
 
+    def get_children_recursive(self):
+        """Retourne tous les emplacements descendants (une requête par niveau)"""
+        descendants = []
+        frontier = [self.pk]
+        while frontier:
+            children = list(Location.objects.filter(parent_id__in=frontier))
+            descendants.extend(children)
+            frontier = [child.pk for child in children]
+        return descendants
+
     class Meta:
         db_table = 'inventory_location'
         verbose_name = 'Emplacement'
         verbose_name_plural = 'Emplacements'
         ordering = ['location_type', 'code', 'name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class Stock(BaseModel):
@@ -829,6 +864,9 @@ class Stock(BaseModel):
         verbose_name_plural = 'Stocks'
         unique_together = ['article', 'location', 'lot_number', 'expiry_date']
         ordering = ['article__name', 'location__name', 'expiry_date']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class StockMovement(AuditableModel):
@@ -931,6 +969,9 @@ class StockMovement(AuditableModel):
         verbose_name = 'Mouvement de stock'
         verbose_name_plural = 'Mouvements de stock'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),  # Pagination par curseur
+        ]
 
 
 class StockAlert(BaseModel):
@@ -1006,4 +1047,7 @@ class StockAlert(BaseModel):
         db_table = 'inventory_stock_alert'
         verbose_name = 'Alerte de stock'
         verbose_name_plural = 'Alertes de stock'
-        ordering = ['-created_at', 'alert_level']
\ No newline at end of file
+        ordering = ['-created_at', 'alert_level']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),  # Pagination par curseur
+        ]
\ No newline at end of file
@@ -323,6 +323,7 @@ class ArticleListSerializer(BaseModelSerializer, NamedModelSerializer, Activable
     """
     article_type = serializers.CharField()
     barcode = serializers.CharField(max_length=50, required=False, allow_null=True)
+    category_id = serializers.CharField(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
     brand_name = serializers.CharField(source='brand.name', read_only=True)
@@ -334,10 +335,20 @@ class ArticleListSerializer(BaseModelSerializer, NamedModelSerializer, Activable
     available_stock = serializers.SerializerMethodField()
     is_low_stock = serializers.SerializerMethodField()
     margin_percent = serializers.SerializerMethodField()
+    
+    fast_read = True
+    
+    # Objets liés complets chargés à la demande (?expand=category,brand,unit_of_measure)
+    expandable_fields = {
+        'category': (CategorySerializer, {}),
+        'brand': (BrandSerializer, {}),
+        'unit_of_measure': (UnitOfMeasureSerializer, {}),
+    }
+    
     class Meta:
         model = Article
         fields = [
-            'id', 'name', 'code', 'article_type', 'barcode', 'category_name', 'category_color',
+            'id', 'name', 'code', 'article_type', 'barcode', 'category_id', 'category_name', 'category_color',
             'brand_name', 'unit_symbol', 'purchase_price', 'selling_price', 'image_url',
             'current_stock', 'available_stock', 'is_low_stock', 'margin_percent',
             'is_sellable', 'is_active', 'status_display',
@@ -720,6 +731,8 @@ class StockSerializer(BaseModelSerializer):
     days_until_expiry = serializers.SerializerMethodField()
     stock_value = serializers.SerializerMethodField()
     
+    fast_read = True
+    
     class Meta:
         model = Stock
         fields = [
@@ -786,6 +799,8 @@ class StockMovementSerializer(AuditableSerializer):
     # Champs calculés
     movement_value = serializers.SerializerMethodField()
     
+    fast_read = True
+    
     class Meta:
         model = StockMovement
         fields = [
@@ -2,6 +2,7 @@
 Tests pour l'application inventory - GESTORE
 Tests complets des modèles, serializers, vues et permissions
 """
+import uuid
 from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -1381,4 +1382,443 @@ class InventoryValidationTest(TestCase):
         
         # Vérifier que le stock négatif est bien créé (le modèle l'autorise)
         # Mais la logique métier dans les vues devrait l'empêcher
-        self.assertEqual(stock.quantity_on_hand, Decimal('-10.0'))
\ No newline at end of file
+        self.assertEqual(stock.quantity_on_hand, Decimal('-10.0'))
+
+# ========================
+# TESTS ACTIONS BORNÉES
+# ========================
+
+class BoundedActionsTest(APITestCase):
+    """Tests de la pagination par défaut et du rendu en flux des actions de liste"""
+    
+    def setUp(self):
+        self.admin_role = Role.objects.create(
+            name='Admin',
+            role_type='admin',
+            can_manage_inventory=True
+        )
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            role=self.admin_role
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Test', code='TEST', is_active=True)
+        self.location = Location.objects.create(
+            name='Magasin',
+            code='MAG01',
+            location_type='store',
+            is_active=True
+        )
+        for i in range(3):
+            article = Article.objects.create(
+                name=f'Article {i}',
+                code=f'ART00{i}',
+                category=self.category,
+                unit_of_measure=self.unit,
+                purchase_price=Decimal('10.00'),
+                selling_price=Decimal('15.00')
+            )
+            Stock.objects.create(
+                article=article,
+                location=self.location,
+                quantity_on_hand=Decimal('5'),
+                unit_cost=Decimal('10.00')
+            )
+        self.url = reverse('inventory:location-stocks', args=[self.location.id])
+    
+    def test_location_stocks_paginated(self):
+        """Test pagination par défaut des stocks d'un emplacement"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 3)
+    
+    def test_location_stocks_streaming(self):
+        """Test export complet en flux (?format=jsonstream)"""
+        import json
+        response = self.client.get(self.url, {'format': 'jsonstream'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['location']['id'], str(self.location.id))
+
+
+# ========================
+# TESTS LISTES ALLÉGÉES
+# ========================
+
+class SparseFieldsetsTest(APITestCase):
+    """Tests des paramètres ?fields= et ?expand= sur la liste des articles"""
+    
+    def setUp(self):
+        self.admin_role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', role=self.admin_role
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Test', code='TEST', is_active=True)
+        for i in range(3):
+            Article.objects.create(
+                name=f'Article {i}', code=f'ART00{i}', category=self.category,
+                unit_of_measure=self.unit, purchase_price=Decimal('10.00'),
+                selling_price=Decimal('15.00')
+            )
+        self.url = reverse('inventory:article-list')
+    
+    def test_fields_prunes_representation(self):
+        """Test seuls les champs demandés sont renvoyés (sans _meta)"""
+        response = self.client.get(self.url, {'fields': 'id,name,selling_price,current_stock'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for row in response.data['results']:
+            self.assertEqual(set(row), {'id', 'name', 'selling_price', 'current_stock'})
+    
+    def test_expand_adds_nested_object(self):
+        """Test ?expand= ajoute l'objet lié complet"""
+        response = self.client.get(self.url, {'fields': 'id', 'expand': 'category'})
+        
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'category'})
+        self.assertEqual(row['category']['code'], 'TEST')
+    
+    def test_full_representation_by_default(self):
+        """Test sans paramètre, la représentation complète est inchangée"""
+        response = self.client.get(self.url)
+        
+        row = response.data['results'][0]
+        self.assertIn('margin_percent', row)
+        self.assertIn('_meta', row)
+        self.assertNotIn('category', row)
+    
+    def test_fields_skip_unused_joins(self):
+        """Test les jointures et agrégats inutiles ne sont pas ajoutés"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'fields': 'id,name', 'ordering': 'name'})
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('"inventory_stock"', sql)
+        self.assertNotIn('inventory_brand', sql)
+
+
+# ========================
+# TESTS GET CONDITIONNEL
+# ========================
+
+class ConditionalGetTest(APITestCase):
+    """Tests ETag / Last-Modified sur les listes de référence"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.admin_role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', role=self.admin_role
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        
+        self.brand = Brand.objects.create(name='Marque A', is_active=True)
+        Brand.objects.create(name='Marque B', is_active=True)
+        self.url = reverse('inventory:brand-list')
+    
+    def test_not_modified(self):
+        """Test 304 sans corps quand l'ETag correspond"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+    
+    def test_change_invalidates_etag(self):
+        """Test une modification, ou un article ajouté (compteur), change l'ETag"""
+        etag = self.client.get(self.url)['ETag']
+        
+        self.brand.description = 'Nouvelle description'
+        self.brand.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs')
+        category = Category.objects.create(name='Test', code='TEST')
+        Article.objects.create(
+            name='Article', code='ART001', category=category, brand=self.brand,
+            unit_of_measure=unit, purchase_price=Decimal('1'), selling_price=Decimal('2')
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_etag_depends_on_query(self):
+        """Test l'ETag dépend des filtres de la requête"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'search': 'B'}, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_server_cache_skips_serialization(self):
+        """Test une version déjà servie ne coûte que les agrégats de version"""
+        first = self.client.get(self.url)
+        
+        # Un agrégat pour les marques, un pour les articles (dépendance)
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+    
+    def test_category_tree_conditional(self):
+        """Test l'arbre des catégories est servi en GET conditionnel"""
+        Category.objects.create(name='Racine', code='ROOT')
+        url = reverse('inventory:category-tree')
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+# ========================
+# TESTS FORMATS BINAIRES ET COMPRESSION
+# ========================
+
+class BinaryFormatsTest(APITestCase):
+    """Tests des réponses MessagePack / CBOR et de la compression"""
+    
+    def setUp(self):
+        self.admin_role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', role=self.admin_role
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Test', code='TEST', is_active=True)
+        for i in range(30):
+            Article.objects.create(
+                name=f'Article {i}', code=f'ART{i:03}', category=self.category,
+                unit_of_measure=self.unit, purchase_price=Decimal('10.00'),
+                selling_price=Decimal('15.50')
+            )
+        self.url = reverse('inventory:article-list')
+    
+    def test_msgpack_decimals_exact(self):
+        """Test réponse MessagePack avec décimaux natifs exacts"""
+        import io
+        from apps.core.parsers import MessagePackParser
+        from apps.core.renderers import msgpack
+        if msgpack is None:
+            self.skipTest('msgpack non installé')
+        
+        response = self.client.get(self.url, HTTP_ACCEPT='application/msgpack')
+        
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = MessagePackParser().parse(io.BytesIO(response.content))
+        self.assertEqual(data['count'], 30)
+        self.assertEqual(data['results'][0]['selling_price'], Decimal('15.50'))
+        self.assertEqual(str(data['results'][0]['selling_price']), '15.50')
+    
+    def test_cbor_round_trip(self):
+        """Test réponse CBOR identique à la réponse JSON (hors type des décimaux)"""
+        import io
+        from apps.core.parsers import CBORParser
+        from apps.core.renderers import cbor2
+        if cbor2 is None:
+            self.skipTest('cbor2 non installé')
+        
+        json_data = self.client.get(self.url).json()
+        data = CBORParser().parse(io.BytesIO(self.client.get(self.url, {'format': 'cbor'}).content))
+        
+        self.assertEqual(data['results'][0]['purchase_price'], Decimal('10.00'))
+        data['results'][0]['purchase_price'] = str(data['results'][0]['purchase_price'])
+        data['results'][0]['selling_price'] = str(data['results'][0]['selling_price'])
+        self.assertEqual(data['results'][0], json_data['results'][0])
+    
+    def test_json_unchanged(self):
+        """Test les décimaux restent des chaînes en JSON"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['results'][0]['selling_price'], '15.50')
+    
+    def test_large_response_compressed(self):
+        """Test compression gzip des réponses volumineuses"""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+    
+    def test_brotli_preferred(self):
+        """Test brotli utilisé quand il est accepté et installé"""
+        from apps.core.middleware import brotli
+        if brotli is None:
+            self.skipTest('brotli non installé')
+        
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content)[:1], b'{')
+    
+    def test_small_response_not_compressed(self):
+        """Test pas de compression sous le seuil"""
+        response = self.client.get(self.url, {'search': 'inexistant'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+# ========================
+# TESTS CHEMIN DE LECTURE RAPIDE
+# ========================
+
+class FastReadSerializerTest(TestCase):
+    """Tests de l'équivalence du chemin de lecture rapide avec le chemin DRF"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='magasinier', password='test123')
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Test', code='TEST', is_active=True)
+        self.brand = Brand.objects.create(name='Marque', is_active=True)
+        self.location = Location.objects.create(
+            name='Magasin', code='MAG01', location_type='store', is_active=True
+        )
+        # Un article avec marque, un sans (champ source absent -> clé omise)
+        self.articles = [
+            Article.objects.create(
+                name=f'Article {i}', code=f'ART00{i}', category=self.category,
+                brand=self.brand if i else None, unit_of_measure=self.unit,
+                purchase_price=Decimal('10.00'), selling_price=Decimal('15.50')
+            )
+            for i in range(2)
+        ]
+        self.stock = Stock.objects.create(
+            article=self.articles[0], location=self.location,
+            quantity_on_hand=Decimal('12.5'), unit_cost=Decimal('10.00'),
+            expiry_date=timezone.now().date() + timedelta(days=10)
+        )
+        self.movement = StockMovement.objects.create(
+            article=self.articles[0], stock=self.stock, movement_type='in',
+            reason='purchase', quantity=Decimal('12.5'), stock_before=Decimal('0'),
+            stock_after=Decimal('12.5'), created_by=self.user
+        )
+    
+    def assertSameOutput(self, serializer_class, instances):
+        from unittest import mock
+        from rest_framework.renderers import JSONRenderer
+        
+        renderer = JSONRenderer()
+        fast = renderer.render(serializer_class(instances, many=True).data)
+        with mock.patch.object(serializer_class, 'fast_read', False):
+            slow = renderer.render(serializer_class(instances, many=True).data)
+        self.assertEqual(fast, slow)
+    
+    def test_article_list_serializer(self):
+        """Test sortie identique pour ArticleListSerializer"""
+        self.assertSameOutput(ArticleListSerializer, self.articles)
+        self.assertNotIn('brand_name', ArticleListSerializer(self.articles[0]).data)
+    
+    def test_stock_serializer(self):
+        """Test sortie identique pour StockSerializer"""
+        self.assertSameOutput(StockSerializer, [self.stock])
+    
+    def test_stock_movement_serializer(self):
+        """Test sortie identique pour StockMovementSerializer"""
+        self.assertSameOutput(StockMovementSerializer, [self.movement])
+    
+    def test_main_image_url_uses_prefetch(self):
+        """Test aucune requête pour l'image principale si les images sont préchargées"""
+        articles = list(Article.objects.prefetch_related('images'))
+        with self.assertNumQueries(0):
+            for article in articles:
+                article.main_image_url
+
+
+class BulkWritesTest(APITestCase):
+    """Tests des écritures en masse génériques (/bulk/)"""
+    
+    def setUp(self):
+        self.admin_role = Role.objects.create(name='Admin', role_type='admin', can_manage_inventory=True)
+        self.admin_user = User.objects.create_user(
+            username='admin', password='admin123', role=self.admin_role, is_superuser=True
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.existing = Category.objects.create(name='Existante', code='EXI')
+        self.url = reverse('inventory:category-bulk')
+    
+    def test_bulk_create(self):
+        """Test création d'un lot en une insertion"""
+        items = [{'name': f'Catégorie {i}', 'code': f'cat{i}'} for i in range(20)]
+        
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, items, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(Category.objects.filter(code__startswith='CAT').count(), 20)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+    
+    def test_errors_reported_per_item(self):
+        """Test lot refusé en entier, erreurs par position (doublons compris)"""
+        items = [
+            {'name': 'Nouvelle', 'code': 'NEW'},
+            {'name': 'Doublon base', 'code': 'EXI'},
+            {'name': '', 'code': 'VIDE'},
+            {'name': 'Doublon lot', 'code': 'NEW'},
+        ]
+        
+        response = self.client.post(self.url, items, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2, 3])
+        self.assertIn('code', response.data['errors'][0]['errors'])
+        self.assertFalse(Category.objects.filter(code='NEW').exists())
+    
+    def test_bulk_update_and_delete(self):
+        """Test modification partielle puis suppression logique d'un lot"""
+        other = Category.objects.create(name='Autre', code='AUT')
+        
+        response = self.client.patch(self.url, [
+            {'id': str(self.existing.id), 'name': 'Renommée'},
+            {'id': str(other.id), 'code': 'AUT'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Renommée')
+        
+        response = self.client.patch(self.url, [{'id': str(uuid.uuid4()), 'name': 'X'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.delete(self.url, {'ids': [str(self.existing.id), str(other.id)]}, format='json')
+        self.assertEqual(response.data['deleted_count'], 2)
+        self.assertEqual(Category.objects.filter(is_deleted=True).count(), 2)
+    
+    def test_permissions_and_opt_in(self):
+        """Test permissions de la vue appliquées, route absente sans bulk_writes"""
+        reader_role = Role.objects.create(name='Lecteur', role_type='cashier')
+        reader = User.objects.create_user(username='reader', password='reader123', role=reader_role)
+        self.client.force_authenticate(user=reader)
+        
+        response = self.client.post(self.url, [{'name': 'X', 'code': 'X'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        # Droits par action (create, destroy...) vérifiés comme pour l'écriture unitaire
+        manager = User.objects.create_user(username='manager', password='manager123', role=self.admin_role)
+        self.client.force_authenticate(user=manager)
+        single = self.client.delete(reverse('inventory:category-detail', args=[self.existing.id]))
+        response = self.client.delete(self.url, {'ids': [str(self.existing.id)]}, format='json')
+        self.assertEqual(response.status_code, single.status_code)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        from django.urls import NoReverseMatch
+        with self.assertRaises(NoReverseMatch):
+            reverse('inventory:article-bulk')
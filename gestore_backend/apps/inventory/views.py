@@ -16,7 +16,7 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from decimal import Decimal
 import csv
 import io
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 # Import de la classe de base existante
 from apps.authentication.views import OptimizedModelViewSet
@@ -25,6 +25,8 @@ from apps.authentication.views import OptimizedModelViewSet
 from apps.core.permissions import CanManageInventory
 
 from apps.core.mixins import StoreFilterMixin
+from apps.core.pagination import KeysetPagination
+from apps.sync.push import notify
 
 # Import des permissions granulaires spécifiques à inventory
 from .permissions import (
@@ -79,6 +81,7 @@ class UnitOfMeasureViewSet(OptimizedModelViewSet):
     queryset = UnitOfMeasure.objects.all()
     serializer_class = UnitOfMeasureSerializer
     permission_classes = [CanViewInventory]  # Lecture autorisée, écriture selon permission
+    bulk_writes = True
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active', 'is_decimal']
@@ -86,6 +89,10 @@ class UnitOfMeasureViewSet(OptimizedModelViewSet):
     ordering_fields = ['name', 'symbol', 'created_at']
     ordering = ['name']
     
+    # Données de référence : GET conditionnel (compteurs dépendant des articles)
+    conditional_list = True
+    conditional_dependencies = (Article, UnitConversion)
+    
     def optimize_list_queryset(self, queryset):
         """Optimisations pour la liste des unités"""
         return queryset.annotate(
@@ -121,21 +128,15 @@ class UnitOfMeasureViewSet(OptimizedModelViewSet):
     def articles(self, request, pk=None):
         """Articles utilisant cette unité"""
         unit = self.get_object()
-        articles = Article.objects.filter(unit_of_measure=unit, is_active=True)
-        
-        # Pagination simple
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
+        articles = Article.objects.filter(unit_of_measure=unit, is_active=True).select_related(
+            'category', 'brand', 'unit_of_measure'
+        )
         
-        serializer = ArticleListSerializer(articles[start:end], many=True, context={'request': request})
-        return Response({
-            'results': serializer.data,
-            'count': articles.count(),
-            'page': page,
-            'page_size': page_size
-        })
+        # Pagination (par page, ou par curseur avec ?cursor=)
+        paginator = KeysetPagination(cursor_field='created_at', page_size=20)
+        page = paginator.paginate_queryset(articles, request, view=self)
+        serializer = ArticleListSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class UnitConversionViewSet(OptimizedModelViewSet):
@@ -193,6 +194,7 @@ class CategoryViewSet(OptimizedModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [CanViewInventory]
+    bulk_writes = True
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active', 'parent', 'requires_prescription', 'requires_lot_tracking']
@@ -200,6 +202,10 @@ class CategoryViewSet(OptimizedModelViewSet):
     ordering_fields = ['name', 'code', 'order', 'created_at']
     ordering = ['parent__name', 'order', 'name']
     
+    # Données de référence : GET conditionnel (compteurs dépendant des articles)
+    conditional_list = True
+    conditional_dependencies = (Article,)
+    
     def optimize_list_queryset(self, queryset):
         """Optimisations pour la liste des catégories"""
         return queryset.select_related('parent').annotate(
@@ -223,8 +229,11 @@ class CategoryViewSet(OptimizedModelViewSet):
             'children__children__children'
         ).order_by('order', 'name')
         
-        serializer = CategoryTreeSerializer(root_categories, many=True, context={'request': request})
-        return Response(serializer.data)
+        # Version calculée sur toutes les catégories (les enfants font partie de l'arbre)
+        return self.conditional_response(
+            Category.objects.all(),
+            lambda: CategoryTreeSerializer(root_categories, many=True, context={'request': request}).data
+        )
     
     @action(detail=True, methods=['get'])
     def children(self, request, pk=None):
@@ -295,20 +304,14 @@ class CategoryViewSet(OptimizedModelViewSet):
                 category=category, is_active=True
             ).select_related('category', 'brand', 'unit_of_measure')
         
-        # Pagination simple
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
+        # Pagination (par page, ou par curseur avec ?cursor=)
+        paginator = KeysetPagination(cursor_field='created_at', page_size=20)
+        page = paginator.paginate_queryset(articles, request, view=self)
+        serializer = ArticleListSerializer(page, many=True, context={'request': request})
         
-        serializer = ArticleListSerializer(articles[start:end], many=True, context={'request': request})
-        return Response({
-            'results': serializer.data,
-            'count': articles.count(),
-            'page': page,
-            'page_size': page_size,
-            'include_children': include_children
-        })
+        data = paginator.get_paginated_data(serializer.data)
+        data['include_children'] = include_children
+        return Response(data)
 
 
 class BrandViewSet(OptimizedModelViewSet):
@@ -319,6 +322,7 @@ class BrandViewSet(OptimizedModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [CanViewInventory]
+    bulk_writes = True
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active']
@@ -326,6 +330,10 @@ class BrandViewSet(OptimizedModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
     
+    # Données de référence : GET conditionnel (compteurs dépendant des articles)
+    conditional_list = True
+    conditional_dependencies = (Article,)
+    
     def optimize_list_queryset(self, queryset):
         """Optimisations pour la liste des marques"""
         return queryset.annotate(
@@ -363,6 +371,7 @@ class SupplierViewSet(OptimizedModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [CanViewInventory]
+    bulk_writes = True
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active']
@@ -406,14 +415,31 @@ class ArticleViewSet(OptimizedModelViewSet):
         return ArticleDetailSerializer
     
     def optimize_list_queryset(self, queryset):
-        """Optimisations pour la liste des articles"""
-        return queryset.select_related(
-            'category', 'brand', 'unit_of_measure', 'main_supplier'
-        ).annotate(
-            current_stock=Sum('stock_entries__quantity_on_hand'),
-            available_stock=Sum('stock_entries__quantity_available'),
-            variants_count=Count('variants', filter=Q(variants__is_active=True))
-        )
+        """
+        Optimisations pour la liste des articles
+        Jointures et agrégats limités aux champs de la réponse (?fields= / ?expand=)
+        """
+        related = []
+        if self.wants_fields('category_name', 'category_color') or self.wants_expand('category'):
+            related.append('category')
+        if self.wants_fields('brand_name') or self.wants_expand('brand'):
+            related.append('brand')
+        if self.wants_fields('unit_symbol') or self.wants_expand('unit_of_measure'):
+            related.append('unit_of_measure')
+        if related:
+            queryset = queryset.select_related(*related)
+        
+        if self.wants_fields('image_url'):
+            queryset = queryset.prefetch_related('images')
+        
+        annotations = {}
+        if self.wants_fields('current_stock', 'is_low_stock'):
+            annotations['current_stock'] = Sum('stock_entries__quantity_on_hand')
+        if self.wants_fields('available_stock'):
+            annotations['available_stock'] = Sum('stock_entries__quantity_available')
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
     
     def optimize_detail_queryset(self, queryset):
         """Optimisations pour le détail d'un article"""
@@ -531,8 +557,7 @@ class ArticleViewSet(OptimizedModelViewSet):
         article = self.get_object()
         history = PriceHistory.objects.filter(article=article).select_related('created_by').order_by('-effective_date')
         
-        serializer = PriceHistorySerializer(history, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.list_action_response(history, PriceHistorySerializer)
     
     @action(detail=True, methods=['post'], permission_classes=[CanManageInventory])
     def duplicate(self, request, pk=None):
@@ -669,18 +694,21 @@ class ArticleViewSet(OptimizedModelViewSet):
             )
         
         updated_count = 0
+        # update() ne passe pas par save() : updated_at est avancé explicitement
+        # pour que le flux de changements et les ETag voient la modification
+        now = timezone.now()
         
         with transaction.atomic():
-            if action_type == 'activate':
-                updated_count = articles.update(is_active=True)
-            elif action_type == 'deactivate':
-                updated_count = articles.update(is_active=False)
+            if action_type in ('activate', 'deactivate'):
+                updated_count = articles.update(is_active=action_type == 'activate', updated_at=now)
+                # update() n'émet pas post_save : diffusion explicite aux caisses
+                notify('price', article_ids)
             elif action_type == 'delete':
-                updated_count = articles.update(is_deleted=True)
+                updated_count = articles.update(is_deleted=True, deleted_at=now, updated_at=now)
             elif action_type == 'update_category' and 'category_id' in data:
-                updated_count = articles.update(category_id=data['category_id'])
+                updated_count = articles.update(category_id=data['category_id'], updated_at=now)
             elif action_type == 'update_supplier' and 'supplier_id' in data:
-                updated_count = articles.update(main_supplier_id=data['supplier_id'])
+                updated_count = articles.update(main_supplier_id=data['supplier_id'], updated_at=now)
         
         return Response({
             'message': f'Action {action_type} appliquée avec succès',
@@ -760,30 +788,36 @@ class ArticleViewSet(OptimizedModelViewSet):
         """
         articles = self.filter_queryset(self.get_queryset())
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="articles.csv"'
+        # Écriture en flux : une ligne CSV est produite à la fois
+        class Echo:
+            def write(self, value):
+                return value
         
-        writer = csv.writer(response)
-        writer.writerow([
-            'Code', 'Nom', 'Description', 'Catégorie', 'Marque', 'Prix achat',
-            'Prix vente', 'Stock actuel', 'Stock minimum', 'Unité', 'Actif'
-        ])
-        
-        for article in articles.select_related('category', 'brand', 'unit_of_measure'):
-            writer.writerow([
-                article.code,
-                article.name,
-                article.description,
-                article.category.name if article.category else '',
-                article.brand.name if article.brand else '',
-                article.purchase_price,
-                article.selling_price,
-                article.get_current_stock(),
-                article.min_stock_level,
-                article.unit_of_measure.symbol if article.unit_of_measure else '',
-                'Oui' if article.is_active else 'Non'
-            ])
+        writer = csv.writer(Echo())
         
+        def rows():
+            yield writer.writerow([
+                'Code', 'Nom', 'Description', 'Catégorie', 'Marque', 'Prix achat',
+                'Prix vente', 'Stock actuel', 'Stock minimum', 'Unité', 'Actif'
+            ])
+            queryset = articles.select_related('category', 'brand', 'unit_of_measure')
+            for article in queryset.iterator(chunk_size=500):
+                yield writer.writerow([
+                    article.code,
+                    article.name,
+                    article.description,
+                    article.category.name if article.category else '',
+                    article.brand.name if article.brand else '',
+                    article.purchase_price,
+                    article.selling_price,
+                    article.get_current_stock(),
+                    article.min_stock_level,
+                    article.unit_of_measure.symbol if article.unit_of_measure else '',
+                    'Oui' if article.is_active else 'Non'
+                ])
+        
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="articles.csv"'
         return response
 
 
@@ -823,10 +857,9 @@ class LocationViewSet(StoreFilterMixin, OptimizedModelViewSet):
         stocks = Stock.objects.filter(
             location=location,
             quantity_on_hand__gt=0
-        ).select_related('article__category', 'article__brand')
+        ).select_related('article__category', 'article__brand', 'location')
         
-        serializer = StockSerializer(stocks, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.list_action_response(stocks, StockSerializer)
     
 
 class StockViewSet(StoreFilterMixin, OptimizedModelViewSet):
@@ -1035,8 +1068,7 @@ class StockViewSet(StoreFilterMixin, OptimizedModelViewSet):
             'article__category', 'article__brand', 'stock__location'
         ).order_by('alert_level', '-created_at')
         
-        serializer = StockAlertSerializer(alerts, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.list_action_response(alerts, StockAlertSerializer)
     
     @action(detail=False, methods=['get'])
     def valuation(self, request):
@@ -1083,6 +1115,10 @@ class StockMovementViewSet(StoreFilterMixin, viewsets.ReadOnlyModelViewSet):
     # 🔴 CONFIGURATION DU FILTRAGE
     store_filter_field = 'stock__location'  # Filtre via relation Stock
     
+    # Pagination par curseur sur option (?cursor=)
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
+    
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['movement_type', 'reason', 'article', 'stock__location']
     search_fields = ['article__name', 'article__code', 'reference_document', 'notes']
@@ -1147,6 +1183,10 @@ class StockAlertViewSet(StoreFilterMixin, OptimizedModelViewSet):
     # 🔴 CONFIGURATION DU FILTRAGE
     store_filter_field = 'stock__location'  # Filtre via relation Stock
     
+    # Pagination par curseur sur option (?cursor=)
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
+    
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['alert_type', 'alert_level', 'is_acknowledged']
     search_fields = ['article__name', 'article__code', 'message']
@@ -1192,16 +1232,18 @@ class StockAlertViewSet(StoreFilterMixin, OptimizedModelViewSet):
             )
         
         # 🔴 Le queryset est déjà filtré par magasin grâce au Mixin
-        alerts = self.get_queryset().filter(
+        alert_pks = list(self.get_queryset().filter(
             id__in=alert_ids,
             is_acknowledged=False
-        )
+        ).values_list('pk', flat=True))
         
-        updated_count = alerts.update(
+        updated_count = StockAlert.objects.filter(pk__in=alert_pks, is_acknowledged=False).update(
             is_acknowledged=True,
             acknowledged_by=request.user,
             acknowledged_at=timezone.now()
         )
+        # update() n'émet pas post_save : diffusion explicite aux caisses
+        notify('alert', alert_pks)
         
         return Response({
             'message': f'{updated_count} alertes acquittées',
@@ -137,16 +137,16 @@ class SaleAdmin(admin.ModelAdmin):
 @admin.register(Discount)
 class DiscountAdmin(admin.ModelAdmin):
     list_display = [
-        'name', 'discount_type', 'scope', 'value_display',
+        'name', 'code', 'discount_type', 'scope', 'value_display',
         'start_date', 'end_date', 'is_active_now'
     ]
     list_filter = ['discount_type', 'scope', 'is_active', 'start_date']
-    search_fields = ['name', 'description']
+    search_fields = ['name', 'code', 'description']
     ordering = ['-start_date']
     
     fieldsets = (
         ('Identification', {
-            'fields': ('name', 'description', 'discount_type', 'scope')
+            'fields': ('name', 'code', 'description', 'discount_type', 'scope')
         }),
         ('Valeurs', {
             'fields': ('percentage_value', 'fixed_value')
@@ -5,3 +5,9 @@ class SalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sales'
     verbose_name = 'Sales'
+
+    def ready(self):
+        """
+        Importer les signaux quand l'app est prête
+        """
+        import apps.sales.signals  # noqa
@@ -0,0 +1,225 @@
+# apps/sales/bootstrap.py
+
+"""
+Bundle de démarrage des caisses - GESTORE
+Tout ce dont une caisse a besoin (moyens de paiement, catégories, unités,
+remises actives, catalogue vendable avec le stock du magasin) en un appel.
+
+Chaque section a une version dérivée de max(updated_at) et du nombre de
+lignes de ses tables (un agrégat par table). Le bundle d'une version est
+construit une fois puis servi depuis le cache ; un client qui présente une
+version précédente (?since=) ne reçoit que les lignes modifiées ou supprimées
+(rien s'il est à jour). Seules les BOOTSTRAP_KEPT_VERSIONS dernières versions
+d'un magasin restent en cache : chaque mouvement de stock en crée une.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from apps.core.conditional import queryset_version
+from apps.core.conf import gestore_setting
+from apps.inventory.models import Article, ArticleImage, Category, Stock, UnitOfMeasure
+from apps.inventory.serializers import ArticleListSerializer, CategorySerializer, UnitOfMeasureSerializer
+
+from .models import Discount, PaymentMethod
+from .serializers import DiscountSerializer, PaymentMethodSerializer
+
+CACHE_KEY_PREFIX = 'pos:bootstrap'
+
+# Champs utiles à la caisse (listes allégées, voir BaseModelSerializer)
+PAYMENT_METHOD_FIELDS = [
+    'id', 'name', 'payment_type', 'payment_type_display', 'requires_reference',
+    'requires_authorization', 'max_amount', 'fee_percentage',
+]
+CATEGORY_FIELDS = [
+    'id', 'name', 'code', 'parent', 'tax_rate', 'requires_prescription',
+    'requires_lot_tracking', 'requires_expiry_date', 'color', 'order',
+]
+UNIT_FIELDS = ['id', 'name', 'symbol', 'is_decimal']
+DISCOUNT_FIELDS = [
+    'id', 'name', 'code', 'discount_type', 'scope', 'percentage_value', 'fixed_value',
+    'min_quantity', 'min_amount', 'max_amount', 'start_date', 'end_date',
+    'target_categories', 'target_articles', 'target_customers',
+    'max_uses', 'max_uses_per_customer', 'current_uses',
+]
+CATALOGUE_FIELDS = [
+    'id', 'name', 'code', 'article_type', 'barcode', 'category_id', 'category_name',
+    'category_color', 'unit_symbol', 'selling_price', 'image_url',
+    'current_stock', 'available_stock', 'is_low_stock',
+]
+
+
+class BootstrapBundle:
+    """
+    Bundle de démarrage d'un magasin
+
+    Usage :
+        bundle = BootstrapBundle(store, request)
+        payload = bundle.get(since=request.query_params.get('since'))
+    """
+
+    def __init__(self, store, request):
+        self.store = store
+        self.request = request
+        self.locations = [store.pk] + [child.pk for child in store.get_children_recursive()]
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+
+    def version_sources(self):
+        """Tables dont dépend chaque section (libellés dénormalisés compris)"""
+        return {
+            'payment_methods': [PaymentMethod.objects.all()],
+            'categories': [Category.objects.all()],
+            'units': [UnitOfMeasure.objects.all()],
+            'discounts': [Discount.objects.all()],
+            'catalogue': [
+                Article.objects.all(),
+                ArticleImage.objects.all(),
+                Stock.objects.filter(location_id__in=self.locations),
+                # category_name, category_color, unit_symbol
+                Category.objects.all(),
+                UnitOfMeasure.objects.all(),
+            ],
+        }
+
+    def section_versions(self):
+        versions = {}
+        # Une table partagée par plusieurs sections n'est agrégée qu'une fois
+        aggregates = {}
+        for name, querysets in self.version_sources().items():
+            parts = []
+            for queryset in querysets:
+                key = (queryset.model, str(queryset.query))
+                if key not in aggregates:
+                    aggregates[key] = queryset_version(queryset)
+                last, count = aggregates[key]
+                parts += [last.isoformat() if last else '', count]
+            versions[name] = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:16]
+        return versions
+
+    def bundle_version(self, section_versions):
+        # La représentation dépend aussi de l'hôte (URL d'images), du format et de la langue
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        parts = [
+            self.store.pk, self.request.get_host(), getattr(renderer, 'format', ''),
+            get_language() or '',
+        ] + [f'{name}:{version}' for name, version in sorted(section_versions.items())]
+        return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+
+    # ------------------------------------------------------------------
+    # Sections
+    # ------------------------------------------------------------------
+
+    def _serialize(self, serializer_class, queryset, fields):
+        context = {'request': self.request, 'fields': fields}
+        return list(serializer_class(queryset, many=True, context=context).data)
+
+    def build_sections(self):
+        store_stock = Q(stock_entries__location_id__in=self.locations)
+        return {
+            'payment_methods': self._serialize(
+                PaymentMethodSerializer,
+                PaymentMethod.objects.filter(is_active=True, is_deleted=False).order_by('payment_type', 'name'),
+                PAYMENT_METHOD_FIELDS
+            ),
+            'categories': self._serialize(
+                CategorySerializer,
+                Category.objects.filter(is_active=True, is_deleted=False).select_related('parent'),
+                CATEGORY_FIELDS
+            ),
+            'units': self._serialize(
+                UnitOfMeasureSerializer,
+                UnitOfMeasure.objects.filter(is_active=True, is_deleted=False).order_by('name'),
+                UNIT_FIELDS
+            ),
+            # Les dates de validité sont transmises : la caisse filtre elle-même
+            'discounts': self._serialize(
+                DiscountSerializer,
+                Discount.objects.filter(is_active=True, is_deleted=False).filter(
+                    Q(end_date__isnull=True) | Q(end_date__gte=timezone.now())
+                ).prefetch_related('target_categories', 'target_articles', 'target_customers').order_by('name'),
+                DISCOUNT_FIELDS
+            ),
+            'catalogue': self._serialize(
+                ArticleListSerializer,
+                Article.objects.filter(
+                    is_active=True, is_sellable=True, is_deleted=False
+                ).select_related('category', 'unit_of_measure').prefetch_related('images').annotate(
+                    current_stock=Sum('stock_entries__quantity_on_hand', filter=store_stock),
+                    available_stock=Sum('stock_entries__quantity_available', filter=store_stock)
+                ).order_by('name'),
+                CATALOGUE_FIELDS
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # Bundle complet / delta
+    # ------------------------------------------------------------------
+
+    def get(self, since=None):
+        """
+        Retourne le bundle de la version courante, ou le delta depuis `since`
+        si cette version est encore en cache (sinon le bundle complet) ; le
+        delta depuis la version courante est vide
+        """
+        section_versions = self.section_versions()
+        version = self.bundle_version(section_versions)
+
+        bundle = cache.get(f'{CACHE_KEY_PREFIX}:{version}')
+        if bundle is None:
+            bundle = {
+                'version': version,
+                'store': {'id': str(self.store.pk), 'name': self.store.name, 'code': self.store.code},
+                'generated_at': timezone.now().isoformat(),
+                'section_versions': section_versions,
+                'sections': self.build_sections(),
+            }
+            self.store_bundle(bundle)
+
+        if since == version:
+            previous = bundle
+        else:
+            previous = cache.get(f'{CACHE_KEY_PREFIX}:{since}') if since else None
+        if previous is None or previous['store']['id'] != bundle['store']['id']:
+            return dict(bundle, delta=False)
+        return self.delta(previous, bundle)
+
+    def store_bundle(self, bundle):
+        """Met le bundle en cache et retire les versions les plus anciennes du magasin"""
+        timeout = gestore_setting('BOOTSTRAP_CACHE_TIMEOUT', 86400)
+        history_key = f'{CACHE_KEY_PREFIX}:versions:{self.store.pk}'
+        history = [
+            version for version in cache.get(history_key, []) if version != bundle['version']
+        ] + [bundle['version']]
+        kept = gestore_setting('BOOTSTRAP_KEPT_VERSIONS', 5)
+        cache.delete_many([f'{CACHE_KEY_PREFIX}:{version}' for version in history[:-kept]])
+        cache.set(f'{CACHE_KEY_PREFIX}:{bundle["version"]}', bundle, timeout)
+        cache.set(history_key, history[-kept:], timeout)
+
+    @staticmethod
+    def delta(previous, bundle):
+        """Lignes ajoutées/modifiées et identifiants supprimés, par section modifiée"""
+        sections = {}
+        for name, rows in bundle['sections'].items():
+            if previous['section_versions'].get(name) == bundle['section_versions'][name]:
+                continue
+            old_rows = {row['id']: row for row in previous['sections'].get(name, [])}
+            current_ids = {row['id'] for row in rows}
+            sections[name] = {
+                'updated': [row for row in rows if old_rows.get(row['id']) != row],
+                'removed': [row_id for row_id in old_rows if row_id not in current_ids],
+            }
+        return {
+            'version': bundle['version'],
+            'since': previous['version'],
+            'store': bundle['store'],
+            'generated_at': bundle['generated_at'],
+            'section_versions': bundle['section_versions'],
+            'delta': True,
+            'sections': sections,
+        }
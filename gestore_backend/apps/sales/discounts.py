@@ -0,0 +1,312 @@
+# apps/sales/discounts.py
+
+"""
+Moteur de remises compilé - GESTORE
+Les remises actives sont compilées en un index mémoire (par article, catégorie
+et client) reconstruit uniquement quand une remise change.
+Un panier complet est évalué en une seule passe sur ses lignes.
+"""
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Discount, SaleDiscount
+
+# Clé de version partagée entre les processus (incrémentée à chaque modification,
+# horodatée à la création : voir _index_version_value)
+INDEX_VERSION_KEY = 'sales:discount_index:version'
+
+
+class DiscountError(Exception):
+    """Remise demandée inconnue, expirée ou épuisée"""
+
+
+@dataclass
+class BasketLine:
+    """Ligne de panier vue par le moteur de remises"""
+    article_id: object
+    category_id: object
+    quantity: Decimal
+    amount: Decimal
+
+
+@dataclass
+class AppliedDiscount:
+    """Remise retenue pour un panier"""
+    discount: Discount
+    amount: Decimal
+
+
+@dataclass
+class BasketEvaluation:
+    """Résultat de l'évaluation d'un panier"""
+    applied: list = field(default_factory=list)
+
+    @property
+    def total(self):
+        return sum((a.amount for a in self.applied), Decimal('0.00'))
+
+
+class DiscountIndex:
+    """
+    Index compilé des remises actives
+
+    - by_article / by_category : remises à portée article / catégorie
+    - by_customer : remises à portée client avec clients ciblés
+    - customer_any : remises client sans cible (tout client identifié)
+    - cart : remises panier
+    - by_code : remises à code, indexées par code en majuscules (un code ne
+      désigne qu'une remise active : contrainte sales_discount_active_code_uniq)
+    """
+
+    def __init__(self, discounts, article_targets, category_targets, customer_targets):
+        self.discounts = {d.pk: d for d in discounts}
+        self.by_article = defaultdict(list)
+        self.by_category = defaultdict(list)
+        self.by_customer = defaultdict(list)
+        self.customer_any = []
+        self.cart = []
+        self.by_code = {}
+
+        for discount_id, article_id in article_targets:
+            if discount_id in self.discounts:
+                self.by_article[article_id].append(self.discounts[discount_id])
+        for discount_id, category_id in category_targets:
+            if discount_id in self.discounts:
+                self.by_category[category_id].append(self.discounts[discount_id])
+
+        targeted_customers = set()
+        for discount_id, customer_id in customer_targets:
+            if discount_id in self.discounts:
+                self.by_customer[customer_id].append(self.discounts[discount_id])
+                targeted_customers.add(discount_id)
+
+        for discount in self.discounts.values():
+            if discount.code:
+                self.by_code[discount.code.upper()] = discount
+            if discount.scope == 'cart':
+                self.cart.append(discount)
+            elif discount.scope == 'customer' and discount.pk not in targeted_customers:
+                self.customer_any.append(discount)
+
+    @classmethod
+    def build(cls):
+        """Compile les remises actives, non expirées et non épuisées (4 requêtes)"""
+        now = timezone.now()
+        discounts = list(
+            Discount.objects.filter(is_active=True, is_deleted=False).filter(
+                Q(end_date__isnull=True) | Q(end_date__gte=now)
+            ).filter(
+                Q(max_uses__isnull=True) | Q(current_uses__lt=F('max_uses'))
+            )
+        )
+        ids = [d.pk for d in discounts]
+        return cls(
+            discounts,
+            Discount.target_articles.through.objects.filter(
+                discount_id__in=ids
+            ).values_list('discount_id', 'article_id'),
+            Discount.target_categories.through.objects.filter(
+                discount_id__in=ids
+            ).values_list('discount_id', 'category_id'),
+            Discount.target_customers.through.objects.filter(
+                discount_id__in=ids
+            ).values_list('discount_id', 'customer_id'),
+        )
+
+    def resolve_codes(self, codes):
+        """Retourne les remises correspondant aux codes saisis"""
+        resolved = []
+        unknown = []
+        now = timezone.now()
+        for code in codes or []:
+            discount = self.by_code.get(code.strip().upper())
+            if discount is None or not _in_window(discount, now):
+                unknown.append(code)
+            else:
+                resolved.append(discount)
+        if unknown:
+            raise DiscountError(
+                f"Code(s) promotionnel(s) inconnu(s), expiré(s) ou épuisé(s) : {', '.join(unknown)}"
+            )
+        return resolved
+
+    def evaluate(self, lines, customer_id=None, codes=None):
+        """
+        Évalue un panier en une passe.
+        Les remises à code ne s'appliquent que si leur code est fourni ;
+        les autres sont automatiques.
+        """
+        now = timezone.now()
+        entered = {d.pk for d in self.resolve_codes(codes)}
+
+        def eligible(discount):
+            return (not discount.code or discount.pk in entered) and _in_window(discount, now)
+
+        # Regroupement des lignes par remise (une seule passe sur le panier)
+        groups = {}
+        basket_amount = Decimal('0.00')
+        basket_quantity = Decimal('0')
+        for line in lines:
+            basket_amount += line.amount
+            basket_quantity += line.quantity
+            matched = set()
+            for discount in self.by_article.get(line.article_id, ()):
+                if discount.scope == 'article':
+                    matched.add(discount.pk)
+            for discount in self.by_category.get(line.category_id, ()):
+                if discount.scope == 'category':
+                    matched.add(discount.pk)
+            for discount_id in matched:
+                amount, quantity = groups.get(discount_id, (Decimal('0.00'), Decimal('0')))
+                groups[discount_id] = (amount + line.amount, quantity + line.quantity)
+
+        for discount in self.cart:
+            groups[discount.pk] = (basket_amount, basket_quantity)
+        if customer_id:
+            for discount in self.customer_any + self.by_customer.get(customer_id, []):
+                if discount.scope == 'customer':
+                    groups[discount.pk] = (basket_amount, basket_quantity)
+
+        evaluation = BasketEvaluation()
+        remaining = basket_amount
+        for discount_id, (amount, quantity) in groups.items():
+            discount = self.discounts[discount_id]
+            if not eligible(discount) or remaining <= 0:
+                continue
+            value = min(discount.calculate_discount(amount, quantity), remaining)
+            if value > 0:
+                evaluation.applied.append(AppliedDiscount(discount, value))
+                remaining -= value
+
+        return evaluation
+
+
+def _in_window(discount, now):
+    if discount.start_date and now < discount.start_date:
+        return False
+    if discount.end_date and now > discount.end_date:
+        return False
+    return True
+
+
+# ========================
+# CACHE DE L'INDEX
+# ========================
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _index_version_value():
+    """
+    Version partagée actuelle. Une clé absente (jamais créée ou évincée du
+    cache) repart d'une valeur horodatée : elle ne retombe jamais sur une
+    version déjà compilée par un processus (voir authz._versions).
+    """
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(INDEX_VERSION_KEY)
+    return version
+
+
+def get_discount_index():
+    """
+    Retourne l'index compilé du processus, reconstruit si la version
+    partagée a changé depuis la dernière compilation
+    """
+    global _index, _index_version
+
+    version = _index_version_value()
+    # Sans version (cache inopérant), l'index n'est pas conservé
+    if _index is not None and version is not None and version == _index_version:
+        return _index
+
+    with _lock:
+        if _index is None or version is None or version != _index_version:
+            _index = DiscountIndex.build()
+            _index_version = version
+    return _index
+
+
+def invalidate_discount_index():
+    """Force la recompilation de l'index dans tous les processus"""
+    global _index
+    try:
+        cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.add(INDEX_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+    _index = None
+
+
+# ========================
+# CONSOMMATION
+# ========================
+
+def consume_discounts(evaluation, customer_id=None):
+    """
+    Réserve les utilisations des remises retenues.
+    - max_uses : compteur atomique (UPDATE conditionnel)
+    - max_uses_per_customer : une requête d'agrégat pour toutes les remises
+    Une remise automatique qui n'est plus utilisable est retirée de
+    l'évaluation (le total suit) ; seule une remise à code saisi lève
+    DiscountError. Une remise épuisée ici force la recompilation de l'index
+    à la validation de la transaction (l'UPDATE n'émet aucun signal).
+    À appeler dans la transaction de la vente.
+    """
+    def refuse(entry, message):
+        if entry.discount.code:
+            raise DiscountError(message)
+        evaluation.applied.remove(entry)
+
+    per_customer = [a.discount.pk for a in evaluation.applied if a.discount.max_uses_per_customer]
+    if per_customer and customer_id:
+        used = dict(
+            SaleDiscount.objects.filter(
+                discount_id__in=per_customer,
+                sale__customer_id=customer_id
+            ).values('discount_id').annotate(n=Count('id')).values_list('discount_id', 'n')
+        )
+        for entry in list(evaluation.applied):
+            limit = entry.discount.max_uses_per_customer
+            if limit and used.get(entry.discount.pk, 0) >= limit:
+                refuse(entry, f"Remise « {entry.discount.name} » déjà utilisée par ce client")
+
+    exhausted = False
+    for entry in list(evaluation.applied):
+        if entry.discount.max_uses is None:
+            continue
+        updated = Discount.objects.filter(
+            pk=entry.discount.pk,
+            current_uses__lt=F('max_uses')
+        ).update(current_uses=F('current_uses') + 1, updated_at=timezone.now())
+        if not updated:
+            exhausted = True
+            refuse(entry, f"Remise « {entry.discount.name} » épuisée")
+        elif Discount.objects.filter(pk=entry.discount.pk, current_uses__gte=F('max_uses')).exists():
+            exhausted = True
+
+    if exhausted:
+        transaction.on_commit(invalidate_discount_index)
+
+
+def record_sale_discounts(sale, evaluation, authorized_by=None):
+    """Écrit les remises appliquées à la vente en une requête"""
+    return SaleDiscount.objects.bulk_create([
+        SaleDiscount(
+            sale=sale,
+            discount=entry.discount,
+            amount=entry.amount,
+            authorized_by=authorized_by
+        )
+        for entry in evaluation.applied
+    ])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='offline_reference',
+            field=models.CharField(blank=True, db_index=True, help_text="Identifiant local (poste:numéro) d'une vente saisie hors connexion", max_length=100, verbose_name='Référence hors-ligne'),
+        ),
+    ]
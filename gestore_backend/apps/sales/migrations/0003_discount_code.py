@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_sale_offline_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='code',
+            field=models.CharField(blank=True, db_index=True, help_text='Code saisi en caisse. Laisser vide pour une remise automatique', max_length=50, verbose_name='Code promotionnel'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_discount_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sale_date', 'id'], name='sales_sale_sale_da_cddd75_idx'),
+        ),
+    ]
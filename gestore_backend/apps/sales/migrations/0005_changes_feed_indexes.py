@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_sale_cursor_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at', 'id'], name='sales_custo_updated_694c69_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['updated_at', 'id'], name='sales_disco_updated_f104dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentmethod',
+            index=models.Index(fields=['updated_at', 'id'], name='sales_payme_updated_0bf1de_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_changes_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='sale',
+            constraint=models.UniqueConstraint(condition=models.Q(('offline_reference', ''), _negated=True), fields=('offline_reference',), name='sales_sale_offline_reference_uniq'),
+        ),
+    ]
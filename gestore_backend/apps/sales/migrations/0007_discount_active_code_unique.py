@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:30
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_sale_offline_reference_unique'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='discount',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('code'), condition=models.Q(('is_active', True), ('is_deleted', False), models.Q(('code', ''), _negated=True)), name='sales_discount_active_code_uniq', violation_error_message='Ce code promotionnel est déjà utilisé par une remise active.'),
+        ),
+    ]
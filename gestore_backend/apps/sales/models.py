@@ -6,6 +6,7 @@ Système complet de point de vente, transactions et paiements
 MODIFICATION MAJEURE : Ajout du champ location pour tracer le magasin de chaque vente
 """
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -164,6 +165,25 @@ class Customer(BaseModel, NamedModel, ActivableModel):
         
         super().save(*args, **kwargs)
     
+    @classmethod
+    def bulk_prepare(cls, customers):
+        """
+        Équivalent de save() pour les écritures en masse : codes clients
+        attribués à la suite du dernier, en une seule requête
+        """
+        missing = [customer for customer in customers if not customer.customer_code]
+        if not missing:
+            return
+        
+        last_customer = cls.objects.order_by('customer_code').last()
+        try:
+            last_number = int(last_customer.customer_code[3:]) if last_customer else 0
+        except (ValueError, IndexError):
+            last_number = 0
+        
+        for offset, customer in enumerate(missing, start=1):
+            customer.customer_code = f"CLI{last_number + offset:06d}"
+    
     def get_full_name(self):
         """Retourne le nom complet du client"""
         if self.customer_type == 'company':
@@ -175,6 +195,9 @@ class Customer(BaseModel, NamedModel, ActivableModel):
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
         ordering = ['customer_code']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class PaymentMethod(BaseModel, NamedModel, ActivableModel):
@@ -241,6 +264,9 @@ class PaymentMethod(BaseModel, NamedModel, ActivableModel):
         verbose_name = 'Méthode de paiement'
         verbose_name_plural = 'Méthodes de paiement'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
 
 
 class Sale(AuditableModel):
@@ -411,6 +437,15 @@ class Sale(AuditableModel):
         verbose_name="Ticket envoyé par email"
     )
     
+    # Mode hors-ligne
+    offline_reference = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        verbose_name="Référence hors-ligne",
+        help_text="Identifiant local (poste:numéro) d'une vente saisie hors connexion"
+    )
+    
     def save(self, *args, **kwargs):
         if not self.sale_number:
             # Générer le numéro de vente
@@ -479,6 +514,15 @@ class Sale(AuditableModel):
             models.Index(fields=['customer', 'sale_date']),
             models.Index(fields=['cashier', 'sale_date']),
             models.Index(fields=['location', 'sale_date']),  # NOUVEL INDEX
+            models.Index(fields=['sale_date', 'id']),  # Pagination par curseur
+        ]
+        constraints = [
+            # Une vente hors-ligne n'est ingérée qu'une fois (rejeux concurrents d'un lot)
+            models.UniqueConstraint(
+                fields=['offline_reference'],
+                condition=~models.Q(offline_reference=''),
+                name='sales_sale_offline_reference_uniq'
+            ),
         ]
 
 
@@ -717,6 +761,14 @@ class Discount(BaseModel, NamedModel, ActivableModel):
         verbose_name="Portée de la remise"
     )
     
+    code = models.CharField(
+        max_length=50,
+        blank=True,
+        db_index=True,
+        verbose_name="Code promotionnel",
+        help_text="Code saisi en caisse. Laisser vide pour une remise automatique"
+    )
+    
     # Valeurs
     percentage_value = models.DecimalField(
         max_digits=5,
@@ -873,6 +925,18 @@ class Discount(BaseModel, NamedModel, ActivableModel):
         verbose_name = 'Remise'
         verbose_name_plural = 'Remises'
         ordering = ['-start_date', 'name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),  # Flux de changements (sync)
+        ]
+        constraints = [
+            # Un code saisi en caisse désigne une seule remise active
+            models.UniqueConstraint(
+                Upper('code'),
+                condition=models.Q(is_active=True, is_deleted=False) & ~models.Q(code=''),
+                name='sales_discount_active_code_uniq',
+                violation_error_message="Ce code promotionnel est déjà utilisé par une remise active."
+            ),
+        ]
 
 
 class SaleDiscount(BaseModel):
@@ -0,0 +1,455 @@
+# apps/sales/offline.py
+
+"""
+Ingestion par lot des ventes hors-ligne - GESTORE
+Rejoue en une seule transaction les ventes saisies par un poste déconnecté :
+validation groupée, attribution des numéros serveur, déstockage ensembliste
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.inventory.models import Article, Location, Stock, StockMovement
+from apps.sync.push import notify
+from .models import Customer, PaymentMethod, Sale, SaleItem, Payment, Receipt
+
+User = get_user_model()
+
+CENT = Decimal('0.01')
+
+# Tentatives d'attribution des numéros de vente en cas de collision concurrente
+NUMBERING_ATTEMPTS = 5
+
+
+class OfflineSaleIngestor:
+    """
+    Ingestion d'un lot de ventes hors-ligne
+
+    Chaque vente est validée indépendamment : une vente invalide est rejetée
+    sans bloquer les autres. Les ventes acceptées sont écrites avec bulk_create
+    et les stocks déduits en FIFO avec un seul bulk_update.
+    Le résultat est une liste ordonnée comme le lot reçu, une entrée par vente.
+    """
+
+    def __init__(self, user, node_id=''):
+        self.user = user
+        self.node_id = node_id or ''
+
+    def make_reference(self, local_number):
+        """Référence hors-ligne unique (poste:numéro local)"""
+        if self.node_id:
+            return f"{self.node_id}:{local_number}"
+        return str(local_number)
+
+    # ------------------------------------------------------------------
+    # Point d'entrée
+    # ------------------------------------------------------------------
+
+    def ingest(self, sales_data):
+        results = [None] * len(sales_data)
+        references = [self.make_reference(s['local_number']) for s in sales_data]
+
+        # Ventes déjà ingérées (rejeu d'un lot après coupure réseau)
+        already = dict(
+            Sale.objects.filter(offline_reference__in=set(references))
+            .values_list('offline_reference', 'sale_number')
+        )
+
+        lookups = self._load_references(sales_data)
+
+        accepted = []
+        seen = set()
+        for index, (data, reference) in enumerate(zip(sales_data, references)):
+            if reference in already:
+                results[index] = self._result(data, 'duplicate', sale_number=already[reference])
+                continue
+            if reference in seen:
+                results[index] = self._result(data, 'rejected', errors=['Numéro local en double dans le lot'])
+                continue
+            seen.add(reference)
+
+            prepared, errors = self._prepare_sale(data, reference, lookups)
+            if errors:
+                results[index] = self._result(data, 'rejected', errors=errors)
+            else:
+                accepted.append((index, prepared))
+
+        if accepted:
+            with transaction.atomic():
+                self._write(accepted, results)
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Chargement et validation
+    # ------------------------------------------------------------------
+
+    def _load_references(self, sales_data):
+        """Charge en une requête par table tous les objets référencés par le lot"""
+        article_ids, method_ids, customer_ids, location_ids, cashier_ids = set(), set(), set(), set(), set()
+        for sale in sales_data:
+            article_ids.update(str(i['article_id']) for i in sale['items'])
+            method_ids.update(str(p['payment_method_id']) for p in sale['payments'])
+            if sale.get('customer_id'):
+                customer_ids.add(str(sale['customer_id']))
+            if sale.get('location_id'):
+                location_ids.add(str(sale['location_id']))
+            if sale.get('cashier_id'):
+                cashier_ids.add(str(sale['cashier_id']))
+
+        return {
+            'articles': {
+                str(a.pk): a for a in Article.objects.filter(pk__in=article_ids).select_related('category')
+            },
+            'payment_methods': {
+                str(m.pk): m for m in PaymentMethod.objects.filter(pk__in=method_ids, is_active=True)
+            },
+            'customers': {
+                str(c.pk): c for c in Customer.objects.filter(pk__in=customer_ids)
+            },
+            'locations': {
+                str(l.pk): l for l in Location.objects.filter(pk__in=location_ids)
+            },
+            'cashiers': {
+                str(u.pk): u for u in User.objects.filter(pk__in=cashier_ids, is_active=True)
+            },
+        }
+
+    def _prepare_sale(self, data, reference, lookups):
+        """Construit la vente en mémoire (sans écriture) et retourne (vente, erreurs)"""
+        errors = []
+
+        location = self.user.assigned_store
+        if data.get('location_id'):
+            location = lookups['locations'].get(str(data['location_id']))
+        if location is None:
+            errors.append('Magasin introuvable ou non spécifié')
+
+        customer = None
+        if data.get('customer_id'):
+            customer = lookups['customers'].get(str(data['customer_id']))
+            if customer is None:
+                errors.append(f"Client {data['customer_id']} introuvable")
+
+        cashier = self.user
+        if data.get('cashier_id'):
+            cashier = lookups['cashiers'].get(str(data['cashier_id']))
+            if cashier is None:
+                errors.append(f"Caissier {data['cashier_id']} introuvable")
+
+        lines = []
+        for item_data in data['items']:
+            article = lookups['articles'].get(str(item_data['article_id']))
+            if article is None:
+                errors.append(f"Article {item_data['article_id']} introuvable")
+                continue
+            lines.append(self._build_line(article, item_data))
+
+        payments = []
+        for payment_data in data['payments']:
+            method = lookups['payment_methods'].get(str(payment_data['payment_method_id']))
+            if method is None:
+                errors.append(f"Moyen de paiement {payment_data['payment_method_id']} introuvable")
+                continue
+            payments.append((method, payment_data))
+
+        if errors:
+            return None, errors
+
+        subtotal = sum((line.line_total for line in lines), Decimal('0.00'))
+        tax_amount = sum((line.tax_amount for line in lines), Decimal('0.00'))
+        total_amount = subtotal + tax_amount
+        paid_amount = sum((p['amount'] for _, p in payments), Decimal('0.00'))
+
+        if paid_amount < total_amount:
+            return None, ['Le montant payé est insuffisant.']
+
+        sale = Sale(
+            sale_type='regular',
+            status='completed',
+            location=location,
+            customer=customer,
+            cashier=cashier,
+            sale_date=data['sale_date'],
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            total_amount=total_amount,
+            paid_amount=paid_amount,
+            change_amount=paid_amount - total_amount,
+            loyalty_points_earned=int(total_amount) if customer and total_amount > 0 else 0,
+            notes=data.get('notes', ''),
+            offline_reference=reference,
+            sync_status='synced',
+            created_by=self.user,
+        )
+        return {
+            'local_number': data['local_number'],
+            'sale': sale,
+            'lines': lines,
+            'payments': payments,
+        }, []
+
+    def _build_line(self, article, item_data):
+        """Même calcul que SaleItem.save(), sans écriture"""
+        quantity = item_data['quantity']
+        unit_price = item_data.get('unit_price')
+        if unit_price is None:
+            unit_price = article.selling_price
+        discount_percentage = item_data.get('discount_percentage') or Decimal('0')
+        tax_rate = article.category.tax_rate
+
+        gross_amount = quantity * unit_price
+        discount_amount = Decimal('0.00')
+        if discount_percentage > 0:
+            discount_amount = (gross_amount * (discount_percentage / Decimal('100'))).quantize(CENT)
+        line_total = (gross_amount - discount_amount).quantize(CENT)
+
+        return SaleItem(
+            article=article,
+            article_name=article.name,
+            article_code=article.code,
+            quantity=quantity,
+            unit_price=unit_price,
+            discount_percentage=discount_percentage,
+            discount_amount=discount_amount,
+            line_total=line_total,
+            tax_rate=tax_rate,
+            tax_amount=(line_total * (tax_rate / Decimal('100'))).quantize(CENT),
+            sync_status='synced',
+        )
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def _write(self, accepted, results):
+        # Ordre chronologique : numérotation et FIFO suivent la date réelle de vente
+        accepted.sort(key=lambda entry: entry[1]['sale'].sale_date)
+        accepted = self._create_sales(accepted, results)
+        if not accepted:
+            return
+
+        items, payments, receipts = [], [], []
+        for _, prepared in accepted:
+            sale = prepared['sale']
+            for line in prepared['lines']:
+                line.sale = sale
+                items.append(line)
+            for method, payment_data in prepared['payments']:
+                payments.append(Payment(
+                    sale=sale,
+                    payment_method=method,
+                    amount=payment_data['amount'],
+                    status='completed',
+                    reference_number=payment_data.get('reference_number', ''),
+                    payment_date=sale.sale_date,
+                    sync_status='synced',
+                    created_by=self.user,
+                ))
+            receipts.append(Receipt(
+                sale=sale,
+                receipt_number=f"REC-{sale.sale_number}",
+                footer_text="Merci de votre visite !",
+                sync_status='synced',
+            ))
+
+        SaleItem.objects.bulk_create(items)
+        Payment.objects.bulk_create(payments)
+        Receipt.objects.bulk_create(receipts)
+
+        shortfalls = self._deduct_stock(accepted)
+        self._update_customers(accepted)
+
+        for index, prepared in accepted:
+            sale = prepared['sale']
+            results[index] = self._result(
+                prepared,
+                'created',
+                sale_id=str(sale.pk),
+                sale_number=sale.sale_number,
+                total_amount=sale.total_amount,
+                stock_shortfalls=shortfalls.get(sale.pk, []),
+            )
+
+    def _create_sales(self, accepted, results):
+        """
+        Numérote puis insère les ventes ; retourne les ventes insérées.
+
+        Deux collisions possibles sur les contraintes d'unicité, chacune
+        annulant le point de sauvegarde :
+        - offline_reference : un rejeu concurrent du même lot a inséré la
+          vente entre la lecture des doublons et l'écriture ; elle est
+          signalée 'duplicate' et retirée du lot
+        - sale_number : le verrou de _allocate_numbers ne porte sur rien
+          quand le jour n'a encore aucune vente, un encaissement concurrent
+          a pu prendre le même numéro ; la numérotation est reprise
+        """
+        attempts = 0
+        while accepted:
+            sales = [prepared['sale'] for _, prepared in accepted]
+            self._allocate_numbers(sales)
+            try:
+                with transaction.atomic():
+                    Sale.objects.bulk_create(sales)
+                return accepted
+            except IntegrityError:
+                already = dict(
+                    Sale.objects.filter(offline_reference__in=[sale.offline_reference for sale in sales])
+                    .values_list('offline_reference', 'sale_number')
+                )
+                if already:
+                    remaining = []
+                    for index, prepared in accepted:
+                        reference = prepared['sale'].offline_reference
+                        if reference in already:
+                            results[index] = self._result(prepared, 'duplicate', sale_number=already[reference])
+                        else:
+                            remaining.append((index, prepared))
+                    accepted = remaining
+                    continue
+                attempts += 1
+                if attempts == NUMBERING_ATTEMPTS:
+                    raise
+        return accepted
+
+    def _allocate_numbers(self, sales):
+        """
+        Attribue les numéros VTE{AAAAMMJJ}{NNNN} en bloc.
+        Le préfixe suit la date de la vente ; la suite reprend après le
+        dernier numéro existant (verrouillé le temps de la transaction
+        lorsqu'il existe, voir _create_sales).
+        """
+        by_prefix = defaultdict(list)
+        for sale in sales:
+            sale_day = timezone.localtime(sale.sale_date).date()
+            by_prefix[f"VTE{sale_day.strftime('%Y%m%d')}"].append(sale)
+
+        for prefix, prefix_sales in by_prefix.items():
+            # Verrou sur la dernière vente du préfixe pour sérialiser avec le checkout
+            list(
+                Sale.objects.select_for_update()
+                .filter(sale_number__startswith=prefix)
+                .order_by('-sale_number')
+                .values_list('pk', flat=True)[:1]
+            )
+            last_number = Sale.objects.filter(
+                sale_number__startswith=prefix
+            ).aggregate(last=Max('sale_number'))['last']
+            try:
+                next_number = int(last_number[-4:]) + 1 if last_number else 1
+            except ValueError:
+                next_number = 1
+
+            for offset, sale in enumerate(prefix_sales):
+                sale.sale_number = f"{prefix}{next_number + offset:04d}"
+
+    def _deduct_stock(self, accepted):
+        """
+        Déstockage FIFO (péremption puis ancienneté) dans le magasin de chaque vente.
+        Une seule lecture verrouillée, un bulk_update et un bulk_create.
+        Une vente hors-ligne est un fait accompli : un stock insuffisant
+        n'annule pas la vente, le manque est signalé dans le résultat.
+        """
+        article_ids, location_ids = set(), set()
+        for _, prepared in accepted:
+            location_ids.add(prepared['sale'].location_id)
+            article_ids.update(line.article_id for line in prepared['lines'])
+
+        stocks_by_key = defaultdict(list)
+        stocks = (
+            Stock.objects.select_for_update()
+            .filter(article_id__in=article_ids, location_id__in=location_ids, quantity_on_hand__gt=0)
+            .order_by('expiry_date', 'created_at')
+        )
+        for stock in stocks:
+            stocks_by_key[(stock.article_id, stock.location_id)].append(stock)
+
+        now = timezone.now()
+        touched = {}
+        movements = []
+        shortfalls = defaultdict(list)
+
+        for _, prepared in accepted:
+            sale = prepared['sale']
+            for line in prepared['lines']:
+                remaining_qty = line.quantity
+                for stock in stocks_by_key.get((line.article_id, sale.location_id), []):
+                    if remaining_qty <= 0:
+                        break
+                    if stock.quantity_on_hand <= 0:
+                        continue
+
+                    qty_to_deduct = min(stock.quantity_on_hand, remaining_qty)
+                    movements.append(StockMovement(
+                        article_id=line.article_id,
+                        stock=stock,
+                        movement_type='out',
+                        reason='sale',
+                        quantity=qty_to_deduct,
+                        stock_before=stock.quantity_on_hand,
+                        stock_after=stock.quantity_on_hand - qty_to_deduct,
+                        reference_document=sale.sale_number,
+                        sync_status='synced',
+                        created_by=self.user,
+                    ))
+
+                    stock.quantity_on_hand -= qty_to_deduct
+                    stock.quantity_available = stock.quantity_on_hand - stock.quantity_reserved
+                    stock.updated_at = now
+                    touched[stock.pk] = stock
+                    remaining_qty -= qty_to_deduct
+
+                if remaining_qty > 0:
+                    shortfalls[sale.pk].append({
+                        'article_id': str(line.article_id),
+                        'missing_quantity': remaining_qty,
+                    })
+
+        if touched:
+            Stock.objects.bulk_update(
+                touched.values(),
+                ['quantity_on_hand', 'quantity_available', 'updated_at']
+            )
+            # bulk_update n'émet pas post_save : diffusion explicite aux caisses
+            notify('stock', touched.keys())
+        if movements:
+            StockMovement.objects.bulk_create(movements)
+
+        return shortfalls
+
+    def _update_customers(self, accepted):
+        """Statistiques client agrégées : une requête UPDATE par client"""
+        totals = {}
+        for _, prepared in accepted:
+            sale = prepared['sale']
+            if not sale.customer_id:
+                continue
+            entry = totals.setdefault(sale.customer_id, {
+                'amount': Decimal('0.00'), 'count': 0, 'points': 0, 'last': sale.sale_date,
+            })
+            entry['amount'] += sale.total_amount
+            entry['count'] += 1
+            entry['points'] += sale.loyalty_points_earned
+            entry['last'] = max(entry['last'], sale.sale_date)
+
+        for customer_id, entry in totals.items():
+            Customer.objects.filter(pk=customer_id).update(
+                total_purchases=F('total_purchases') + entry['amount'],
+                purchase_count=F('purchase_count') + entry['count'],
+                loyalty_points=F('loyalty_points') + entry['points'],
+                updated_at=timezone.now(),
+            )
+            # La date du dernier achat ne doit pas reculer
+            Customer.objects.filter(pk=customer_id).exclude(
+                last_purchase_date__gt=entry['last']
+            ).update(last_purchase_date=entry['last'])
+
+    @staticmethod
+    def _result(data, status, **extra):
+        result = {'local_number': str(data.get('local_number', '')), 'status': status}
+        result.update(extra)
+        return result
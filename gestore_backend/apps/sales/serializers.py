@@ -6,7 +6,9 @@ Gestion complète des ventes, clients et paiements avec optimisations
 """
 from rest_framework import serializers
 from django.utils import timezone
+from decimal import Decimal
 
+from apps.core.conf import gestore_setting
 from apps.core.serializers import (
     BaseModelSerializer, AuditableSerializer, NamedModelSerializer,
     ActivableModelSerializer
@@ -257,6 +259,7 @@ class DiscountSerializer(BaseModelSerializer, NamedModelSerializer, ActivableMod
     """
     discount_type = serializers.ChoiceField(choices=Discount.DISCOUNT_TYPES)
     scope = serializers.ChoiceField(choices=Discount.DISCOUNT_SCOPES)
+    code = serializers.CharField(max_length=50, required=False, allow_blank=True)
 
     percentage_value = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True)
     fixed_value = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
@@ -285,7 +288,7 @@ class DiscountSerializer(BaseModelSerializer, NamedModelSerializer, ActivableMod
     class Meta:
         model = Discount
         fields = [
-            'id', 'name', 'description', 'discount_type', 'scope',
+            'id', 'name', 'code', 'description', 'discount_type', 'scope',
             'percentage_value', 'fixed_value', 'min_quantity', 'min_amount',
             'max_amount', 'start_date', 'end_date', 'is_active',
             'status_display', 'created_at', 'updated_at',
@@ -294,6 +297,22 @@ class DiscountSerializer(BaseModelSerializer, NamedModelSerializer, ActivableMod
             'max_uses', 'max_uses_per_customer', 'current_uses'
         ]
 
+    def validate(self, attrs):
+        """Un code promotionnel ne désigne qu'une remise active (casse ignorée)"""
+        attrs = super().validate(attrs)
+        instance = self.instance
+        code = attrs.get('code', instance.code if instance else '')
+        is_active = attrs.get('is_active', instance.is_active if instance else True)
+        if code and is_active:
+            taken = Discount.objects.filter(code__iexact=code, is_active=True, is_deleted=False)
+            if instance is not None:
+                taken = taken.exclude(pk=instance.pk)
+            if taken.exists():
+                raise serializers.ValidationError({
+                    'code': 'Ce code promotionnel est déjà utilisé par une remise active.'
+                })
+        return attrs
+
 class SaleDiscountSerializer(BaseModelSerializer):
     """
     Serializer pour les remises appliquées à une vente
@@ -353,6 +372,15 @@ class SaleListSerializer(AuditableSerializer):
     is_paid = serializers.SerializerMethodField()
     balance = serializers.SerializerMethodField()
     
+    fast_read = True
+    
+    # Détails chargés à la demande (?expand=location,items,payments)
+    expandable_fields = {
+        'location': (LocationSerializer, {}),
+        'items': (SaleItemSerializer, {'many': True}),
+        'payments': (PaymentSerializer, {'many': True}),
+    }
+    
     class Meta:
         model = Sale
         fields = [
@@ -522,4 +550,65 @@ class ReturnSaleSerializer(serializers.Serializer):
     original_sale_id = serializers.CharField(required=True)
     items = serializers.ListField(child=serializers.DictField(), min_length=1)
     reason = serializers.CharField(required=True)
-    refund_method = serializers.CharField(required=True)
\ No newline at end of file
+    refund_method = serializers.CharField(required=True)
+
+# ========================
+# MODE HORS-LIGNE
+# ========================
+
+class OfflineSaleItemSerializer(serializers.Serializer):
+    """
+    Ligne d'une vente saisie hors-ligne
+    """
+    article_id = serializers.UUIDField()
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=3, min_value=Decimal('0.001'))
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    discount_percentage = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False
+    )
+
+
+class OfflinePaymentSerializer(serializers.Serializer):
+    """
+    Paiement d'une vente saisie hors-ligne
+    """
+    payment_method_id = serializers.UUIDField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    reference_number = serializers.CharField(required=False, allow_blank=True, max_length=100)
+
+
+class OfflineSaleSerializer(serializers.Serializer):
+    """
+    Vente terminée sur un poste déconnecté
+    """
+    local_number = serializers.CharField(max_length=50)
+    sale_date = serializers.DateTimeField()
+    location_id = serializers.UUIDField(required=False)
+    customer_id = serializers.UUIDField(required=False, allow_null=True)
+    cashier_id = serializers.UUIDField(required=False)
+    items = OfflineSaleItemSerializer(many=True, allow_empty=False)
+    payments = OfflinePaymentSerializer(many=True, allow_empty=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_sale_date(self, value):
+        """Une vente hors-ligne ne peut pas être dans le futur"""
+        if value > timezone.now() + timezone.timedelta(minutes=5):
+            raise serializers.ValidationError("La date de vente ne peut pas être dans le futur")
+        return value
+
+
+class OfflineSaleBatchSerializer(serializers.Serializer):
+    """
+    Lot de ventes hors-ligne envoyé par un poste à la reconnexion
+    """
+    node_id = serializers.CharField(max_length=45, required=False, allow_blank=True)
+    sales = OfflineSaleSerializer(many=True, allow_empty=False)
+
+    def validate_sales(self, value):
+        """Limite la taille du lot"""
+        max_sales = gestore_setting('OFFLINE_BATCH_MAX_SALES', 500)
+        if len(value) > max_sales:
+            raise serializers.ValidationError(
+                f"Un lot ne peut pas contenir plus de {max_sales} ventes"
+            )
+        return value
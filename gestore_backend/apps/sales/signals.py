@@ -0,0 +1,62 @@
+"""
+Signaux pour l'application sales - GESTORE
+Invalidation de l'index compilé des remises
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Discount
+from .discounts import invalidate_discount_index
+
+
+def _invalidate():
+    # Immédiatement, puis au commit : un autre processus a pu recompiler
+    # l'index entre-temps à partir des données encore non validées
+    invalidate_discount_index()
+    transaction.on_commit(invalidate_discount_index)
+
+
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+def discount_changed(sender, **kwargs):
+    """
+    Toute modification d'une remise invalide l'index des remises
+    """
+    _invalidate()
+
+
+@receiver(m2m_changed, sender=Discount.target_articles.through)
+@receiver(m2m_changed, sender=Discount.target_categories.through)
+@receiver(m2m_changed, sender=Discount.target_customers.through)
+def discount_targets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Modification des cibles (articles, catégories, clients) d'une remise
+    """
+    if action == 'pre_clear' and reverse:
+        # post_clear côté cible arrive sans pk_set : remises lues avant
+        instance._cleared_discount_ids = _discount_ids_targeting(sender, instance)
+        return
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate()
+        
+        # Les cibles font partie de la représentation : updated_at avance
+        # pour que la version (ETag) de la liste des remises change
+        if not reverse:
+            ids = [instance.pk]
+        elif action == 'post_clear':
+            ids = instance.__dict__.pop('_cleared_discount_ids', [])
+        else:
+            ids = pk_set or []
+        if ids:
+            Discount.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+
+def _discount_ids_targeting(through, target):
+    """Remises ciblant l'objet (table intermédiaire du m2m)"""
+    field = next(
+        f for f in through._meta.concrete_fields
+        if f.is_relation and f.related_model is type(target)
+    )
+    return list(through.objects.filter(**{field.name: target.pk}).values_list('discount_id', flat=True))
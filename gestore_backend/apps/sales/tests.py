@@ -671,4 +671,715 @@ class SalesWorkflowTest(APITestCase):
         # 5. Vérifier les statistiques client
         customer = Customer.objects.get(id=customer_id)
         self.assertEqual(customer.purchase_count, 1)
-        self.assertGreater(customer.total_purchases, Decimal('0.00'))
\ No newline at end of file
+        self.assertGreater(customer.total_purchases, Decimal('0.00'))
+
+# ========================
+# TESTS MODE HORS-LIGNE
+# ========================
+
+class OfflineBatchAPITest(APITestCase):
+    """Tests de l'ingestion par lot des ventes hors-ligne"""
+    
+    def setUp(self):
+        self.cashier_role = Role.objects.create(
+            name='Cashier',
+            role_type='cashier',
+            can_manage_sales=True
+        )
+        
+        self.location = Location.objects.create(
+            name='Magasin',
+            code='MAG01',
+            location_type='store',
+            is_active=True
+        )
+        
+        self.cashier = User.objects.create_user(
+            username='cashier',
+            email='cashier@example.com',
+            password='cashier123',
+            role=self.cashier_role,
+            assigned_store=self.location
+        )
+        self.client.force_authenticate(user=self.cashier)
+        
+        self.payment_method = PaymentMethod.objects.create(
+            name='Espèces',
+            payment_type='cash',
+            is_active=True
+        )
+        
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Test', code='TEST', is_active=True)
+        self.article = Article.objects.create(
+            name='Test Article',
+            code='ART001',
+            category=self.category,
+            unit_of_measure=self.unit,
+            purchase_price=Decimal('10.00'),
+            selling_price=Decimal('15.00'),
+            is_active=True,
+            is_sellable=True,
+            manage_stock=True
+        )
+        
+        self.stock = Stock.objects.create(
+            article=self.article,
+            location=self.location,
+            quantity_on_hand=Decimal('10.0'),
+            unit_cost=Decimal('10.00')
+        )
+        
+        self.url = reverse('sales:pos-offline-batch')
+    
+    def _sale(self, local_number, quantity=1, article_id=None, minutes_ago=30):
+        return {
+            'local_number': local_number,
+            'sale_date': (timezone.now() - timedelta(minutes=minutes_ago)).isoformat(),
+            'items': [{
+                'article_id': str(article_id or self.article.id),
+                'quantity': quantity
+            }],
+            'payments': [{
+                'payment_method_id': str(self.payment_method.id),
+                'amount': 15 * quantity
+            }]
+        }
+    
+    def test_batch_creates_sales_and_deducts_stock(self):
+        """Test ingestion d'un lot valide"""
+        data = {
+            'node_id': 'CAISSE-01',
+            'sales': [self._sale('L1', 2, minutes_ago=20), self._sale('L2', 3, minutes_ago=40)]
+        }
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['created'], 2)
+        self.assertEqual([r['local_number'] for r in response.data['results']], ['L1', 'L2'])
+        
+        # Numérotation dans l'ordre chronologique réel
+        first = Sale.objects.get(offline_reference='CAISSE-01:L2')
+        second = Sale.objects.get(offline_reference='CAISSE-01:L1')
+        self.assertLess(first.sale_number, second.sale_number)
+        self.assertEqual(second.total_amount, Decimal('30.00'))
+        self.assertEqual(second.items.count(), 1)
+        self.assertTrue(hasattr(second, 'receipt'))
+        
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity_on_hand, Decimal('5.0'))
+        self.assertEqual(self.stock.quantity_available, Decimal('5.0'))
+        self.assertEqual(self.stock.movements.count(), 2)
+    
+    def test_batch_replay_is_idempotent(self):
+        """Test rejeu d'un lot déjà ingéré"""
+        data = {'node_id': 'CAISSE-01', 'sales': [self._sale('L1', 2)]}
+        self.client.post(self.url, data, format='json')
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.data['results'][0]['status'], 'duplicate')
+        self.assertEqual(Sale.objects.count(), 1)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity_on_hand, Decimal('8.0'))
+    
+    def test_invalid_sale_does_not_block_batch(self):
+        """Test rejet individuel d'une vente invalide"""
+        import uuid
+        data = {'sales': [self._sale('L1'), self._sale('L2', article_id=uuid.uuid4())]}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        self.assertEqual(response.data['results'][1]['status'], 'rejected')
+        self.assertEqual(Sale.objects.count(), 1)
+    
+    def test_stock_shortfall_is_reported(self):
+        """Test vente hors-ligne au-delà du stock disponible"""
+        response = self.client.post(self.url, {'sales': [self._sale('L1', 12)]}, format='json')
+        
+        result = response.data['results'][0]
+        self.assertEqual(result['status'], 'created')
+        self.assertEqual(Decimal(str(result['stock_shortfalls'][0]['missing_quantity'])), Decimal('2'))
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity_on_hand, Decimal('0'))
+    
+    def test_query_count_independent_of_batch_size(self):
+        """Test nombre de requêtes constant quelle que soit la taille du lot"""
+        from django.test.utils import CaptureQueriesContext
+        from apps.authentication.authz import get_authorization
+        
+        self.stock.quantity_on_hand = Decimal('1000')
+        self.stock.save()
+        # Contexte d'autorisation chargé une fois, hors mesure
+        get_authorization(self.cashier)
+        
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, {'sales': [self._sale(f'A{i}') for i in range(2)]}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, {'sales': [self._sale(f'B{i}') for i in range(20)]}, format='json')
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+    
+    def test_concurrent_number_collision_is_retried(self):
+        """Test premier numéro du jour pris entre l'attribution et l'insertion"""
+        from unittest import mock
+        from .offline import OfflineSaleIngestor
+
+        allocate = OfflineSaleIngestor._allocate_numbers
+        racer = {}
+
+        def allocate_then_race(ingestor, sales):
+            allocate(ingestor, sales)
+            if not racer:
+                # Encaissement concurrent validé avec le même numéro
+                racer['sale'] = Sale.objects.create(
+                    sale_number=sales[0].sale_number, location=self.location, cashier=self.cashier
+                )
+
+        with mock.patch.object(OfflineSaleIngestor, '_allocate_numbers', allocate_then_race):
+            response = self.client.post(self.url, {'sales': [self._sale('L1')]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        sale = Sale.objects.get(offline_reference='L1')
+        self.assertEqual(int(sale.sale_number[-4:]), int(racer['sale'].sale_number[-4:]) + 1)
+
+    def test_concurrent_replay_reports_duplicate(self):
+        """Test rejeu concurrent : vente insérée entre la lecture des doublons et l'écriture"""
+        from unittest import mock
+        from .offline import OfflineSaleIngestor
+
+        allocate = OfflineSaleIngestor._allocate_numbers
+        racer = {}
+
+        def allocate_then_replay(ingestor, sales):
+            allocate(ingestor, sales)
+            if not racer:
+                # Rejeu concurrent du même lot, validé le premier
+                racer['sale'] = Sale.objects.create(
+                    location=self.location, cashier=self.cashier, offline_reference='CAISSE-01:L1'
+                )
+
+        data = {'node_id': 'CAISSE-01', 'sales': [self._sale('L1', 2), self._sale('L2', 1)]}
+        with mock.patch.object(OfflineSaleIngestor, '_allocate_numbers', allocate_then_replay):
+            response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data['results']
+        self.assertEqual(first['status'], 'duplicate')
+        self.assertEqual(first['sale_number'], racer['sale'].sale_number)
+        self.assertEqual(second['status'], 'created')
+        self.assertEqual(Sale.objects.filter(offline_reference='CAISSE-01:L1').count(), 1)
+        # Seule la vente créée est déstockée
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity_on_hand, Decimal('9.0'))
+
+    @override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'ENABLE_OFFLINE_MODE': False})
+    def test_disabled_offline_mode(self):
+        """Test endpoint refusé si le mode hors-ligne est désactivé"""
+        response = self.client.post(self.url, {'sales': [self._sale('L1')]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+# ========================
+# TESTS MOTEUR DE REMISES
+# ========================
+
+class DiscountEngineTest(APITestCase):
+    """Tests du moteur de remises compilé et de son intégration au checkout"""
+    
+    def setUp(self):
+        from .discounts import invalidate_discount_index
+        invalidate_discount_index()
+        
+        self.cashier_role = Role.objects.create(
+            name='Cashier',
+            role_type='cashier',
+            can_manage_sales=True
+        )
+        self.location = Location.objects.create(
+            name='Magasin',
+            code='MAG01',
+            location_type='store',
+            is_active=True
+        )
+        self.cashier = User.objects.create_user(
+            username='cashier',
+            email='cashier@example.com',
+            password='cashier123',
+            role=self.cashier_role,
+            assigned_store=self.location
+        )
+        self.client.force_authenticate(user=self.cashier)
+        
+        self.payment_method = PaymentMethod.objects.create(
+            name='Espèces',
+            payment_type='cash',
+            is_active=True
+        )
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Boissons', code='BOI', is_active=True)
+        self.other_category = Category.objects.create(name='Épicerie', code='EPI', is_active=True)
+        self.article = Article.objects.create(
+            name='Jus',
+            code='ART001',
+            category=self.category,
+            unit_of_measure=self.unit,
+            purchase_price=Decimal('50.00'),
+            selling_price=Decimal('100.00'),
+            is_active=True,
+            is_sellable=True
+        )
+        self.other_article = Article.objects.create(
+            name='Riz',
+            code='ART002',
+            category=self.other_category,
+            unit_of_measure=self.unit,
+            purchase_price=Decimal('50.00'),
+            selling_price=Decimal('100.00'),
+            is_active=True,
+            is_sellable=True
+        )
+        Stock.objects.create(article=self.article, location=self.location, quantity_on_hand=Decimal('100'))
+        Stock.objects.create(article=self.other_article, location=self.location, quantity_on_hand=Decimal('100'))
+    
+    def _lines(self):
+        from .discounts import BasketLine
+        return [
+            BasketLine(self.article.id, self.category.id, Decimal('2'), Decimal('200.00')),
+            BasketLine(self.other_article.id, self.other_category.id, Decimal('1'), Decimal('100.00')),
+        ]
+    
+    def test_category_discount_applies_to_matching_lines_only(self):
+        """Test remise catégorie limitée aux lignes ciblées"""
+        from .discounts import get_discount_index
+        discount = Discount.objects.create(
+            name='Boissons -10%', discount_type='percentage', scope='category',
+            percentage_value=Decimal('10'), is_active=True
+        )
+        discount.target_categories.add(self.category)
+        
+        evaluation = get_discount_index().evaluate(self._lines())
+        self.assertEqual(evaluation.total, Decimal('20.00'))
+    
+    def test_index_rebuilt_on_change(self):
+        """Test recompilation de l'index après modification d'une remise"""
+        from .discounts import get_discount_index
+        discount = Discount.objects.create(
+            name='Panier -5%', discount_type='percentage', scope='cart',
+            percentage_value=Decimal('5'), is_active=True
+        )
+        index = get_discount_index()
+        self.assertIs(get_discount_index(), index)
+        self.assertEqual(index.evaluate(self._lines()).total, Decimal('15.00'))
+        
+        discount.is_active = False
+        discount.save()
+        self.assertIsNot(get_discount_index(), index)
+        self.assertEqual(get_discount_index().evaluate(self._lines()).total, Decimal('0.00'))
+    
+    def test_evicted_version_does_not_reuse_stale_index(self):
+        """Test clé de version évincée : la nouvelle version diffère de celle compilée"""
+        from django.core.cache import cache
+        from .discounts import INDEX_VERSION_KEY, get_discount_index
+        index = get_discount_index()
+        cache.delete(INDEX_VERSION_KEY)
+        self.assertIsNot(get_discount_index(), index)
+    
+    def test_target_change_bumps_updated_at(self):
+        """Test modifier les cibles avance updated_at (version de la liste des remises)"""
+        discount = Discount.objects.create(
+            name='Jus -10%', discount_type='percentage', scope='article',
+            percentage_value=Decimal('10'), is_active=True
+        )
+        before = discount.updated_at
+        discount.target_articles.add(self.article)
+        discount.refresh_from_db()
+        self.assertGreater(discount.updated_at, before)
+    
+    def test_reverse_clear_bumps_updated_at(self):
+        """Test retirer un article de toutes ses remises avance leur updated_at"""
+        discount = Discount.objects.create(
+            name='Jus -10%', discount_type='percentage', scope='article',
+            percentage_value=Decimal('10'), is_active=True
+        )
+        discount.target_articles.add(self.article)
+        discount.refresh_from_db()
+        before = discount.updated_at
+        self.article.discount_set.clear()
+        discount.refresh_from_db()
+        self.assertGreater(discount.updated_at, before)
+    
+    def test_active_code_is_unique(self):
+        """Test un code promotionnel ne désigne qu'une remise active (casse ignorée)"""
+        from django.db import IntegrityError, transaction
+        from .serializers import DiscountSerializer
+        values = {'discount_type': 'fixed', 'scope': 'cart', 'fixed_value': Decimal('10')}
+        Discount.objects.create(name='Promo', code='PROMO10', is_active=True, **values)
+        
+        serializer = DiscountSerializer(data={'name': 'Promo bis', 'code': 'promo10', **values})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('code', serializer.errors)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Discount.objects.create(name='Promo bis', code='promo10', is_active=True, **values)
+        # Code libre pour une remise inactive
+        Discount.objects.create(name='Promo ancienne', code='PROMO10', is_active=False, **values)
+    
+    def test_code_discount_requires_code(self):
+        """Test remise à code appliquée uniquement si le code est fourni"""
+        from .discounts import get_discount_index, DiscountError
+        Discount.objects.create(
+            name='Promo', code='PROMO10', discount_type='fixed', scope='cart',
+            fixed_value=Decimal('10'), is_active=True
+        )
+        index = get_discount_index()
+        self.assertEqual(index.evaluate(self._lines()).total, Decimal('0.00'))
+        self.assertEqual(index.evaluate(self._lines(), codes=['promo10']).total, Decimal('10.00'))
+        with self.assertRaises(DiscountError):
+            index.evaluate(self._lines(), codes=['INCONNU'])
+    
+    def test_checkout_applies_discount_code(self):
+        """Test checkout avec code promotionnel et compteur d'utilisation"""
+        discount = Discount.objects.create(
+            name='Promo', code='PROMO10', discount_type='fixed', scope='cart',
+            fixed_value=Decimal('10'), max_uses=1, is_active=True
+        )
+        data = {
+            'items': [{'article_id': str(self.article.id), 'quantity': 1}],
+            'payments': [{'payment_method_id': str(self.payment_method.id), 'amount': 100}],
+            'discount_codes': ['PROMO10']
+        }
+        url = reverse('sales:pos-checkout')
+        
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        sale = Sale.objects.get(id=response.data['sale']['id'])
+        self.assertEqual(sale.discount_amount, Decimal('10.00'))
+        self.assertEqual(sale.total_amount, Decimal('90.00'))
+        self.assertEqual(sale.applied_discounts.count(), 1)
+        discount.refresh_from_db()
+        self.assertEqual(discount.current_uses, 1)
+        
+        # Remise épuisée : la vente est refusée
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('discount_codes', response.data)
+
+    def test_exhausted_automatic_discount_is_skipped(self):
+        """Test remise automatique épuisée : les ventes suivantes passent sans elle"""
+        from .discounts import get_discount_index
+        discount = Discount.objects.create(
+            name='Panier -10', discount_type='fixed', scope='cart',
+            fixed_value=Decimal('10'), max_uses=1, is_active=True
+        )
+        data = {
+            'items': [{'article_id': str(self.article.id), 'quantity': 1}],
+            'payments': [{'payment_method_id': str(self.payment_method.id), 'amount': 100}]
+        }
+        url = reverse('sales:pos-checkout')
+        # Index compilé avant la première vente (encore valable pour la seconde)
+        index = get_discount_index()
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            first = self.client.post(url, data, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Decimal(str(first.data['sale']['discount_amount'])), Decimal('10.00'))
+        
+        # Index périmé (recompilation non encore exécutée) : remise retirée au checkout
+        self.assertIs(get_discount_index(), index)
+        second = self.client.post(url, data, format='json')
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        sale = Sale.objects.get(id=second.data['sale']['id'])
+        self.assertEqual(sale.discount_amount, Decimal('0.00'))
+        self.assertEqual(sale.total_amount, Decimal('100.00'))
+        self.assertFalse(sale.applied_discounts.exists())
+        discount.refresh_from_db()
+        self.assertEqual(discount.current_uses, 1)
+        
+        # À la validation, l'index est recompilé sans la remise épuisée
+        for callback in callbacks:
+            callback()
+        self.assertIsNot(get_discount_index(), index)
+        self.assertEqual(get_discount_index().evaluate(self._lines()).total, Decimal('0.00'))
+
+
+# ========================
+# TESTS PAGINATION PAR CURSEUR
+# ========================
+
+class SaleKeysetPaginationTest(APITestCase):
+    """Tests de la pagination par curseur sur la liste des ventes"""
+    
+    def setUp(self):
+        self.admin_role = Role.objects.create(
+            name='Admin',
+            role_type='admin',
+            can_manage_sales=True
+        )
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            role=self.admin_role
+        )
+        self.client.force_authenticate(user=self.admin)
+        
+        self.location = Location.objects.create(
+            name='Magasin',
+            code='MAG01',
+            location_type='store',
+            is_active=True
+        )
+        
+        now = timezone.now()
+        # Deux ventes à la même date pour vérifier le départage par id
+        dates = [now - timedelta(hours=i) for i in range(4)] + [now - timedelta(hours=3)]
+        self.sales = [
+            Sale.objects.create(cashier=self.admin, location=self.location, sale_date=date)
+            for date in dates
+        ]
+        self.url = reverse('sales:sale-list')
+    
+    def _walk(self, params):
+        seen = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next_cursor']:
+                return seen, response
+            response = self.client.get(self.url, {**params, 'cursor': response.data['next_cursor']})
+    
+    def test_cursor_walk_returns_each_sale_once(self):
+        """Test parcours complet par curseur sans doublon ni trou"""
+        seen, _ = self._walk({'cursor': '', 'page_size': 2})
+        
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(set(seen), {str(s.id) for s in self.sales})
+    
+    def test_previous_cursor(self):
+        """Test retour à la page précédente"""
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 2})
+        second = self.client.get(self.url, {'cursor': first.data['next_cursor'], 'page_size': 2})
+        back = self.client.get(self.url, {'cursor': second.data['previous_cursor'], 'page_size': 2})
+        
+        self.assertEqual(
+            [r['id'] for r in back.data['results']],
+            [r['id'] for r in first.data['results']]
+        )
+    
+    def test_count_is_optional(self):
+        """Test total absent par défaut, présent sur demande"""
+        response = self.client.get(self.url, {'cursor': ''})
+        self.assertNotIn('count', response.data)
+        
+        response = self.client.get(self.url, {'cursor': '', 'count': 'approximate'})
+        self.assertEqual(response.data['count'], 5)
+    
+    def test_page_number_mode_unchanged(self):
+        """Test pagination par page conservée sans ?cursor="""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 5)
+        self.assertNotIn('next_cursor', response.data)
+    
+    def test_invalid_cursor(self):
+        """Test curseur invalide"""
+        response = self.client.get(self.url, {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SaleListFastReadTest(TestCase):
+    """Tests de l'équivalence du chemin de lecture rapide de SaleListSerializer"""
+    
+    def test_same_output_as_drf_path(self):
+        from unittest import mock
+        from rest_framework.renderers import JSONRenderer
+        
+        user = User.objects.create_user(username='cashier', password='test123', first_name='Awa')
+        location = Location.objects.create(name='Magasin', code='MAG01', location_type='store')
+        customer = Customer.objects.create(name='Client', first_name='Koffi', last_name='Yao')
+        sales = [
+            Sale.objects.create(cashier=user, location=location, customer=customer,
+                                total_amount=Decimal('99.90'), paid_amount=Decimal('50')),
+            Sale.objects.create(cashier=user, location=location),
+        ]
+        
+        renderer = JSONRenderer()
+        fast = renderer.render(SaleListSerializer(sales, many=True).data)
+        with mock.patch.object(SaleListSerializer, 'fast_read', False):
+            slow = renderer.render(SaleListSerializer(sales, many=True).data)
+        self.assertEqual(fast, slow)
+
+
+
+class POSBootstrapTest(APITestCase):
+    """Tests du bundle de démarrage des caisses"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.cashier_role = Role.objects.create(name='Cashier', role_type='cashier', can_manage_sales=True)
+        self.location = Location.objects.create(name='Magasin', code='MAG01', location_type='store')
+        self.shelf = Location.objects.create(
+            name='Rayon', code='RAY01', location_type='aisle', parent=self.location
+        )
+        self.other_store = Location.objects.create(name='Autre', code='MAG02', location_type='store')
+        self.cashier = User.objects.create_user(
+            username='cashier', password='cashier123',
+            role=self.cashier_role, assigned_store=self.location
+        )
+        self.client.force_authenticate(user=self.cashier)
+        
+        PaymentMethod.objects.create(name='Espèces', payment_type='cash', is_active=True)
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs', is_active=True)
+        self.category = Category.objects.create(name='Boissons', code='BOI', is_active=True)
+        self.article = Article.objects.create(
+            name='Jus', code='ART001', category=self.category, unit_of_measure=self.unit,
+            purchase_price=Decimal('50.00'), selling_price=Decimal('100.00'), is_sellable=True
+        )
+        self.other_article = Article.objects.create(
+            name='Riz', code='ART002', category=self.category, unit_of_measure=self.unit,
+            purchase_price=Decimal('50.00'), selling_price=Decimal('80.00'), is_sellable=True
+        )
+        Stock.objects.create(article=self.article, location=self.shelf, quantity_on_hand=Decimal('7'))
+        Stock.objects.create(article=self.article, location=self.other_store, quantity_on_hand=Decimal('50'))
+        self.url = reverse('sales:pos-bootstrap')
+    
+    def test_full_bundle(self):
+        """Test bundle complet avec le stock du seul magasin de la caisse"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['delta'])
+        self.assertEqual(
+            set(response.data['sections']),
+            {'payment_methods', 'categories', 'units', 'discounts', 'catalogue'}
+        )
+        catalogue = {row['code']: row for row in response.data['sections']['catalogue']}
+        self.assertEqual(Decimal(catalogue['ART001']['current_stock']), Decimal('7'))
+        self.assertEqual(catalogue['ART001']['category_id'], str(self.category.id))
+        self.assertEqual(response.data['store_context']['assigned_store']['code'], 'MAG01')
+        self.assertEqual(response['ETag'], f'"{response.data["version"]}"')
+    
+    def test_not_modified(self):
+        """Test 304 quand la caisse a déjà la version courante"""
+        etag = self.client.get(self.url)['ETag']
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_delta_since_previous_version(self):
+        """Test delta limité aux lignes modifiées et supprimées"""
+        version = self.client.get(self.url).data['version']
+        
+        self.article.selling_price = Decimal('110.00')
+        self.article.save()
+        self.other_article.is_sellable = False
+        self.other_article.save()
+        
+        response = self.client.get(self.url, {'since': version})
+        
+        self.assertTrue(response.data['delta'])
+        self.assertEqual(set(response.data['sections']), {'catalogue'})
+        catalogue = response.data['sections']['catalogue']
+        self.assertEqual([row['code'] for row in catalogue['updated']], ['ART001'])
+        self.assertEqual(catalogue['updated'][0]['selling_price'], '110.00')
+        self.assertEqual(catalogue['removed'], [str(self.other_article.id)])
+    
+    def test_delta_after_category_rename(self):
+        """Test renommer une catégorie met à jour les lignes du catalogue qui la citent"""
+        version = self.client.get(self.url).data['version']
+        
+        self.category.name = 'Boissons fraîches'
+        self.category.save()
+        
+        response = self.client.get(self.url, {'since': version})
+        
+        self.assertTrue(response.data['delta'])
+        self.assertEqual(set(response.data['sections']), {'categories', 'catalogue'})
+        catalogue = response.data['sections']['catalogue']
+        self.assertEqual(
+            {row['code']: row['category_name'] for row in catalogue['updated']},
+            {'ART001': 'Boissons fraîches', 'ART002': 'Boissons fraîches'}
+        )
+        self.assertEqual(catalogue['removed'], [])
+    
+    def test_since_current_version_is_empty_delta(self):
+        """Test caisse à jour : delta vide"""
+        version = self.client.get(self.url).data['version']
+        
+        response = self.client.get(self.url, {'since': version})
+        
+        self.assertTrue(response.data['delta'])
+        self.assertEqual(response.data['since'], version)
+        self.assertEqual(response.data['sections'], {})
+    
+    @override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'BOOTSTRAP_KEPT_VERSIONS': 2})
+    def test_old_versions_evicted(self):
+        """Test seules les dernières versions du magasin restent en cache"""
+        versions = []
+        for price in ('110.00', '120.00', '130.00'):
+            self.article.selling_price = Decimal(price)
+            self.article.save()
+            versions.append(self.client.get(self.url).data['version'])
+        
+        self.assertFalse(self.client.get(self.url, {'since': versions[0]}).data['delta'])
+        self.assertTrue(self.client.get(self.url, {'since': versions[1]}).data['delta'])
+    
+    def test_unknown_since_returns_full_bundle(self):
+        """Test version inconnue (expirée) : bundle complet"""
+        response = self.client.get(self.url, {'since': 'inconnue'})
+        self.assertFalse(response.data['delta'])
+    
+    def test_cached_bundle_not_rebuilt(self):
+        """Test un bundle inchangé est servi depuis le cache"""
+        from unittest import mock
+        from .bootstrap import BootstrapBundle
+        
+        self.client.get(self.url)
+        with mock.patch.object(BootstrapBundle, 'build_sections') as build:
+            self.client.get(self.url)
+        build.assert_not_called()
+    
+    def test_multi_store_admin_requires_store_id(self):
+        """Test un admin multi-magasins doit choisir le magasin"""
+        admin_role = Role.objects.create(name='Admin', role_type='admin', can_manage_sales=True)
+        admin = User.objects.create_user(username='admin', password='admin123', role=admin_role)
+        self.client.force_authenticate(user=admin)
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'store_id': str(self.other_store.id)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['store']['code'], 'MAG02')
+
+
+class CustomerBulkCreateTest(APITestCase):
+    """Tests de la création de clients en masse"""
+    
+    def setUp(self):
+        self.role = Role.objects.create(name='Manager', role_type='manager', can_manage_sales=True)
+        self.user = User.objects.create_user(username='manager', password='manager123', role=self.role)
+        self.client.force_authenticate(user=self.user)
+        Customer.objects.create(customer_type='individual', first_name='Awa', customer_code='CLI000041')
+    
+    def test_codes_assigned_in_sequence(self):
+        """Test codes clients attribués à la suite, comme save()"""
+        response = self.client.post(reverse('sales:customer-bulk'), [
+            {'name': 'Koffi', 'customer_type': 'individual', 'first_name': 'Koffi'},
+            {'name': 'SARL Test', 'customer_type': 'company', 'company_name': 'SARL Test'},
+        ], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([c['customer_code'] for c in response.data], ['CLI000042', 'CLI000043'])
+    
+    def test_validate_runs_per_item(self):
+        """Test validate() du serializer appliqué à chaque élément"""
+        response = self.client.post(reverse('sales:customer-bulk'), [
+            {'name': 'Koffi', 'customer_type': 'individual', 'first_name': 'Koffi'},
+            {'name': 'Sans raison sociale', 'customer_type': 'company'},
+        ], format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Customer.objects.count(), 1)
@@ -9,18 +9,23 @@ from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q, Sum, Count, F, Prefetch
-from django.db import transaction
+from django.db.models import Q, Sum, Count, Avg, F, Prefetch
+from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from decimal import Decimal
 
 # Import de la classe de base
 from apps.authentication.views import OptimizedModelViewSet
+from apps.core.conf import gestore_setting
 
 # 🔴 IMPORT DU MIXIN MULTI-MAGASINS
-from apps.core.mixins import StoreFilterMixin
+from apps.core.mixins import MultiStoreContextMixin, StoreFilterMixin
+from apps.core.pagination import KeysetPagination
 
 # Import des permissions
 from .permissions import (
@@ -36,9 +41,16 @@ from .serializers import (
     CustomerSerializer, CustomerListSerializer, PaymentMethodSerializer,
     SaleListSerializer, SaleDetailSerializer, SaleItemSerializer,
     PaymentSerializer, DiscountSerializer, ReceiptSerializer,
-    CheckoutSerializer, VoidSaleSerializer, ReturnSaleSerializer
+    CheckoutSerializer, VoidSaleSerializer, ReturnSaleSerializer,
+    OfflineSaleBatchSerializer
 )
-from apps.inventory.models import Article, Stock, StockMovement
+from .offline import OfflineSaleIngestor
+from .bootstrap import BootstrapBundle
+from .discounts import (
+    BasketLine, DiscountError, get_discount_index,
+    consume_discounts, record_sale_discounts
+)
+from apps.inventory.models import Article, Location, Stock, StockMovement
 
 
 class HealthCheckView(APIView):
@@ -70,6 +82,7 @@ class CustomerViewSet(OptimizedModelViewSet):
     """
     queryset = Customer.objects.all()
     permission_classes = [CanManageCustomers]
+    bulk_writes = True
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['customer_type', 'is_active', 'marketing_consent']
@@ -94,31 +107,24 @@ class CustomerViewSet(OptimizedModelViewSet):
         sales = Sale.objects.filter(
             customer=customer,
             status__in=['completed', 'partially_refunded']
-        ).select_related('cashier', 'location').prefetch_related('items').order_by('-sale_date')
-        
-        # Pagination
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        start = (page - 1) * page_size
-        end = start + page_size
+        ).select_related('cashier', 'location').prefetch_related('items').order_by('-sale_date', '-id')
         
-        serializer = SaleListSerializer(sales[start:end], many=True, context={'request': request})
+        # Pagination (par page, ou par curseur avec ?cursor=)
+        paginator = KeysetPagination(cursor_field='sale_date', page_size=20)
+        page = paginator.paginate_queryset(sales, request, view=self)
+        serializer = SaleListSerializer(page, many=True, context={'request': request})
         
         # Statistiques
         stats = sales.aggregate(
             total_spent=Sum('total_amount'),
             total_transactions=Count('id'),
-            average_basket=Sum('total_amount') / Count('id') if sales.count() > 0 else 0
+            average_basket=Avg('total_amount')
         )
         
-        return Response({
-            'customer': CustomerSerializer(customer).data,
-            'results': serializer.data,
-            'count': sales.count(),
-            'page': page,
-            'page_size': page_size,
-            'statistics': stats
-        })
+        data = paginator.get_paginated_data(serializer.data)
+        data['customer'] = CustomerSerializer(customer).data
+        data['statistics'] = stats
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def add_loyalty_points(self, request, pk=None):
@@ -177,6 +183,9 @@ class PaymentMethodViewSet(OptimizedModelViewSet):
     search_fields = ['name', 'payment_type']
     ordering_fields = ['name', 'payment_type', 'created_at']
     ordering = ['payment_type', 'name']
+    
+    # Données de référence : GET conditionnel
+    conditional_list = True
 
 
 # ========================
@@ -193,11 +202,15 @@ class DiscountViewSet(OptimizedModelViewSet):
     permission_classes = [CanApplyDiscounts]
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['discount_type', 'scope', 'is_active']
-    search_fields = ['name', 'description']
+    filterset_fields = ['discount_type', 'scope', 'is_active', 'code']
+    search_fields = ['name', 'code', 'description']
     ordering_fields = ['name', 'start_date', 'created_at']
     ordering = ['-start_date']
     
+    # Données de référence : GET conditionnel (cibles et compteur d'utilisation
+    # mettent à jour updated_at, voir signals.py et discounts.consume_discounts)
+    conditional_list = True
+    
     def get_queryset(self):
         """Filtrage des remises actives"""
         queryset = super().get_queryset()
@@ -252,6 +265,10 @@ class SaleViewSet(StoreFilterMixin, OptimizedModelViewSet):
     # 🔴 CONFIGURATION DU FILTRAGE MULTI-MAGASINS
     store_filter_field = 'location'  # Filtre sur Sale.location
     
+    # Pagination par curseur sur option (?cursor=)
+    pagination_class = KeysetPagination
+    cursor_field = 'sale_date'
+    
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'sale_type', 'customer', 'cashier', 'location']
     search_fields = ['sale_number', 'customer__customer_code', 'customer__first_name', 'customer__last_name']
@@ -265,12 +282,34 @@ class SaleViewSet(StoreFilterMixin, OptimizedModelViewSet):
         return SaleDetailSerializer
     
     def optimize_list_queryset(self, queryset):
-        """Optimisations pour la liste"""
-        return queryset.select_related(
-            'customer', 'cashier', 'location'
-        ).annotate(
-            items_count=Count('items')
-        )
+        """
+        Optimisations pour la liste
+        Jointures et agrégats limités aux champs de la réponse (?fields= / ?expand=)
+        """
+        related = []
+        if self.wants_fields('customer'):
+            related.append('customer')
+        if self.wants_fields('cashier'):
+            related.append('cashier')
+        if self.wants_fields('location_name', 'location_code') or self.wants_expand('location'):
+            related.append('location')
+        if related:
+            queryset = queryset.select_related(*related)
+        
+        if self.wants_expand('items'):
+            queryset = queryset.prefetch_related(
+                Prefetch('items', queryset=SaleItem.objects.select_related(
+                    'article__category', 'article__brand', 'article__unit_of_measure'
+                ))
+            )
+        if self.wants_expand('payments'):
+            queryset = queryset.prefetch_related(
+                Prefetch('payments', queryset=Payment.objects.select_related('payment_method'))
+            )
+        
+        if self.wants_fields('items_count'):
+            queryset = queryset.annotate(items_count=Count('items'))
+        return queryset
     
     def optimize_detail_queryset(self, queryset):
         """Optimisations pour le détail"""
@@ -408,7 +447,7 @@ class SaleViewSet(StoreFilterMixin, OptimizedModelViewSet):
 # CLASSE COMPLÈTE MODIFIÉE : POSViewSet
 # ========================
 
-class POSViewSet(StoreFilterMixin, viewsets.ViewSet):
+class POSViewSet(StoreFilterMixin, MultiStoreContextMixin, viewsets.ViewSet):
     """
     ViewSet COMPLET pour les opérations de point de vente
     🔴 MODIFIÉ : Ajout StoreFilterMixin + TOUTES les actions
@@ -450,19 +489,37 @@ class POSViewSet(StoreFilterMixin, viewsets.ViewSet):
                 )
 
                 # 2. Créer les lignes de vente
+                sale_items = []
                 for item_data in data['items']:
                     article = Article.objects.get(id=item_data['article_id'])
                     
-                    SaleItem.objects.create(
+                    sale_items.append(SaleItem.objects.create(
                         sale=sale,
                         article=article,
                         quantity=Decimal(str(item_data['quantity'])),
                         unit_price=Decimal(str(item_data.get('unit_price', article.selling_price))),
                         discount_percentage=Decimal(str(item_data.get('discount_percentage', 0)))
+                    ))
+
+                # 2bis. Remises automatiques et codes promotionnels (une passe sur le panier)
+                customer_pk = sale.customer.pk if sale.customer else None
+                try:
+                    evaluation = get_discount_index().evaluate(
+                        [
+                            BasketLine(item.article_id, item.article.category_id, item.quantity, item.line_total)
+                            for item in sale_items
+                        ],
+                        customer_id=customer_pk,
+                        codes=data.get('discount_codes')
                     )
+                    consume_discounts(evaluation, customer_pk)
+                except DiscountError as e:
+                    raise serializers.ValidationError({'discount_codes': str(e)})
+                sale.discount_amount = evaluation.total
 
                 # 3. Calculer les totaux
                 sale.calculate_totals()
+                record_sale_discounts(sale, evaluation, authorized_by=request.user)
 
                 # 4. Utiliser les points de fidélité si demandé
                 loyalty_points_to_use = data.get('loyalty_points_to_use', 0)
@@ -560,6 +617,87 @@ class POSViewSet(StoreFilterMixin, viewsets.ViewSet):
         except Exception as e:
             return Response({'error': f'Une erreur inattendue est survenue: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'], url_path='offline-batch')
+    def offline_batch(self, request):
+        """
+        Ingestion par lot des ventes saisies hors-ligne
+        Retourne un résultat par vente (created / duplicate / rejected),
+        dans l'ordre du lot reçu
+        """
+        if not gestore_setting('ENABLE_OFFLINE_MODE'):
+            return Response(
+                {'error': 'Le mode hors-ligne est désactivé'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = OfflineSaleBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        ingestor = OfflineSaleIngestor(request.user, node_id=data.get('node_id', ''))
+        try:
+            results = ingestor.ingest(data['sales'])
+        except IntegrityError:
+            # Numérotation toujours en collision : le lot est rejouable tel quel
+            return Response(
+                {'error': 'Numérotation des ventes en conflit, veuillez renvoyer le lot'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        summary = {
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'duplicate': sum(1 for r in results if r['status'] == 'duplicate'),
+            'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+        }
+
+        return Response({
+            'summary': summary,
+            'results': results
+        }, status=status.HTTP_207_MULTI_STATUS if summary['rejected'] else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def bootstrap(self, request):
+        """
+        Bundle de démarrage de la caisse en un seul appel
+        - ?store_id= : magasin (admins multi-magasins uniquement)
+        - ?since= : version déjà détenue, pour ne recevoir que les changements
+        La version est aussi renvoyée en ETag (If-None-Match -> 304).
+        """
+        user = request.user
+        if user.assigned_store:
+            store = user.assigned_store
+        elif user.is_multi_store_admin():
+            store_id = request.query_params.get('store_id')
+            if not store_id:
+                return Response(
+                    {'error': 'Paramètre store_id requis'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                store = Location.objects.get(id=store_id, location_type='store')
+            except (Location.DoesNotExist, DjangoValidationError):
+                return Response({'error': 'Magasin non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            return Response(
+                {'error': 'Aucun magasin assigné'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        payload = BootstrapBundle(store, request).get(since=request.query_params.get('since'))
+        etag = quote_etag(payload['version'])
+        
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        
+        # Contexte propre à l'utilisateur : jamais mis en cache avec le bundle
+        payload['store_context'] = self.get_store_context(user)
+        response = Response(payload)
+        response['ETag'] = etag
+        return response
+    
     @action(detail=False, methods=['post'])
     def quick_sale(self, request):
         """Vente rapide avec un seul article et paiement espèces"""
@@ -5,3 +5,9 @@ class SyncConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sync'
     verbose_name = 'Synchronization'
+
+    def ready(self):
+        """
+        Importer les signaux quand l'app est prête
+        """
+        import apps.sync.signals  # noqa
@@ -0,0 +1,169 @@
+"""
+Flux de changements - GESTORE
+Synchronisation incrémentale des caches clients : pour un modèle donné,
+retourne les lignes modifiées (upserts) et supprimées logiquement
+(tombstones) depuis un curseur.
+
+Le curseur porte le couple (updated_at, id) de la dernière ligne lue ; les
+pages sont lues par WHERE (updated_at, id) > curseur ORDER BY updated_at, id
+sur l'index (updated_at, id) de chaque modèle. Les lignes plus récentes que
+CHANGES_FEED_LAG_SECONDS ne sont pas encore servies : une transaction encore
+ouverte peut valider une ligne datée d'avant le curseur.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+
+from apps.core.conf import gestore_setting
+from apps.inventory.models import Article, Brand, Category, Location, Stock, UnitOfMeasure
+from apps.inventory.permissions import CanViewInventory
+from apps.inventory.serializers import (
+    BrandSerializer, CategorySerializer, LocationSerializer,
+    UnitOfMeasureSerializer
+)
+from apps.sales.models import Customer, Discount, PaymentMethod
+from apps.sales.permissions import CanManageCustomers, CanViewSales
+from apps.sales.serializers import CustomerListSerializer, DiscountSerializer, PaymentMethodSerializer
+
+from .serializers import ArticleChangeSerializer, StockChangeSerializer
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+
+
+@dataclass
+class ChangeFeed:
+    """Déclaration d'un flux de changements"""
+    model: type
+    serializer_class: type
+    permission_classes: list
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    # Champs renvoyés (None : représentation complète du serializer)
+    fields: list = None
+    # Champ emplacement pour limiter le flux au magasin de l'utilisateur
+    store_field: str = None
+    extra: dict = field(default_factory=dict)
+
+    def get_queryset(self):
+        queryset = self.model._default_manager.all()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+# Les compteurs de stock des articles ont leur propre flux ('stocks') ; les
+# libellés de catégorie, marque et unité sont lus dans leurs flux (jointure
+# par identifiant côté client) : un renommage ne modifie aucune ligne d'article
+_ARTICLE_FIELDS = [
+    name for name in ArticleChangeSerializer.Meta.fields
+    if name not in (
+        'current_stock', 'available_stock', 'is_low_stock',
+        'category_name', 'category_color', 'brand_name', 'unit_symbol',
+    )
+]
+
+FEEDS = {
+    'units': ChangeFeed(UnitOfMeasure, UnitOfMeasureSerializer, [CanViewInventory]),
+    'categories': ChangeFeed(
+        Category, CategorySerializer, [CanViewInventory], select_related=('parent',)
+    ),
+    'brands': ChangeFeed(Brand, BrandSerializer, [CanViewInventory]),
+    'articles': ChangeFeed(
+        Article, ArticleChangeSerializer, [CanViewInventory],
+        prefetch_related=('images',),
+        fields=_ARTICLE_FIELDS
+    ),
+    'locations': ChangeFeed(
+        Location, LocationSerializer, [CanViewInventory], select_related=('parent',)
+    ),
+    'stocks': ChangeFeed(Stock, StockChangeSerializer, [CanViewInventory], store_field='location'),
+    'payment-methods': ChangeFeed(PaymentMethod, PaymentMethodSerializer, [CanViewSales]),
+    'discounts': ChangeFeed(
+        Discount, DiscountSerializer, [CanViewSales],
+        prefetch_related=('target_categories', 'target_articles', 'target_customers')
+    ),
+    'customers': ChangeFeed(Customer, CustomerListSerializer, [CanManageCustomers]),
+}
+
+
+def get_feed(name):
+    try:
+        return FEEDS[name]
+    except KeyError:
+        raise NotFound(f"Flux de changements inconnu : {name}")
+
+
+# ========================
+# CURSEUR
+# ========================
+
+def encode_cursor(updated_at, pk):
+    raw = json.dumps({'t': updated_at.isoformat(), 'pk': str(pk)}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(encoded):
+    """Retourne (updated_at, pk), ou None pour lire depuis le début"""
+    if not encoded:
+        return None
+    try:
+        padded = encoded + '=' * (-len(encoded) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        updated_at = parse_datetime(payload['t'])
+        if updated_at is None:
+            raise ValueError
+        return updated_at, payload['pk']
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+        raise NotFound('Curseur invalide.')
+
+
+# ========================
+# LECTURE D'UNE PAGE
+# ========================
+
+def read_changes(feed, cursor=None, limit=DEFAULT_LIMIT, store_locations=None, context=None):
+    """
+    Lit une page du flux après le curseur
+
+    Returns:
+        dict: upserts, tombstones, next_cursor (inchangé s'il n'y a rien de nouveau), has_more
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    lag = gestore_setting('CHANGES_FEED_LAG_SECONDS', 2)
+
+    queryset = feed.get_queryset().filter(updated_at__lte=timezone.now() - timedelta(seconds=lag))
+    if feed.store_field and store_locations is not None:
+        queryset = queryset.filter(**{f'{feed.store_field}__in': store_locations})
+
+    position = decode_cursor(cursor)
+    if position:
+        updated_at, pk = position
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+
+    rows = list(queryset.order_by('updated_at', 'pk')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live = [row for row in rows if not row.is_deleted]
+    serializer_context = dict(context or {}, fields=feed.fields) if feed.fields else (context or {})
+    upserts = list(feed.serializer_class(live, many=True, context=serializer_context).data) if live else []
+    tombstones = [
+        {'id': str(row.pk), 'deleted_at': row.deleted_at.isoformat() if row.deleted_at else None}
+        for row in rows if row.is_deleted
+    ]
+
+    return {
+        'upserts': upserts,
+        'tombstones': tombstones,
+        'next_cursor': encode_cursor(rows[-1].updated_at, rows[-1].pk) if rows else cursor,
+        'has_more': has_more,
+    }
@@ -0,0 +1,217 @@
+"""
+Diffusion des changements aux caisses - GESTORE
+Les modifications de stock, de prix et d'alertes sont poussées aux postes
+par un flux SSE (voir StoreEventsView) au lieu d'être relues en boucle.
+
+- Écriture : les identifiants modifiés sont accumulés pendant la transaction
+  et publiés une seule fois au commit (valeurs relues après validation)
+- Publication : un journal par canal dans le cache partagé (un canal par
+  magasin, plus le canal global des prix) ; chaque lot reçoit un numéro de
+  séquence et expire après PUSH_EVENT_TTL
+- Lecture : chaque connexion relit le journal à intervalle fixe et fusionne
+  les lots reçus entre deux envois (dernière valeur par objet)
+
+Le cache doit être partagé entre les processus (Redis en production) ; avec
+LocMemCache, seuls les clients du processus qui écrit sont notifiés.
+"""
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.conf import gestore_setting
+from apps.inventory.models import Article, Location, Stock, StockAlert
+
+from .serializers import StockChangeSerializer
+
+# Canal des changements communs à tous les magasins (prix)
+GLOBAL_CHANNEL = 'all'
+
+_local = threading.local()
+
+
+def _seq_key(channel):
+    return f'push:{channel}:seq'
+
+
+def _batch_key(channel, seq):
+    return f'push:{channel}:{seq}'
+
+
+# ========================
+# PUBLICATION
+# ========================
+
+def notify(kind, ids):
+    """
+    Signale des objets modifiés ('stock', 'price' ou 'alert')
+    Hors transaction, la publication est immédiate ; sinon elle a lieu
+    une seule fois au commit, pour toute la transaction.
+    """
+    ids = set(ids)
+    if not ids:
+        return
+
+    if not transaction.get_connection().in_atomic_block:
+        publish_changes({kind: ids})
+        return
+
+    # Tampon du thread publié par le premier callback exécuté au commit ;
+    # les callbacks suivants le trouvent vide. Les identifiants d'une
+    # transaction annulée partent avec le commit suivant : les objets étant
+    # relus, seules les lignes existantes sont publiées (valeurs validées).
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = defaultdict(set)
+    pending[kind].update(ids)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    changes = getattr(_local, 'pending', None)
+    _local.pending = None
+    if changes:
+        publish_changes(changes)
+
+
+def publish_changes(changes):
+    """Relit les objets modifiés et publie un lot par canal"""
+    events = defaultdict(list)
+
+    if changes.get('stock'):
+        stocks = list(Stock.objects.filter(pk__in=changes['stock']))
+        stores = _stores_of({stock.location_id for stock in stocks})
+        for stock, row in zip(stocks, StockChangeSerializer(stocks, many=True).data):
+            if stores.get(stock.location_id):
+                events[stores[stock.location_id]].append({'type': 'stock', 'id': str(stock.pk), 'data': row})
+
+    if changes.get('price'):
+        for row in Article.objects.filter(pk__in=changes['price']).values(
+            'id', 'selling_price', 'purchase_price', 'is_active', 'is_sellable', 'updated_at'
+        ):
+            events[GLOBAL_CHANNEL].append({'type': 'price', 'id': str(row['id']), 'data': {
+                'id': str(row['id']),
+                'selling_price': str(row['selling_price']),
+                'purchase_price': str(row['purchase_price']),
+                'is_active': row['is_active'],
+                'is_sellable': row['is_sellable'],
+                'updated_at': row['updated_at'].isoformat(),
+            }})
+
+    if changes.get('alert'):
+        alerts = list(StockAlert.objects.filter(pk__in=changes['alert']).values(
+            'id', 'article_id', 'stock__location_id', 'alert_type', 'alert_level',
+            'message', 'is_acknowledged'
+        ))
+        stores = _stores_of({a['stock__location_id'] for a in alerts if a['stock__location_id']})
+        for alert in alerts:
+            channel = stores.get(alert['stock__location_id']) or GLOBAL_CHANNEL
+            events[channel].append({'type': 'alert', 'id': str(alert['id']), 'data': {
+                'id': str(alert['id']),
+                'article_id': str(alert['article_id']),
+                'location_id': str(alert['stock__location_id']) if alert['stock__location_id'] else None,
+                'alert_type': alert['alert_type'],
+                'alert_level': alert['alert_level'],
+                'message': alert['message'],
+                'is_acknowledged': alert['is_acknowledged'],
+            }})
+
+    ttl = gestore_setting('PUSH_EVENT_TTL', 300)
+    for channel, batch in events.items():
+        cache.add(_seq_key(channel), 0, timeout=None)
+        seq = cache.incr(_seq_key(channel))
+        cache.set(_batch_key(channel, seq), batch, timeout=ttl)
+
+
+def _stores_of(location_ids):
+    """
+    Magasin racine (identifiant texte) de chaque emplacement
+    Une requête par niveau de la hiérarchie, limitée aux ancêtres des
+    emplacements demandés.
+    """
+    stores = {}
+    # Emplacement courant de la remontée -> emplacements d'origine
+    pending = defaultdict(set)
+    for location_id in location_ids:
+        pending[location_id].add(location_id)
+    seen = set()
+    while pending:
+        seen.update(pending)
+        parents = defaultdict(set)
+        for pk, parent_id, location_type in Location.objects.filter(
+            pk__in=list(pending)
+        ).values_list('id', 'parent_id', 'location_type'):
+            if location_type == 'store':
+                for origin in pending[pk]:
+                    stores[origin] = str(pk)
+            elif parent_id is not None and parent_id not in seen:
+                parents[parent_id] |= pending[pk]
+        pending = parents
+    return stores
+
+
+# ========================
+# LECTURE
+# ========================
+
+def current_positions(channels):
+    """Dernier numéro de séquence de chaque canal (point de départ d'un abonné)"""
+    values = cache.get_many([_seq_key(channel) for channel in channels])
+    return {channel: values.get(_seq_key(channel), 0) for channel in channels}
+
+
+def collect_events(positions):
+    """
+    Lots publiés depuis les positions données, fusionnés
+
+    Un retard de plus de PUSH_MAX_GAP lots (Last-Event-ID ancien ou
+    forgé) n'est pas relu : les lots sont de toute façon expirés, la
+    position passe directement à la séquence courante et la perte est
+    signalée pour resynchronisation.
+
+    Returns:
+        tuple: (événements, nouvelles positions, lots expirés manqués)
+    """
+    max_gap = gestore_setting('PUSH_MAX_GAP', 1000)
+    sequences = cache.get_many([_seq_key(channel) for channel in positions])
+    wanted = {}
+    new_positions = dict(positions)
+    lost = False
+    for channel, last in positions.items():
+        seq = sequences.get(_seq_key(channel), 0)
+        if seq < last:
+            # Compteur réinitialisé (cache vidé) : repartir de sa valeur
+            new_positions[channel] = seq
+            continue
+        new_positions[channel] = seq
+        if seq - last > max_gap:
+            lost = True
+            continue
+        for number in range(last + 1, seq + 1):
+            wanted[_batch_key(channel, number)] = channel
+
+    batches = cache.get_many(list(wanted))
+    lost = lost or len(batches) < len(wanted)
+
+    # Dernière valeur par objet : une rafale sur un article ne donne qu'une ligne
+    merged = {}
+    for key in wanted:
+        for event in batches.get(key, ()):
+            merged[(event['type'], event['id'])] = event
+    return list(merged.values()), new_positions, lost
+
+
+def encode_positions(positions):
+    """Identifiant d'événement SSE (Last-Event-ID) : canal:séquence,..."""
+    return ','.join(f'{channel}:{seq}' for channel, seq in sorted(positions.items()))
+
+
+def decode_positions(value, channels):
+    """Inverse de encode_positions, restreint aux canaux de l'abonné"""
+    positions = {}
+    for part in (value or '').split(','):
+        channel, _, seq = part.rpartition(':')
+        if channel in channels and seq.isdigit():
+            positions[channel] = int(seq)
+    return positions
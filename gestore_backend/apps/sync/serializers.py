@@ -0,0 +1,42 @@
+"""
+Serializers pour l'application sync - GESTORE
+Représentations compactes utilisées par le flux de changements
+"""
+from rest_framework import serializers
+
+from apps.core.serializers import BaseModelSerializer
+from apps.inventory.models import Stock
+from apps.inventory.serializers import ArticleListSerializer
+
+
+class StockChangeSerializer(BaseModelSerializer):
+    """
+    Ligne de stock du flux de changements
+    Références par identifiant : articles et emplacements ont leur propre flux
+    """
+    article_id = serializers.CharField(read_only=True)
+    location_id = serializers.CharField(read_only=True)
+    
+    fast_read = True
+    
+    class Meta:
+        model = Stock
+        fields = [
+            'id', 'article_id', 'location_id', 'lot_number', 'expiry_date',
+            'quantity_on_hand', 'quantity_reserved', 'quantity_available',
+            'unit_cost', 'updated_at'
+        ]
+
+
+class ArticleChangeSerializer(ArticleListSerializer):
+    """
+    Ligne d'article du flux de changements
+    Références par identifiant : catégories, marques et unités ont leur propre
+    flux (les renommer n'avance pas updated_at des articles), les libellés
+    dénormalisés de la liste sont écartés par le flux (voir sync.changes)
+    """
+    brand_id = serializers.CharField(read_only=True)
+    unit_of_measure_id = serializers.CharField(read_only=True)
+    
+    class Meta(ArticleListSerializer.Meta):
+        fields = ArticleListSerializer.Meta.fields + ['brand_id', 'unit_of_measure_id']
@@ -0,0 +1,25 @@
+"""
+Signaux pour l'application sync - GESTORE
+Diffusion des changements de stock, de prix et d'alertes aux caisses
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.inventory.models import Article, Stock, StockAlert
+
+from .push import notify
+
+
+@receiver(post_save, sender=Stock)
+def stock_changed(sender, instance, **kwargs):
+    notify('stock', [instance.pk])
+
+
+@receiver(post_save, sender=Article)
+def article_changed(sender, instance, **kwargs):
+    notify('price', [instance.pk])
+
+
+@receiver(post_save, sender=StockAlert)
+def alert_changed(sender, instance, **kwargs):
+    notify('alert', [instance.pk])
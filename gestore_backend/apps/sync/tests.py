@@ -1,3 +1,310 @@
-from django.test import TestCase
+from decimal import Decimal
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.authentication.models import Role
+from apps.inventory.models import Article, Category, Location, Stock, UnitOfMeasure
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .push import GLOBAL_CHANNEL, collect_events, encode_positions
+
+User = get_user_model()
+
+NO_LAG = {**settings.GESTORE_SETTINGS, 'CHANGES_FEED_LAG_SECONDS': 0}
+
+
+@override_settings(GESTORE_SETTINGS=NO_LAG)
+class ChangesFeedTest(APITestCase):
+    """Tests du flux de changements"""
+    
+    def setUp(self):
+        self.role = Role.objects.create(name='Cashier', role_type='cashier', can_manage_sales=True)
+        self.store = Location.objects.create(name='Magasin', code='MAG01', location_type='store')
+        self.shelf = Location.objects.create(
+            name='Rayon', code='RAY01', location_type='aisle', parent=self.store
+        )
+        self.other_store = Location.objects.create(name='Autre', code='MAG02', location_type='store')
+        self.user = User.objects.create_user(
+            username='cashier', password='cashier123', role=self.role, assigned_store=self.store
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs')
+        self.category = Category.objects.create(name='Boissons', code='BOI')
+        self.articles = [
+            Article.objects.create(
+                name=f'Article {i}', code=f'ART{i:03d}', category=self.category,
+                unit_of_measure=self.unit, purchase_price=Decimal('50.00'),
+                selling_price=Decimal('100.00')
+            )
+            for i in range(5)
+        ]
+    
+    def _feed(self, feed, **params):
+        return self.client.get(reverse('sync:changes-feed', args=[feed]), params)
+    
+    def test_upserts_then_tombstones(self):
+        """Test lignes modifiées puis suppression logique depuis un curseur"""
+        response = self._feed('articles')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['upserts']), 5)
+        self.assertEqual(response.data['tombstones'], [])
+        self.assertFalse(response.data['has_more'])
+        self.assertNotIn('current_stock', response.data['upserts'][0])
+        cursor = response.data['next_cursor']
+        
+        # Rien de nouveau : le curseur est renvoyé tel quel
+        response = self._feed('articles', cursor=cursor)
+        self.assertEqual(response.data['upserts'], [])
+        self.assertEqual(response.data['next_cursor'], cursor)
+        
+        article = self.articles[0]
+        article.is_deleted = True
+        article.deleted_at = timezone.now()
+        article.save()
+        self.articles[1].selling_price = Decimal('120.00')
+        self.articles[1].save()
+        
+        response = self._feed('articles', cursor=cursor)
+        self.assertEqual([row['id'] for row in response.data['upserts']], [str(self.articles[1].id)])
+        self.assertEqual([row['id'] for row in response.data['tombstones']], [str(article.id)])
+    
+    def test_article_rows_reference_related_feeds(self):
+        """Test libellés de catégorie et d'unité lus dans leurs flux, pas dans les articles"""
+        row = self._feed('articles').data['upserts'][0]
+        
+        self.assertEqual(row['category_id'], str(self.category.id))
+        self.assertEqual(row['unit_of_measure_id'], str(self.unit.id))
+        self.assertIsNone(row['brand_id'])
+        for name in ('category_name', 'category_color', 'brand_name', 'unit_symbol'):
+            self.assertNotIn(name, row)
+        
+        cursor = self._feed('categories').data['next_cursor']
+        self.category.name = 'Boissons fraîches'
+        self.category.save()
+        response = self._feed('categories', cursor=cursor)
+        self.assertEqual([row['name'] for row in response.data['upserts']], ['Boissons fraîches'])
+    
+    def test_cursor_paging(self):
+        """Test pagination par curseur sans doublon ni oubli, horodatages égaux compris"""
+        Article.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        
+        seen = []
+        cursor = ''
+        while True:
+            response = self._feed('articles', cursor=cursor, limit=2)
+            seen.extend(row['id'] for row in response.data['upserts'])
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                break
+        
+        self.assertEqual(sorted(seen), sorted(str(a.id) for a in self.articles))
+        self.assertEqual(len(seen), len(set(seen)))
+    
+    def test_lag_holds_back_recent_rows(self):
+        """Test les lignes trop récentes ne sont pas encore servies"""
+        with self.settings(GESTORE_SETTINGS={**NO_LAG, 'CHANGES_FEED_LAG_SECONDS': 60}):
+            response = self._feed('articles')
+        
+        self.assertEqual(response.data['upserts'], [])
+    
+    def test_stocks_scoped_to_store(self):
+        """Test le flux de stock est limité au magasin de l'utilisateur"""
+        own = Stock.objects.create(article=self.articles[0], location=self.shelf, quantity_on_hand=Decimal('7'))
+        Stock.objects.create(article=self.articles[0], location=self.other_store, quantity_on_hand=Decimal('50'))
+        
+        response = self._feed('stocks')
+        
+        self.assertEqual([row['id'] for row in response.data['upserts']], [str(own.id)])
+        self.assertEqual(response.data['upserts'][0]['article_id'], str(self.articles[0].id))
+    
+    def test_unknown_feed_and_bad_cursor(self):
+        """Test flux inconnu et curseur invalide"""
+        self.assertEqual(self._feed('sales').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self._feed('articles', cursor='xyz').status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_feed_permissions(self):
+        """Test les flux de vente exigent la permission ventes"""
+        self.role.can_manage_sales = False
+        self.role.save()
+        
+        self.assertEqual(self._feed('discounts').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._feed('articles').status_code, status.HTTP_200_OK)
+
+
+PUSH_FAST = {**settings.GESTORE_SETTINGS, 'PUSH_INTERVAL_SECONDS': 0.01, 'PUSH_STREAM_MAX_SECONDS': 0.05}
+
+
+@override_settings(GESTORE_SETTINGS=PUSH_FAST)
+class StorePushTest(TestCase):
+    """Tests de la diffusion des changements aux caisses"""
+    
+    def setUp(self):
+        self.role = Role.objects.create(name='Cashier', role_type='cashier', can_manage_sales=True)
+        self.store = Location.objects.create(name='Magasin', code='MAG01', location_type='store')
+        self.shelf = Location.objects.create(
+            name='Rayon', code='RAY01', location_type='aisle', parent=self.store
+        )
+        self.other_store = Location.objects.create(name='Autre', code='MAG02', location_type='store')
+        self.user = User.objects.create_user(
+            username='cashier', password='cashier123', role=self.role, assigned_store=self.store
+        )
+        self.unit = UnitOfMeasure.objects.create(name='Pièce', symbol='pcs')
+        self.category = Category.objects.create(name='Boissons', code='BOI')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article = Article.objects.create(
+                name='Jus', code='ART001', category=self.category, unit_of_measure=self.unit,
+                purchase_price=Decimal('50.00'), selling_price=Decimal('100.00')
+            )
+        self.channels = [GLOBAL_CHANNEL, str(self.store.id), str(self.other_store.id)]
+        self.start = {channel: 0 for channel in self.channels}
+        cache.clear()
+    
+    def test_transaction_published_once_on_commit(self):
+        """Test une rafale dans une transaction donne un seul lot fusionné au commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                stock = Stock.objects.create(article=self.article, location=self.shelf, quantity_on_hand=Decimal('5'))
+                for quantity in ('4', '3', '2'):
+                    stock.quantity_on_hand = Decimal(quantity)
+                    stock.save()
+                Stock.objects.create(article=self.article, location=self.other_store, quantity_on_hand=Decimal('9'))
+        
+        events, positions, lost = collect_events({str(self.store.id): 0})
+        
+        self.assertFalse(lost)
+        self.assertEqual(positions, {str(self.store.id): 1})
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['type'], 'stock')
+        self.assertEqual(Decimal(events[0]['data']['quantity_available']), Decimal('2'))
+    
+    def _save_article(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+    
+    def test_price_on_global_channel(self):
+        """Test les prix sont diffusés à tous les magasins, fusionnés entre lots"""
+        for price in ('110.00', '120.00'):
+            self.article.selling_price = Decimal(price)
+            self._save_article()
+        
+        events, positions, _ = collect_events(self.start)
+        
+        self.assertEqual(positions[GLOBAL_CHANNEL], 2)
+        self.assertEqual([e['data']['selling_price'] for e in events], ['120.00'])
+    
+    def test_rollback_not_published(self):
+        """Test une transaction annulée ne publie rien"""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.article.selling_price = Decimal('1.00')
+                    self.article.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        
+        events, _, _ = collect_events(self.start)
+        self.assertEqual(events, [])
+    
+    def test_bulk_updates_published(self):
+        """Test activation en masse et acquittement en masse diffusés aux caisses"""
+        from rest_framework.test import APIClient
+        from apps.inventory.models import StockAlert
+        
+        stock = Stock.objects.create(article=self.article, location=self.shelf, quantity_on_hand=Decimal('1'))
+        alert = StockAlert.objects.create(
+            article=self.article, stock=stock, alert_type='low_stock', alert_level='warning', message='Bas'
+        )
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(
+            username='gerant', password='gerant123', assigned_store=self.store
+        ))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            # Vue des articles : formulaires seulement (images)
+            client.post(
+                reverse('inventory:article-bulk-operations'),
+                {'action': 'deactivate', 'ids': [str(self.article.id)]}, format='multipart'
+            )
+            client.post(
+                reverse('inventory:alert-bulk-acknowledge'), {'alert_ids': [str(alert.id)]}, format='json'
+            )
+        
+        events, _, _ = collect_events(self.start)
+        events = {event['type']: event['data'] for event in events}
+        self.assertFalse(events['price']['is_active'])
+        self.assertTrue(events['alert']['is_acknowledged'])
+    
+    def test_store_resolved_from_ancestors_only(self):
+        """Test magasin d'un emplacement : une requête par niveau, ancêtres seulement"""
+        from .push import _stores_of
+        bin_location = Location.objects.create(
+            name='Bac', code='BAC01', location_type='shelf', parent=self.shelf
+        )
+        
+        with self.assertNumQueries(3):
+            stores = _stores_of({bin_location.id, self.other_store.id})
+        
+        self.assertEqual(stores, {
+            bin_location.id: str(self.store.id),
+            self.other_store.id: str(self.other_store.id),
+        })
+    
+    def test_expired_batches_flag_resync(self):
+        """Test lots expirés signalés pour resynchronisation"""
+        self._save_article()
+        cache.delete(f'push:{GLOBAL_CHANNEL}:1')
+        
+        _, _, lost = collect_events(self.start)
+        self.assertTrue(lost)
+    
+    def test_large_gap_skipped_and_flagged(self):
+        """Test retard au-delà de PUSH_MAX_GAP : aucun lot relu, resynchronisation"""
+        from unittest import mock
+        
+        self._save_article()
+        self._save_article()
+        
+        with override_settings(GESTORE_SETTINGS={**settings.GESTORE_SETTINGS, 'PUSH_MAX_GAP': 1}):
+            with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+                events, positions, lost = collect_events({GLOBAL_CHANNEL: 0})
+        
+        self.assertTrue(lost)
+        self.assertEqual(events, [])
+        self.assertEqual(positions[GLOBAL_CHANNEL], 2)
+        self.assertEqual(get_many.call_args.args[0], [])
+    
+    async def test_event_stream(self):
+        """Test flux SSE des changements du magasin de l'utilisateur"""
+        await sync_to_async(self._save_article)()
+        token = str(RefreshToken.for_user(self.user).access_token)
+        start = encode_positions({GLOBAL_CHANNEL: 0, str(self.store.id): 0})
+        
+        response = await AsyncClient().get(
+            reverse('sync:store-events'),
+            headers={'Authorization': f'Bearer {token}', 'Last-Event-ID': start}
+        )
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: changes', body)
+        self.assertIn(str(self.article.id), body)
+        self.assertIn(f'{GLOBAL_CHANNEL}:1', body)
+    
+    async def test_event_stream_requires_auth(self):
+        """Test flux SSE refusé sans authentification"""
+        response = await AsyncClient().get(reverse('sync:store-events'))
+        self.assertEqual(response.status_code, 401)
@@ -7,5 +7,12 @@ from . import views
 app_name = 'sync'
 
 urlpatterns = [
-    # URLs à définir selon les besoins de l'application
+    path('health/', views.HealthCheckView.as_view(), name='health'),
+    
+    # Flux de changements (synchronisation incrémentale des caches clients)
+    path('changes/', views.ChangesFeedIndexView.as_view(), name='changes-index'),
+    path('changes/<slug:feed>/', views.ChangesFeedView.as_view(), name='changes-feed'),
+    
+    # Diffusion SSE des changements aux caisses (ASGI)
+    path('events/', views.StoreEventsView.as_view(), name='store-events'),
 ]
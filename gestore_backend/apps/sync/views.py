@@ -1,11 +1,29 @@
 """
-Vues pour l'application sync
+Vues pour l'application sync - GESTORE
 """
-from rest_framework.viewsets import ModelViewSet
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-# Les vues seront définies dans les prochaines phases
+from apps.core.conf import gestore_setting
+from apps.inventory.models import Location
+
+from .changes import DEFAULT_LIMIT, FEEDS, get_feed, read_changes
+from .push import (
+    GLOBAL_CHANNEL, collect_events, current_positions, decode_positions,
+    encode_positions
+)
+
 
 class HealthCheckView(APIView):
     """Vue de vérification de santé pour sync"""
@@ -13,3 +31,149 @@ class HealthCheckView(APIView):
     
     def get(self, request):
         return Response({"status": "ok", "app": "sync"})
+
+
+# ========================
+# FLUX DE CHANGEMENTS
+# ========================
+
+class ChangesFeedIndexView(APIView):
+    """Liste des flux de changements disponibles"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response({'feeds': sorted(FEEDS)})
+
+
+class ChangesFeedView(APIView):
+    """
+    Flux de changements d'un modèle
+    - ?cursor= : curseur renvoyé par l'appel précédent (vide : depuis le début)
+    - ?limit= : taille de page (200 par défaut, 1000 maximum)
+    - ?store_id= : magasin (admins multi-magasins, flux limités au magasin)
+    Le client rappelle avec next_cursor tant que has_more est vrai.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, feed):
+        change_feed = get_feed(feed)
+        # Les permissions dépendent du flux demandé
+        for permission_class in change_feed.permission_classes:
+            permission = permission_class()
+            if not permission.has_permission(request, self):
+                self.permission_denied(request, message=getattr(permission, 'message', None))
+        
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        
+        store_locations = self._store_locations(request) if change_feed.store_field else None
+        data = read_changes(
+            change_feed,
+            cursor=request.query_params.get('cursor'),
+            limit=limit,
+            store_locations=store_locations,
+            context={'request': request, 'view': self}
+        )
+        return Response({'feed': feed, **data})
+    
+    def _store_locations(self, request):
+        """
+        Emplacements visibles par l'utilisateur (mêmes règles que StoreFilterMixin)
+        None : pas de restriction (admin multi-magasins sans store_id)
+        """
+        user = request.user
+        if user.assigned_store:
+            store = user.assigned_store
+        elif user.is_multi_store_admin():
+            store_id = request.query_params.get('store_id')
+            if not store_id:
+                return None
+            try:
+                store = Location.objects.get(id=store_id, location_type='store')
+            except (Location.DoesNotExist, DjangoValidationError):
+                return []
+        else:
+            return []
+        return [store.id] + [child.id for child in store.get_children_recursive()]
+
+
+# ========================
+# DIFFUSION SSE
+# ========================
+
+class StoreEventsView(View):
+    """
+    Flux SSE des changements de stock, de prix et d'alertes d'un magasin
+    (text/event-stream, à servir par gestore.asgi)
+
+    Événements :
+    - changes : {"events": [{"type", "id", "data"}, ...]} fusionnés par intervalle
+    - resync : des lots ont expiré avant d'être lus, le client repasse par
+      le flux de changements (/api/sync/changes/)
+    L'en-tête Last-Event-ID permet de reprendre après une reconnexion.
+    """
+    
+    async def get(self, request):
+        user = await sync_to_async(self._authenticate)(request)
+        if user is None:
+            return JsonResponse({'detail': "Informations d'authentification non fournies."}, status=401)
+        
+        channels = await sync_to_async(self._channels)(user, request.GET.get('store_id'))
+        if channels is None:
+            return JsonResponse({'error': 'Magasin non trouvé'}, status=404)
+        
+        positions = await sync_to_async(current_positions)(channels)
+        positions.update(decode_positions(request.headers.get('Last-Event-ID'), channels))
+        
+        response = StreamingHttpResponse(self._stream(positions), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Pas de mise en tampon par nginx
+        return response
+    
+    def _authenticate(self, request):
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        )
+        user = drf_request.user
+        return user if user and user.is_authenticated else None
+    
+    def _channels(self, user, store_id):
+        """Canal global, plus celui du magasin de l'utilisateur (ou ?store_id= pour les admins)"""
+        if user.assigned_store_id:
+            return [GLOBAL_CHANNEL, str(user.assigned_store_id)]
+        if not user.is_multi_store_admin() or not store_id:
+            return [GLOBAL_CHANNEL]
+        try:
+            store = Location.objects.get(id=store_id, location_type='store')
+        except (Location.DoesNotExist, DjangoValidationError):
+            return None
+        return [GLOBAL_CHANNEL, str(store.id)]
+    
+    async def _stream(self, positions):
+        interval = gestore_setting('PUSH_INTERVAL_SECONDS', 1)
+        keepalive = gestore_setting('PUSH_KEEPALIVE_SECONDS', 15)
+        loop = asyncio.get_running_loop()
+        # Durée bornée : le client se reconnecte (Last-Event-ID) et les
+        # connexions se répartissent à nouveau entre les workers
+        deadline = loop.time() + gestore_setting('PUSH_STREAM_MAX_SECONDS', 3600)
+        
+        yield f'retry: {int(interval * 3000)}\n\n'
+        idle = 0
+        while loop.time() < deadline:
+            await asyncio.sleep(interval)
+            events, positions, lost = await sync_to_async(collect_events)(positions)
+            event_id = encode_positions(positions)
+            if lost:
+                yield f'id: {event_id}\nevent: resync\ndata: {{}}\n\n'
+            if events:
+                data = json.dumps({'events': events}, cls=encoders.JSONEncoder, separators=(',', ':'))
+                yield f'id: {event_id}\nevent: changes\ndata: {data}\n\n'
+                idle = 0
+            else:
+                idle += interval
+                if idle >= keepalive:
+                    yield ': keepalive\n\n'
+                    idle = 0
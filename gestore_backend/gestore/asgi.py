@@ -3,6 +3,9 @@ ASGI config for gestore project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Le flux SSE des caisses (/api/sync/events/) est une vue asynchrone : servi
+en ASGI (uvicorn, daphne), chaque connexion ouverte ne mobilise pas de thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
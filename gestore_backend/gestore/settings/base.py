@@ -2,6 +2,7 @@
 Configuration Django de base pour GESTORE - MISE À JOUR
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
 
@@ -43,14 +44,17 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestMetricsMiddleware',  # Métriques par route (/api/metrics/)
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.CompressionMiddleware',  # brotli / gzip des grosses réponses
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',  # Profilage à la demande (/api/profiling/)
 ]
 
 ROOT_URLCONF = 'gestore.urls'
@@ -72,6 +76,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'gestore.wsgi.application'
+ASGI_APPLICATION = 'gestore.asgi.application'
 
 # Internationalization
 LANGUAGE_CODE = 'fr-fr'
@@ -94,13 +99,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.GestoreJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.StreamingJSONRenderer',  # ?format=jsonstream
+        # Formats binaires des postes desktop (dépendances optionnelles)
+        *(['apps.core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        *(['apps.core.renderers.CBORRenderer'] if find_spec('cbor2') else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *(['apps.core.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+        *(['apps.core.parsers.CBORParser'] if find_spec('cbor2') else []),
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
@@ -119,6 +135,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Droits de l'utilisateur embarqués dans le jeton (voir apps.authentication.tokens)
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.serializers.GestoreTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -166,6 +184,47 @@ GESTORE_SETTINGS = {
     'BUILD_NUMBER': '001',
     'ENABLE_SYNC': True,
     'ENABLE_OFFLINE_MODE': True,
+    'OFFLINE_BATCH_MAX_SALES': 500,  # Ventes max par lot d'ingestion hors-ligne
+    'COMPRESSION_MIN_SIZE': 1024,  # Octets en dessous desquels une réponse n'est pas compressée
+    'BROTLI_QUALITY': 5,  # 0-11 : compromis temps CPU / taille pour du contenu dynamique
+    'CONDITIONAL_CACHE_TIMEOUT': 300,  # Secondes de cache serveur par version (ETag) de liste
+    'BOOTSTRAP_CACHE_TIMEOUT': 86400,  # Conservation des bundles de caisse (deltas ?since=)
+    'BOOTSTRAP_KEPT_VERSIONS': 5,  # Versions de bundle conservées par magasin
+    'CHANGES_FEED_LAG_SECONDS': 2,  # Retenue du flux de changements (transactions encore ouvertes)
+    'BULK_MAX_ITEMS': 1000,  # Taille maximale d'un lot d'écritures en masse (/bulk/)
+    'BATCH_MAX_REQUESTS': 20,  # Sous-requêtes par appel groupé (/api/batch/)
+    'BATCH_MAX_WORKERS': 4,  # Lectures exécutées en parallèle dans un appel groupé
+    'PUSH_INTERVAL_SECONDS': 1,  # Fenêtre de regroupement des événements poussés aux caisses
+    'PUSH_EVENT_TTL': 300,  # Conservation des lots d'événements (reprise après reconnexion)
+    'PUSH_MAX_GAP': 1000,  # Lots rattrapés au plus à la reprise ; au-delà, resynchronisation
+    'PUSH_KEEPALIVE_SECONDS': 15,
+    'PUSH_STREAM_MAX_SECONDS': 3600,  # Durée maximale d'une connexion SSE
+    'WRITE_BEHIND_ENABLED': True,  # Sessions, journaux et compteurs écrits hors requête, par lots
+    'WRITE_BEHIND_INTERVAL_MS': 500,  # Fenêtre de regroupement des écritures différées
+    'WRITE_BEHIND_BATCH_SIZE': 200,
+    'WRITE_BEHIND_QUEUE_SIZE': 10000,  # Au-delà, les opérations vont au fichier de reprise
+    'WRITE_BEHIND_SPOOL_DIR': BASE_DIR / 'var' / 'write_behind',  # Reprise après panne ou arrêt
+    'LOGIN_MAX_FAILURES': 5,  # Échecs par utilisateur dans la fenêtre avant verrouillage
+    'LOGIN_MAX_FAILURES_PER_IP': 20,  # Échecs par adresse IP avant refus (429)
+    'LOGIN_FAILURE_WINDOW_SECONDS': 900,  # Fenêtre glissante des compteurs d'échecs
+    'LOGIN_LOCKOUT_MINUTES': 30,
+    'AUTHZ_CACHE_TIMEOUT': 60,  # Cache du rôle, des permissions et des magasins d'un utilisateur
+    'SESSION_IDLE_MINUTES': 480,  # Session terminée sans rafraîchissement du jeton pendant ce délai
+    'SESSION_MAX_HOURS': 168,  # Durée maximale d'une session (durée de vie du jeton de rafraîchissement)
+    'SESSION_RETENTION_DAYS': 90,  # Au-delà, sessions agrégées dans UserLoginDaily puis supprimées
+    'SESSION_SWEEP_BATCH_SIZE': 1000,
+    'METRICS_ENABLED': True,  # Histogrammes par route exposés sur /api/metrics/
+    'METRICS_TOKEN': config('METRICS_TOKEN', default=''),  # Jeton Bearer du collecteur Prometheus
+    'PROFILING_TOKEN': config('PROFILING_TOKEN', default=''),  # En-tête X-Gestore-Profile (vide : désactivé)
+    'PROFILING_ENGINE': 'cprofile',  # ou 'pyinstrument' (échantillonnage, si installé)
+    'PROFILING_ARM_SECONDS': 3600,  # Expiration d'un armement non consommé
+    'PROFILING_MAX_ARMED': 50,  # Requêtes profilées au plus par armement
+    'PROFILING_POLL_SECONDS': 5,  # Relecture de l'état d'armement par processus
+    'PROFILING_MAX_QUERIES': 500,  # Requêtes SQL conservées par profil
+    'QUERYLOG_ENABLED': True,  # Journal des requêtes SQL lentes (commande slow_queries)
+    'QUERYLOG_SLOW_MS': 200,  # Seuil d'enregistrement d'une requête
+    'QUERYLOG_EXPLAIN_INTERVAL': 300,  # Un EXPLAIN par empreinte et par processus dans cet intervalle
+    'QUERYLOG_EXPLAIN_ANALYZE': False,  # PostgreSQL : EXPLAIN ANALYZE (réexécute les SELECT lents)
     'DEFAULT_CURRENCY': 'XOF',  # Franc CFA
     'DEFAULT_COUNTRY': 'CI',    # Côte d'Ivoire
     'DEFAULT_TIMEZONE': 'Africa/Abidjan',
@@ -8,7 +8,7 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.utils import timezone
 from rest_framework import permissions
-from apps.core.views import health_check
+from apps.core.views import BatchView, ProfilingView, health_check, metrics_view
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 def api_root(request):
@@ -23,6 +23,9 @@ def api_root(request):
             "api_docs": "/api/docs/",
             "api_schema": "/api/schema/",
             "health": "/api/health/",
+            "batch": "/api/batch/",
+            "metrics": "/api/metrics/",
+            "profiling": "/api/profiling/",
             "auth": "/api/auth/"
         },
         "apps": {
@@ -63,6 +66,9 @@ urlpatterns = [
     # API URLs
     path('api/', api_root, name='api-root'),
     path('api/health/', health_check, name='health-check'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/profiling/', ProfilingView.as_view(), name='profiling'),
     #path('api/health/', api_health, name='api-health'),
     
     # Documentation API
@@ -75,7 +81,7 @@ urlpatterns = [
     path('api/sales/', include('apps.sales.urls')),
     # path('api/suppliers/', include('apps.suppliers.urls')),
     # path('api/reporting/', include('apps.reporting.urls')),
-    # path('api/sync/', include('apps.sync.urls')),
+    path('api/sync/', include('apps.sync.urls')),
     # path('api/licensing/', include('apps.licensing.urls')),
 ]
 